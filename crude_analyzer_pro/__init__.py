@@ -0,0 +1,58 @@
+# Crude Analyzer Pro – núcleo de cálculo (sin Streamlit)
+#
+# Los nombres públicos se importan a demanda (PEP 562): `import crude_analyzer_pro`
+# no carga nada, y `from crude_analyzer_pro import generar_informe` carga sólo
+# `informe` y sus dependencias (fpdf). Así matplotlib, fpdf, sqlite3 o
+# multiprocessing se pagan recién cuando se usa la función que los necesita.
+
+import importlib
+
+__version__ = "2.1"
+
+# Submódulo -> nombres que re-exporta el paquete
+_EXPORTADOS = {
+    "ajuste": ["ModeloTBP", "ajustar_lote", "volumen_modelo"],
+    "calculos": [
+        "CORTES", "CRUDO_LIVIANO", "CRUDO_MEDIANO", "CRUDO_PESADO", "FRACCIONES", "PRECIOS_DEFECTO",
+        "analizar_lote", "apilar_curvas", "grados_api", "ingresos", "resumen_lote",
+        "tabla_ingresos", "tabla_rendimiento", "tipo_crudo", "vector_precios",
+        "volumenes_por_corte", "watson_kw",
+    ],
+    "biblioteca": ["Biblioteca"],
+    "cache": ["CacheLRU", "hash_contenido"],
+    "cache_disco": ["CacheDisco"],
+    "caracterizacion": ["pseudocomponentes", "pseudocomponentes_lote", "tabla_pseudocomponentes", "vabp"],
+    "conversion": ["TIPOS_CURVA", "convertir_a_tbp", "convertir_lote"],
+    "curvas": ["CurvaTBP", "limites_de_cortes", "rendimientos_lote", "volumen_acumulado_lote"],
+    "decimacion": ["indices_lttb", "lttb"],
+    "dha": ["agregar_dha", "es_dha", "leer_dha"],
+    "escenarios": [
+        "ingresos_escenarios", "percentiles", "precios_grilla", "precios_montecarlo",
+        "resumen_escenarios",
+    ],
+    "historico": ["Backtest", "leer_historial"],
+    "ingesta": ["leer_curva", "reducir_curva"],
+    "informe": ["PDF", "generar_informe", "limpiar_emoji"],
+    "mezclas": [
+        "Componentes", "curva_mezcla", "evaluar_mezclas", "optimizar_mezcla", "propiedades_mezcla",
+        "tabla_mezcla",
+    ],
+    "sesion": ["PresupuestoSesion", "curva_compacta", "tamano"],
+    "trabajos": ["ColaInformes", "clave_informe"],
+}
+_MODULO_DE = {nombre: modulo for modulo, nombres in _EXPORTADOS.items() for nombre in nombres}
+
+__all__ = sorted(_MODULO_DE)
+
+
+def __getattr__(nombre):
+    modulo = _MODULO_DE.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nombre)
+    globals()[nombre] = valor  # las próximas búsquedas no pasan por __getattr__
+    return valor
+
+
+def __dir__():
+    return sorted([*globals(), *_MODULO_DE])
@@ -0,0 +1,158 @@
+# Ajuste de curvas TBP a la distribución generalizada de Riazi.
+#
+#   P* = (T - T0) / T0,   x = 1 - exp(-(B / A) P*^B)
+#
+# con T en K y x la fracción en volumen destilada acumulada. Es una Weibull
+# con origen en T0, así que con T0 fijo se linealiza:
+#   ln P* = (1/B) ln(A/B) + (1/B) ln(-ln(1 - x))
+# y A, B salen de una regresión lineal cerrada. El ajuste prueba una grilla de
+# T0 por ensayo (y después una más fina alrededor del mejor) y se queda con el
+# de menor error en volumen. Todas las regresiones de un bloque de ensayos son
+# sumas sobre arrays (ensayos, T0, puntos): no hay bucles por ensayo.
+#
+# Un ensayo queda descripto por (T0, A, B) más el error del ajuste, y
+# `ModeloTBP` evalúa cortes, gráficos y mezclas igual que una `CurvaTBP`,
+# incluso por encima del último punto medido.
+
+import numpy as np
+
+from .curvas import VOLUMEN_TOTAL, _limites, _preparar_lote, volumen_acumulado_lote
+
+KELVIN = 273.15
+PUNTOS_AJUSTE = 48
+BLOQUE = 2048
+
+
+def volumen_modelo(t0, a, b, temperaturas):
+    """% de volumen destilado del modelo de Riazi a `temperaturas` [°C]; los parámetros se broadcastean."""
+    t0, a, b = (np.asarray(p, dtype=float) for p in (t0, a, b))
+    temperaturas = np.asarray(temperaturas, dtype=float)
+    p = np.maximum((temperaturas + KELVIN - t0) / t0, 0.0)
+    with np.errstate(over="ignore", invalid="ignore"):
+        x = -np.expm1(-(b / a) * p ** b)
+    x = np.where(temperaturas == np.inf, 1.0, np.where(temperaturas == -np.inf, 0.0, x))
+    return VOLUMEN_TOTAL * x
+
+
+def temperatura_modelo(t0, a, b, volumenes):
+    """Temperatura [°C] a la que el modelo destila `volumenes` [%] (inversa de `volumen_modelo`)."""
+    x = np.clip(np.asarray(volumenes, dtype=float) / VOLUMEN_TOTAL, 0.0, 1.0)
+    with np.errstate(divide="ignore"):
+        p = ((a / b) * -np.log1p(-x)) ** (1 / b)
+    return t0 * (1 + p) - KELVIN
+
+
+def _regresion(y, u, peso):
+    # Mínimos cuadrados y = c + s u por fila, con pesos 0/1 sobre el último eje
+    sw = peso.sum(-1)
+    su, sy = (peso * u).sum(-1), (peso * y).sum(-1)
+    suu, suy = (peso * u * u).sum(-1), (peso * u * y).sum(-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = (sw * suy - su * sy) / (sw * suu - su * su)
+        c = (sy - s * su) / sw
+    return c, s
+
+
+def _probar_t0(t_k, x, u, peso, t0):
+    # t_k, x, u, peso: (m, 1, q); t0: (m, g, 1). Devuelve a, b, rmse (m, g).
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = np.log(t_k / t0 - 1)
+    validos = peso * (t_k > t0)
+    c, s = _regresion(np.where(validos > 0, y, 0.0), u, validos)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        b = 1 / s
+        a = b * np.exp(c * b)
+        p = np.maximum(t_k / t0 - 1, 0.0)
+        x_modelo = -np.expm1(-(b / a)[..., None] * p ** b[..., None])
+        rmse = VOLUMEN_TOTAL * np.sqrt(np.mean((x_modelo - x) ** 2, axis=-1))
+    rmse = np.where((s > 0) & np.isfinite(a) & (validos.sum(-1) >= 3), rmse, np.inf)
+    return a, b, np.where(np.isnan(rmse), np.inf, rmse)
+
+
+def _ajustar_bloque(temperaturas, volumenes, candidatos):
+    t, _, vacias = _preparar_lote(temperaturas, volumenes, VOLUMEN_TOTAL)
+    m = t.shape[0]
+    # Curvas remuestreadas a una grilla fija de temperaturas: el costo no depende del largo del archivo
+    grilla = t[:, :1] + (t[:, -1:] - t[:, :1]) * np.linspace(0.0, 1.0, PUNTOS_AJUSTE)
+    x = volumen_acumulado_lote(temperaturas, volumenes, grilla) / VOLUMEN_TOTAL
+    peso = ((x > 1e-4) & (x < 1 - 1e-4)).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.where(peso > 0, np.log(-np.log1p(-x)), 0.0)
+    t_k = grilla + KELVIN
+
+    # T0 por debajo de la primera temperatura con volumen destilado
+    primera = np.where(peso > 0, t_k, np.inf).min(axis=1, keepdims=True)
+    primera = np.where(np.isfinite(primera), primera, t_k[:, :1])
+    relativo = np.linspace(0.5, 0.999, candidatos)
+    t0 = primera * relativo
+    a, b, rmse = _probar_t0(t_k[:, None], x[:, None], u[:, None], peso[:, None], t0[..., None])
+    mejor = np.argmin(rmse, axis=1)
+
+    # Segunda pasada, más fina, entre los vecinos del mejor T0
+    paso = relativo[1] - relativo[0]
+    centro = relativo[mejor][:, None]
+    fino = np.clip(centro + paso * np.linspace(-1.0, 1.0, candidatos), 0.3, 0.9999)
+    t0_fino = primera * fino
+    a2, b2, rmse2 = _probar_t0(t_k[:, None], x[:, None], u[:, None], peso[:, None], t0_fino[..., None])
+    j = np.argmin(rmse2, axis=1)
+    filas = np.arange(m)
+
+    resultado = {"t0": t0_fino[filas, j], "a": a2[filas, j], "b": b2[filas, j], "rmse": rmse2[filas, j]}
+    fallidos = ~np.isfinite(resultado["rmse"]) | vacias
+    for clave in resultado:
+        resultado[clave][fallidos] = np.nan
+    return resultado
+
+
+def ajustar_lote(temperaturas, volumenes, candidatos=24, bloque=BLOQUE):
+    """Ajusta el modelo de Riazi a un lote de curvas (m, n) rellenas con NaN, por bloques de ensayos.
+
+    Devuelve un dict de arrays (m,): 't0' [K], 'a', 'b' y 'rmse' (error
+    cuadrático medio en % de volumen sobre el tramo medido). Las curvas que
+    no se pueden ajustar (menos de tres puntos útiles) quedan en NaN.
+    """
+    temperaturas = np.atleast_2d(np.asarray(temperaturas, dtype=float))
+    volumenes = np.atleast_2d(np.asarray(volumenes, dtype=float))
+    partes = [_ajustar_bloque(temperaturas[i:i + bloque], volumenes[i:i + bloque], candidatos)
+              for i in range(0, len(temperaturas), bloque)]
+    if not partes:
+        return {clave: np.empty(0) for clave in ("t0", "a", "b", "rmse")}
+    return {clave: np.concatenate([p[clave] for p in partes]) for clave in partes[0]}
+
+
+class ModeloTBP:
+    """Curva TBP descripta por los parámetros de Riazi; se usa igual que una `CurvaTBP`.
+
+    `temperaturas` / `volumenes` son una muestra de `puntos` valores del modelo
+    entre 0 y 99.5 % destilado, para graficar o guardar.
+    """
+
+    __slots__ = ("t0", "a", "b", "rmse", "temperaturas", "volumenes", "volumen_total")
+
+    def __init__(self, t0, a, b, rmse=np.nan, puntos=200):
+        self.t0, self.a, self.b, self.rmse = float(t0), float(a), float(b), float(rmse)
+        self.volumen_total = VOLUMEN_TOTAL
+        self.volumenes = np.linspace(0.0, 99.5, puntos)
+        self.temperaturas = temperatura_modelo(self.t0, self.a, self.b, self.volumenes)
+
+    @classmethod
+    def ajustar(cls, curva):
+        """Modelo ajustado a una `CurvaTBP`."""
+        r = ajustar_lote(curva.temperaturas, curva.volumenes)
+        return cls(r["t0"][0], r["a"][0], r["b"][0], r["rmse"][0])
+
+    def __len__(self):
+        return self.temperaturas.size
+
+    def parametros(self):
+        return {"t0": self.t0, "a": self.a, "b": self.b, "rmse": self.rmse}
+
+    def volumen_acumulado(self, t):
+        v = volumen_modelo(self.t0, self.a, self.b, t)
+        return float(v) if v.ndim == 0 else v
+
+    def rendimientos(self, limites):
+        return np.diff(self.volumen_acumulado(_limites(limites)))
+
+    def corte(self, inicio, fin):
+        return float(np.diff(self.volumen_acumulado([inicio, fin]))[0])
@@ -0,0 +1,150 @@
+# Arranque en frío: precalentamiento de dependencias pesadas y medición del
+# tiempo hasta el primer pintado.
+#
+#   python -m crude_analyzer_pro.arranque                      # 3 procesos nuevos, sin precalentar
+#   python -m crude_analyzer_pro.arranque --precalentar -o arranque.json
+#
+# Cada repetición corre en un proceso nuevo: importa Streamlit, ejecuta la app
+# una vez con AppTest (primer pintado) y después mide el primer gráfico y el
+# primer PDF, que son los que pagan la importación de matplotlib y fpdf. Con
+# --precalentar, `precalentar()` corre entre el primer pintado y esas medidas,
+# como lo hace la app en segundo plano.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from .metricas import medir
+
+SCRIPT_DEFECTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analizercrudo.py")
+PESADOS = ["pandas", "pyarrow", "matplotlib", "fpdf", "sqlite3", "multiprocessing"]
+
+
+def precalentar():
+    """Importa matplotlib y fpdf y dibuja un gráfico y un PDF mínimos (fuentes, backend Agg, logo).
+
+    Devuelve los segundos de cada etapa. No toca las cachés de figuras ni de resultados.
+    """
+    from .graficos import _figura, _png
+
+    tiempos = {}
+    inicio = time.perf_counter()
+    with medir("precalentar_grafico"):
+        fig = _figura(figsize=(2, 2))
+        fig.subplots().plot([0, 1], [0, 1])
+        _png(fig, 50, "precalentar")
+    tiempos["grafico"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with medir("precalentar_pdf"):
+        from .informe import generar_informe
+
+        generar_informe("", "", "")
+    tiempos["pdf"] = time.perf_counter() - inicio
+    return tiempos
+
+
+def precalentar_en_segundo_plano():
+    """Corre `precalentar` en un hilo demonio y devuelve el hilo."""
+    hilo = threading.Thread(target=precalentar, name="precalentar", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def _medir_proceso(script, con_precalentar):
+    """Tiempos de este proceso (que tiene que ser nuevo) hasta el primer pintado, gráfico y PDF."""
+    tiempos = {}
+    inicio = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    tiempos["importar_streamlit"] = time.perf_counter() - inicio
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    os.environ["CRUDE_PRECALENTAR"] = "0"  # el precalentamiento se mide aparte
+    inicio = time.perf_counter()
+    app = AppTest.from_file(os.path.abspath(script), default_timeout=120)
+    app.run()
+    tiempos["primer_pintado"] = time.perf_counter() - inicio
+    if app.exception:
+        raise RuntimeError(f"La app falló en el primer pintado: {app.exception[0].value}")
+    cargados = [m for m in PESADOS if m in sys.modules]
+
+    if con_precalentar:
+        inicio = time.perf_counter()
+        precalentar()
+        tiempos["precalentar"] = time.perf_counter() - inicio
+
+    from .calculos import CORTES, tabla_rendimiento
+    from .curvas import CurvaTBP
+    from .graficos import grafico_rendimiento, grafico_tbp
+    from .informe import generar_informe
+    from .sinteticos import curva_tbp
+
+    temperaturas, volumenes = curva_tbp(200, semilla=0)
+    df_rend = tabla_rendimiento(CurvaTBP(temperaturas, volumenes).rendimientos(CORTES))
+    inicio = time.perf_counter()
+    png_tbp = grafico_tbp(temperaturas, volumenes, "informe")
+    tiempos["primer_grafico"] = time.perf_counter() - inicio
+    png_rend = grafico_rendimiento(df_rend["Producto"], df_rend["Volumen [%]"], "informe")
+    inicio = time.perf_counter()
+    generar_informe(10.0, 30.0, "Crudo mediano", rendimiento=df_rend, grafico_tbp=png_tbp,
+                    grafico_rendimiento=png_rend)
+    tiempos["primer_pdf"] = time.perf_counter() - inicio
+    return {"tiempos": tiempos, "cargados_al_primer_pintado": cargados}
+
+
+def medir_arranque(script=SCRIPT_DEFECTO, repeticiones=3, con_precalentar=False):
+    """Corre `_medir_proceso` en `repeticiones` procesos nuevos; devuelve las corridas y la mediana por etapa."""
+    corridas = []
+    for _ in range(repeticiones):
+        argumentos = [sys.executable, "-m", "crude_analyzer_pro.arranque", "--hijo", "--script", script]
+        if con_precalentar:
+            argumentos.append("--precalentar")
+        inicio = time.perf_counter()
+        # Sin caché en disco: el primer gráfico y el primer PDF tienen que dibujarse de verdad
+        proceso = subprocess.run(argumentos, capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(script)),
+                                 env={**os.environ, "CRUDE_CACHE_DISCO": "0"})
+        total = time.perf_counter() - inicio
+        if proceso.returncode != 0:
+            raise RuntimeError(proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else
+                               f"El proceso de medición terminó con código {proceso.returncode}")
+        corrida = json.loads(proceso.stdout.strip().splitlines()[-1])
+        corrida["tiempos"]["proceso_total"] = total
+        corridas.append(corrida)
+    medianas = {etapa: float(np.median([c["tiempos"][etapa] for c in corridas])) for etapa in corridas[0]["tiempos"]}
+    return {"script": script, "precalentar": con_precalentar, "corridas": corridas, "mediana_s": medianas}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m crude_analyzer_pro.arranque",
+                                     description="Mide el arranque en frío y el tiempo hasta el primer pintado.")
+    parser.add_argument("--script", default=SCRIPT_DEFECTO, help="App de Streamlit a medir (default: analizercrudo.py)")
+    parser.add_argument("-r", "--repeticiones", type=int, default=3, help="Procesos nuevos a medir (default: 3)")
+    parser.add_argument("--precalentar", action="store_true", help="Precalentar después del primer pintado")
+    parser.add_argument("-o", "--salida", help="Archivo JSON con las corridas")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.hijo:
+        print(json.dumps(_medir_proceso(args.script, args.precalentar)))
+        return 0
+
+    resultado = medir_arranque(args.script, args.repeticiones, args.precalentar)
+    for etapa, segundos in resultado["mediana_s"].items():
+        print(f"{etapa:>20} {segundos * 1e3:9.1f} ms")
+    print(f"{'cargados':>20} {', '.join(resultado['corridas'][0]['cargados_al_primer_pintado'])}")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
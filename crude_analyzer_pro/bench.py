@@ -0,0 +1,322 @@
+# Benchmarks del analizador con datos sintéticos (ver `sinteticos`).
+#
+#   python -m crude_analyzer_pro.bench correr -o base.json
+#   python -m crude_analyzer_pro.bench correr --puntos 20 1000 --casos cortes informe_pdf -o nuevo.json
+#   python -m crude_analyzer_pro.bench comparar base.json nuevo.json --umbral 0.10
+#   python -m crude_analyzer_pro.bench soak --reruns 10000 -o soak.json
+#
+# `correr` mide cada caso para cada tamaño de curva y escribe un JSON con los
+# tiempos; `comparar` cruza dos corridas por (caso, puntos) y sale con código 1
+# si algún caso es más lento que la base por encima del umbral. `soak`
+# re-ejecuta la app con AppTest, con un ensayo nuevo en cada rerun, y sale con
+# código 1 si la memoria del proceso sigue creciendo después del calentamiento.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from . import __version__
+from .calculos import (
+    CORTES, FRACCIONES, PRECIOS_DEFECTO, grados_api, tabla_ingresos, tabla_rendimiento, tipo_crudo, watson_kw,
+)
+from .curvas import CurvaTBP
+from .ingesta import leer_curva
+from .sinteticos import csv_tbp, curva_tbp, pona
+
+PUNTOS_DEFECTO = (20, 1_000, 100_000, 1_000_000)
+REPETICIONES_DEFECTO = 5
+MUESTRA_MINIMA_S = 0.02
+RERUNS_SOAK = 10_000
+UMBRAL_SOAK_MB = 20.0
+
+
+def medir(funcion, repeticiones=REPETICIONES_DEFECTO, preparar=None):
+    """Tiempos [s] por llamada de `repeticiones` muestras, después de una llamada de calentamiento.
+
+    `preparar` corre antes de cada llamada y no se mide (p. ej. para vaciar cachés).
+    Sin `preparar`, las funciones que tardan microsegundos se repiten dentro de
+    cada muestra hasta sumar ~`MUESTRA_MINIMA_S`, para que el reloj no domine.
+    """
+    if preparar is not None:
+        preparar()
+    inicio = time.perf_counter()
+    funcion()
+    calentamiento = time.perf_counter() - inicio
+    vueltas = 1 if preparar is not None else max(1, int(MUESTRA_MINIMA_S / max(calentamiento, 1e-7)))
+
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        for _ in range(vueltas):
+            funcion()
+        tiempos.append((time.perf_counter() - inicio) / vueltas)
+    return tiempos
+
+
+def _datos(puntos, semilla=0):
+    temperaturas, volumenes = curva_tbp(puntos, semilla)
+    rng = np.random.default_rng(semilla)
+    return {
+        "csv": csv_tbp(puntos, semilla),
+        "temperaturas": temperaturas,
+        "volumenes": volumenes,
+        "curva": CurvaTBP(temperaturas, volumenes),
+        "densidades": rng.uniform(780, 960, puntos),
+        "temps_k": rng.uniform(550, 800, puntos),
+        "pona": pona(semilla),
+    }
+
+
+def _casos(d):
+    """Casos de benchmark sobre los datos `d` de un tamaño: nombre -> (función, preparar)."""
+    from .graficos import CACHE_FIGURAS, grafico_histograma, grafico_pona, grafico_rendimiento, grafico_tbp
+    from .informe import generar_informe
+
+    vaciar = CACHE_FIGURAS.limpiar
+    CACHE_FIGURAS.disco = None  # se mide el dibujo, no la lectura de la caché en disco
+    curva = d["curva"]
+    cortes = curva.rendimientos(CORTES)
+    df_rend = tabla_rendimiento(cortes)
+    df_ingresos = tabla_ingresos(curva.rendimientos(FRACCIONES), PRECIOS_DEFECTO)
+    paraf, olef, naft, arom = d["pona"]
+    pona_dict = {"Parafínicos": paraf, "Olefínicos": olef, "Nafténicos": naft, "Aromáticos": arom}
+    png_tbp = grafico_tbp(d["temperaturas"], d["volumenes"], "informe")
+    png_rend = grafico_rendimiento(df_rend["Producto"], df_rend["Volumen [%]"], "informe")
+
+    def kw_api():
+        api = grados_api(d["densidades"])
+        return watson_kw(d["temps_k"], d["densidades"]), api, tipo_crudo(api)
+
+    def informe_pdf():
+        return generar_informe(10.0, 30.0, tipo_crudo(30.0), ingresos=df_ingresos, pona=pona_dict,
+                               rendimiento=df_rend, grafico_tbp=png_tbp, grafico_rendimiento=png_rend)
+
+    def informe_completo():
+        df, _ = leer_curva(d["csv"])
+        c = CurvaTBP(df["Temperatura"], df["Volumen"])
+        rend = tabla_rendimiento(c.rendimientos(CORTES))
+        return generar_informe(
+            round(float(watson_kw(673.15, 850.0)), 3), round(float(grados_api(850.0)), 1), tipo_crudo(35.0),
+            ingresos=tabla_ingresos(c.rendimientos(FRACCIONES), PRECIOS_DEFECTO), pona=pona_dict,
+            rendimiento=rend,
+            grafico_tbp=grafico_tbp(df["Temperatura"], df["Volumen"], "informe"),
+            grafico_rendimiento=grafico_rendimiento(rend["Producto"], rend["Volumen [%]"], "informe"),
+        )
+
+    return {
+        "parseo_tbp": (lambda: leer_curva(d["csv"]), None),
+        "parseo_tbp_reducido": (lambda: leer_curva(d["csv"], 2000), None),
+        "kw_api": (kw_api, None),
+        "curva_tbp": (lambda: CurvaTBP(d["temperaturas"], d["volumenes"]), None),
+        "fracciones": (lambda: curva.rendimientos(FRACCIONES), None),
+        "cortes": (lambda: curva.rendimientos(CORTES), None),
+        "grafico_tbp": (lambda: grafico_tbp(d["temperaturas"], d["volumenes"], "informe"), vaciar),
+        "grafico_rendimiento": (lambda: grafico_rendimiento(df_rend["Producto"], df_rend["Volumen [%]"]), vaciar),
+        "grafico_pona": (lambda: grafico_pona(paraf, olef, naft, arom), vaciar),
+        "grafico_histograma": (lambda: grafico_histograma(d["densidades"]), vaciar),
+        "informe_pdf": (informe_pdf, None),
+        "informe_completo": (informe_completo, vaciar),
+    }
+
+
+CASOS = [
+    "parseo_tbp", "parseo_tbp_reducido", "kw_api", "curva_tbp", "fracciones", "cortes",
+    "grafico_tbp", "grafico_rendimiento", "grafico_pona", "grafico_histograma", "informe_pdf", "informe_completo",
+]
+
+
+def correr(puntos=PUNTOS_DEFECTO, casos=None, repeticiones=REPETICIONES_DEFECTO, etiqueta="", salida=sys.stderr):
+    """Corre los benchmarks y devuelve el dict que se guarda como JSON."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    casos = casos or CASOS
+    resultados = []
+    for n in puntos:
+        definidos = _casos(_datos(n))
+        for caso in casos:
+            funcion, preparar = definidos[caso]
+            tiempos = medir(funcion, repeticiones, preparar)
+            resultados.append({
+                "caso": caso,
+                "puntos": n,
+                "repeticiones": repeticiones,
+                "min_s": min(tiempos),
+                "mediana_s": float(np.median(tiempos)),
+                "media_s": float(np.mean(tiempos)),
+                "desvio_s": float(np.std(tiempos)),
+            })
+            if salida is not None:
+                print(f"{caso:>22} {n:>9,} puntos  {_duracion(float(np.median(tiempos)))}", file=salida)
+    return {
+        "etiqueta": etiqueta,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "version": __version__,
+        "entorno": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(base, nuevo, umbral=0.10, estadistico="min_s"):
+    """Cambio relativo de `estadistico` entre dos corridas, una fila por (caso, puntos) en común.
+
+    Por defecto se compara el mínimo, que es el estimador menos ruidoso del
+    costo propio de cada caso; `estadistico="mediana_s"` incluye la variabilidad.
+    """
+    columnas = ["caso", "puntos", estadistico]
+    df = pd.merge(
+        pd.DataFrame(base["resultados"])[columnas],
+        pd.DataFrame(nuevo["resultados"])[columnas],
+        on=["caso", "puntos"], suffixes=("_base", "_nuevo"),
+    ).rename(columns={f"{estadistico}_base": "base_s", f"{estadistico}_nuevo": "nuevo_s"})
+    df["cambio"] = df["nuevo_s"] / df["base_s"] - 1
+    df["estado"] = np.where(df["cambio"] > umbral, "regresión",
+                            np.where(df["cambio"] < -umbral, "mejora", "sin cambios"))
+    return df
+
+
+def soak(reruns=RERUNS_SOAK, cada=100, puntos=200, script=None, salida=sys.stderr):
+    """Memoria residente del proceso a lo largo de `reruns` ejecuciones de la app.
+
+    Cada rerun activa un ensayo sintético distinto (como si el usuario cargara
+    otro archivo), así que dibuja gráficos nuevos y llena las cachés en
+    memoria, que son acotadas. La caché en disco no se usa. El crecimiento se
+    mide entre la mediana del segundo décimo de las muestras (ya pasado el
+    calentamiento) y la del último décimo.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    from .arranque import SCRIPT_DEFECTO
+    from .cache import CACHE_RESULTADOS, analizar_ensayo, cargar_tbp
+    from .graficos import CACHE_FIGURAS
+    from .metricas import memoria
+    from .sesion import curva_compacta
+
+    script = os.path.abspath(script or SCRIPT_DEFECTO)
+    sys.path.insert(0, os.path.dirname(script))
+    os.environ["CRUDE_PRECALENTAR"] = "0"
+    CACHE_RESULTADOS.disco = CACHE_FIGURAS.disco = None
+    app = AppTest.from_file(script, default_timeout=120)
+
+    muestras = []
+    inicio = time.perf_counter()
+    for i in range(reruns):
+        ensayo = cargar_tbp(csv_tbp(puntos, semilla=i))
+        analisis = analizar_ensayo(ensayo, 850.0, 673.15)
+        estado = app.session_state
+        estado.tbp = curva_compacta(ensayo.df["Temperatura"], ensayo.df["Volumen"])
+        estado.tbp_hash, estado.analisis = ensayo.hash, analisis
+        estado.kw, estado.api, estado.tipo_crudo = analisis["kw"], analisis["api"], analisis["tipo"]
+        app.run()
+        if app.exception:
+            raise RuntimeError(f"La app falló en el rerun {i + 1}: {app.exception[0].value}")
+        if (i + 1) % cada == 0 or i + 1 == reruns:
+            muestras.append((i + 1, memoria()["rss_bytes"]))
+            if salida is not None:
+                print(f"{i + 1:>8,} reruns  {muestras[-1][1] / 1024 ** 2:8.1f} MB  "
+                      f"{_duracion((time.perf_counter() - inicio) / (i + 1))}/rerun", file=salida)
+
+    rss = np.array([m for _, m in muestras], dtype=float)
+    decimo = max(len(rss) // 10, 1)
+    crecimiento = float(np.median(rss[-decimo:]) - np.median(rss[decimo:2 * decimo] if len(rss) > decimo else rss))
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "version": __version__,
+        "reruns": reruns,
+        "puntos": puntos,
+        "segundos": time.perf_counter() - inicio,
+        "muestras": [{"reruns": n, "rss_bytes": m} for n, m in muestras],
+        "pico_bytes": memoria()["pico_bytes"],
+        "crecimiento_bytes": crecimiento,
+    }
+
+
+def _duracion(segundos):
+    return f"{segundos * 1e6:8.1f} µs" if segundos < 1e-3 else f"{segundos * 1e3:8.2f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m crude_analyzer_pro.bench",
+                                     description="Benchmarks del analizador con curvas TBP sintéticas.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_correr = sub.add_parser("correr", help="Mide los casos y escribe los resultados en JSON")
+    p_correr.add_argument("--puntos", type=int, nargs="+", default=list(PUNTOS_DEFECTO),
+                          help="Tamaños de curva a medir (default: 20 1000 100000 1000000)")
+    p_correr.add_argument("--casos", nargs="+", choices=CASOS, help="Casos a medir (default: todos)")
+    p_correr.add_argument("-r", "--repeticiones", type=int, default=REPETICIONES_DEFECTO)
+    p_correr.add_argument("--etiqueta", default="", help="Texto libre para identificar la corrida (rama, commit...)")
+    p_correr.add_argument("-o", "--salida", help="Archivo JSON de salida (default: stdout)")
+
+    p_comparar = sub.add_parser("comparar", help="Compara dos corridas y marca las regresiones")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("nuevo")
+    p_comparar.add_argument("--umbral", type=float, default=0.10,
+                            help="Cambio relativo que cuenta como regresión (default: 0.10)")
+    p_comparar.add_argument("--estadistico", choices=["min_s", "mediana_s", "media_s"], default="min_s",
+                            help="Tiempo que se compara (default: min_s)")
+
+    p_soak = sub.add_parser("soak", help="Re-ejecuta la app muchas veces y verifica que la memoria no crezca")
+    p_soak.add_argument("--reruns", type=int, default=RERUNS_SOAK,
+                        help="Reruns de la app (default: 10000, ~1,5 h a 0,6 s por rerun)")
+    p_soak.add_argument("--cada", type=int, default=100, help="Reruns entre muestras de memoria (default: 100)")
+    p_soak.add_argument("--puntos", type=int, default=200, help="Puntos de cada curva sintética (default: 200)")
+    p_soak.add_argument("--script", help="App de Streamlit (default: analizercrudo.py)")
+    p_soak.add_argument("--umbral-mb", type=float, default=UMBRAL_SOAK_MB,
+                        help="Crecimiento después del calentamiento que cuenta como fuga (default: 20 MB)")
+    p_soak.add_argument("-o", "--salida", help="Archivo JSON de salida (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.comando == "soak":
+        resultado = soak(args.reruns, args.cada, args.puntos, args.script)
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                f.write(texto)
+        else:
+            print(texto)
+        crecimiento_mb = resultado["crecimiento_bytes"] / 1024 ** 2
+        print(f"{args.reruns:,} reruns: la memoria creció {crecimiento_mb:+.1f} MB después del calentamiento "
+              f"(umbral {args.umbral_mb:g} MB).", file=sys.stderr)
+        return 1 if crecimiento_mb > args.umbral_mb else 0
+
+    if args.comando == "correr":
+        resultado = correr(args.puntos, args.casos, args.repeticiones, args.etiqueta)
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                f.write(texto)
+        else:
+            print(texto)
+        return 0
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.nuevo, encoding="utf-8") as f:
+        nuevo = json.load(f)
+    df = comparar(base, nuevo, args.umbral, args.estadistico)
+    for fila in df.itertuples():
+        print(f"{fila.caso:>22} {fila.puntos:>9,} puntos  {_duracion(fila.base_s)} -> "
+              f"{_duracion(fila.nuevo_s)}  {fila.cambio:+7.1%}  {fila.estado}")
+    regresiones = int((df["estado"] == "regresión").sum())
+    print(f"{len(df)} casos comparados, {regresiones} regresiones (umbral {args.umbral:.0%}).")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
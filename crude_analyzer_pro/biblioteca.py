@@ -0,0 +1,281 @@
+# Biblioteca local de ensayos en SQLite.
+# Cada curva TBP se guarda una sola vez (por hash de contenido) y cada ensayo
+# (curva + densidad + temperatura media) con su análisis ya calculado: Kw, API,
+# clasificación, volúmenes por fracción y por corte e ingreso. Las columnas de
+# propiedades y rendimientos están indexadas, así que filtrar decenas de miles
+# de ensayos lleva milisegundos y cargar uno no recalcula nada.
+# Cada curva tiene además su ajuste al modelo de Riazi (tabla `ajustes`, ver
+# `ajuste.py`): con tres parámetros por curva se buscan ensayos parecidos sin
+# leer las curvas, y un ensayo guardado en modo compacto no guarda la curva.
+
+import os
+import sqlite3
+from collections import namedtuple
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .ajuste import ModeloTBP, ajustar_lote, volumen_modelo
+from .cache import hash_contenido
+from .calculos import CORTES, FRACCIONES, analizar_lote, apilar_curvas
+from .curvas import CurvaTBP
+
+RUTA_DEFECTO = os.environ.get("CRUDE_BIBLIOTECA", "biblioteca_ensayos.sqlite")
+
+COLUMNAS_FRACCIONES = {fr: f"fraccion_{i}" for i, fr in enumerate(FRACCIONES)}
+COLUMNAS_CORTES = {corte: f"corte_{i}" for i, corte in enumerate(CORTES)}
+_VOLUMENES = [*COLUMNAS_FRACCIONES.values(), *COLUMNAS_CORTES.values()]
+_INDEXADAS = ["nombre", "api", "kw", "tipo", "ingreso", *_VOLUMENES]
+
+ESQUEMA = "\n".join([
+    """
+    CREATE TABLE IF NOT EXISTS curvas (
+        hash TEXT PRIMARY KEY,
+        puntos INTEGER NOT NULL,
+        temperaturas BLOB NOT NULL,
+        volumenes BLOB NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS ensayos (
+        id INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL,
+        hash TEXT NOT NULL REFERENCES curvas(hash),
+        fecha TEXT NOT NULL,
+        densidad REAL NOT NULL,
+        temp_k REAL NOT NULL,
+        kw REAL NOT NULL,
+        api REAL NOT NULL,
+        tipo TEXT NOT NULL,
+        ingreso REAL,
+        """ + ",\n        ".join(f"{c} REAL NOT NULL" for c in _VOLUMENES) + """,
+        UNIQUE (hash, densidad, temp_k)
+    );
+    CREATE TABLE IF NOT EXISTS ajustes (
+        hash TEXT PRIMARY KEY REFERENCES curvas(hash) ON DELETE CASCADE,
+        t0 REAL,
+        a REAL,
+        b REAL,
+        rmse REAL
+    );""",
+    *(f"CREATE INDEX IF NOT EXISTS idx_ensayos_{c} ON ensayos({c});" for c in _INDEXADAS),
+])
+
+# Nombres de columna para mostrar, los mismos que `calculos.resumen_lote`
+ETIQUETAS = {
+    "nombre": "Nombre", "fecha": "Fecha", "densidad": "Densidad [kg/m³]", "temp_k": "Temp. media [K]",
+    "kw": "Kw", "api": "API", "tipo": "Clasificación",
+    **{c: fr for fr, c in COLUMNAS_FRACCIONES.items()},
+    **{c: corte for corte, c in COLUMNAS_CORTES.items()},
+    "ingreso": "Ingreso Total [USD]",
+}
+
+# Temperaturas [°C] en las que se compara el modelo de dos ensayos para medir su parecido
+TEMPERATURAS_HUELLA = np.linspace(0.0, 700.0, 29)
+
+EnsayoGuardado = namedtuple("EnsayoGuardado", ["id", "nombre", "hash", "fecha", "densidad", "temp_k",
+                                               "curva", "analisis", "ingreso"])
+
+
+def _real(valor):
+    return None if np.isnan(valor) else float(valor)
+
+
+def _rango(valor):
+    """(min, max) a partir de una tupla con extremos opcionales o de un escalar (sólo mínimo)."""
+    if valor is None:
+        return None, None
+    if np.ndim(valor) == 0:
+        return valor, None
+    return valor
+
+
+class Biblioteca:
+    """Ensayos guardados en un archivo SQLite; cada operación abre su propia conexión."""
+
+    def __init__(self, ruta=RUTA_DEFECTO):
+        self.ruta = ruta
+        with closing(self._conectar()) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(ESQUEMA)
+
+    def _conectar(self):
+        con = sqlite3.connect(self.ruta, timeout=30)
+        con.execute("PRAGMA foreign_keys=ON")
+        return con
+
+    def __len__(self):
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT COUNT(*) FROM ensayos").fetchone()[0]
+
+    def guardar_lote(self, nombres, curvas, densidades, temps_k, precios=None, claves=None, compacto=False):
+        """Analiza y guarda varios ensayos en una sola transacción; devuelve sus ids.
+
+        `curvas` son objetos `CurvaTBP` y `claves` el hash de cada archivo de
+        origen (por defecto, el hash de la curva). Un ensayo con la misma curva,
+        densidad y temperatura media reemplaza al guardado. Con `compacto` se
+        guarda sólo el ajuste de la curva y al cargarlo se usa el modelo.
+        """
+        curvas = list(curvas)
+        if claves is None:
+            claves = [hash_contenido(c.temperaturas.tobytes() + c.volumenes.tobytes()) for c in curvas]
+        densidades = np.broadcast_to(np.asarray(densidades, dtype=float), (len(curvas),))
+        temps_k = np.broadcast_to(np.asarray(temps_k, dtype=float), (len(curvas),))
+        T, V = apilar_curvas([(c.temperaturas, c.volumenes) for c in curvas])
+        resultado = analizar_lote(densidades, temps_k, T, V, precios)
+        ajuste = ajustar_lote(T, V)
+        ingreso = resultado.get("ingreso_total", np.full(len(curvas), np.nan))
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+        columnas = ["nombre", "hash", "fecha", "densidad", "temp_k", "kw", "api", "tipo", "ingreso", *_VOLUMENES]
+        insertar = (
+            f"INSERT INTO ensayos ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))}) "
+            "ON CONFLICT (hash, densidad, temp_k) DO UPDATE SET "
+            + ", ".join(f"{c} = excluded.{c}" for c in columnas if c not in ("hash", "densidad", "temp_k"))
+        )
+        ids = []
+        with closing(self._conectar()) as con, con:
+            for i, (nombre, curva, clave) in enumerate(zip(nombres, curvas, claves)):
+                # Una curva completa reemplaza a la guardada en modo compacto, nunca al revés
+                con.execute(
+                    "INSERT INTO curvas (hash, puntos, temperaturas, volumenes) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (hash) DO UPDATE SET puntos = excluded.puntos, "
+                    "temperaturas = excluded.temperaturas, volumenes = excluded.volumenes "
+                    "WHERE excluded.puntos > curvas.puntos",
+                    # Si el ajuste falló se guarda la curva aunque se haya pedido modo compacto
+                    (clave, 0, b"", b"") if compacto and not np.isnan(ajuste["rmse"][i]) else
+                    (clave, len(curva), curva.temperaturas.tobytes(), curva.volumenes.tobytes()),
+                )
+                con.execute("INSERT OR REPLACE INTO ajustes (hash, t0, a, b, rmse) VALUES (?, ?, ?, ?, ?)",
+                            (clave, *(_real(ajuste[p][i]) for p in ("t0", "a", "b", "rmse"))))
+                con.execute(insertar, (
+                    str(nombre), clave, fecha, float(densidades[i]), float(temps_k[i]),
+                    round(float(resultado["kw"][i]), 3), round(float(resultado["api"][i]), 1),
+                    str(resultado["tipo"][i]), None if np.isnan(ingreso[i]) else round(float(ingreso[i]), 2),
+                    *map(float, resultado["fracciones"][i]), *map(float, resultado["cortes"][i]),
+                ))
+                ids.append(con.execute(
+                    "SELECT id FROM ensayos WHERE hash = ? AND densidad = ? AND temp_k = ?",
+                    (clave, float(densidades[i]), float(temps_k[i])),
+                ).fetchone()[0])
+        return ids
+
+    def guardar(self, nombre, curva, densidad, temp_k, precios=None, clave=None, compacto=False):
+        """Guarda un ensayo con su análisis y devuelve su id (ver `guardar_lote`)."""
+        return self.guardar_lote([nombre], [curva], densidad, temp_k, precios,
+                                 None if clave is None else [clave], compacto=compacto)[0]
+
+    def buscar(self, nombre=None, api=None, kw=None, tipos=None, fracciones=None, cortes=None,
+               orden="id", descendente=True, limite=500):
+        """Ensayos que cumplen los filtros, como DataFrame indexado por id.
+
+        `api`, `kw` y los valores de `fracciones` / `cortes` (dicts nombre -> filtro)
+        son rangos (min, max) con extremos opcionales o un escalar, que se toma
+        como mínimo: `buscar(api=(28, 32), cortes={"Diesel (250–350 °C)": 25})`.
+        """
+        condiciones, parametros = [], []
+        if nombre:
+            condiciones.append("nombre LIKE ?")
+            parametros.append(f"%{nombre}%")
+        if tipos:
+            condiciones.append(f"tipo IN ({', '.join('?' * len(tipos))})")
+            parametros.extend(tipos)
+        rangos = {"api": api, "kw": kw}
+        rangos.update({COLUMNAS_FRACCIONES[fr]: v for fr, v in (fracciones or {}).items()})
+        rangos.update({COLUMNAS_CORTES[c]: v for c, v in (cortes or {}).items()})
+        for columna, valor in rangos.items():
+            minimo, maximo = _rango(valor)
+            if minimo is not None:
+                condiciones.append(f"{columna} >= ?")
+                parametros.append(float(minimo))
+            if maximo is not None:
+                condiciones.append(f"{columna} <= ?")
+                parametros.append(float(maximo))
+        if orden != "id" and orden not in ETIQUETAS:
+            raise ValueError(f"No se puede ordenar por {orden!r}")
+
+        consulta = f"SELECT id, {', '.join(ETIQUETAS)} FROM ensayos"
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+        consulta += f" ORDER BY {orden} {'DESC' if descendente else 'ASC'}"
+        if limite:
+            consulta += f" LIMIT {int(limite)}"
+        with closing(self._conectar()) as con:
+            df = pd.read_sql_query(consulta, con, params=parametros, index_col="id")
+        return df.rename(columns=ETIQUETAS)
+
+    def cargar(self, id_ensayo):
+        """Ensayo guardado con su curva y el análisis en el formato de `cache.analizar_ensayo`."""
+        with closing(self._conectar()) as con:
+            fila = con.execute(
+                f"SELECT e.id, e.nombre, e.hash, e.fecha, e.densidad, e.temp_k, e.kw, e.api, e.tipo, e.ingreso, "
+                f"{', '.join(_VOLUMENES)}, a.t0, a.a, a.b, a.rmse, c.puntos, c.temperaturas, c.volumenes "
+                "FROM ensayos e JOIN curvas c ON c.hash = e.hash LEFT JOIN ajustes a ON a.hash = e.hash "
+                "WHERE e.id = ?",
+                (int(id_ensayo),),
+            ).fetchone()
+        if fila is None:
+            raise KeyError(f"No existe el ensayo {id_ensayo} en la biblioteca")
+        id_, nombre, clave, fecha, densidad, temp_k, kw, api, tipo, ingreso = fila[:10]
+        volumenes = np.array(fila[10:10 + len(_VOLUMENES)], dtype=float)
+        t0, a, b, rmse, puntos = fila[10 + len(_VOLUMENES):-2]
+        k = len(FRACCIONES)
+        analisis = {"kw": kw, "api": api, "tipo": tipo, "fracciones": volumenes[:k], "cortes": volumenes[k:]}
+        if puntos:
+            curva = CurvaTBP(np.frombuffer(fila[-2], dtype=np.float64), np.frombuffer(fila[-1], dtype=np.float64))
+        else:
+            curva = ModeloTBP(t0, a, b, rmse)
+        return EnsayoGuardado(id_, nombre, clave, fecha, densidad, temp_k, curva, analisis, ingreso)
+
+    def ajustar_pendientes(self, bloque=2048):
+        """Ajusta el modelo de las curvas guardadas que todavía no lo tienen; devuelve cuántas ajustó."""
+        with closing(self._conectar()) as con:
+            pendientes = con.execute(
+                "SELECT c.hash, c.temperaturas, c.volumenes FROM curvas c "
+                "WHERE c.puntos > 0 AND c.hash NOT IN (SELECT hash FROM ajustes)"
+            ).fetchall()
+        for i in range(0, len(pendientes), bloque):
+            parte = pendientes[i:i + bloque]
+            T, V = apilar_curvas([(np.frombuffer(t, dtype=np.float64), np.frombuffer(v, dtype=np.float64))
+                                  for _, t, v in parte])
+            ajuste = ajustar_lote(T, V)
+            with closing(self._conectar()) as con, con:
+                con.executemany(
+                    "INSERT OR REPLACE INTO ajustes (hash, t0, a, b, rmse) VALUES (?, ?, ?, ?, ?)",
+                    [(clave, *(_real(ajuste[p][j]) for p in ("t0", "a", "b", "rmse")))
+                     for j, (clave, _, _) in enumerate(parte)],
+                )
+        return len(pendientes)
+
+    def similares(self, id_ensayo, cantidad=10):
+        """Ensayos cuya curva ajustada más se parece a la del ensayo `id_ensayo`.
+
+        La distancia es la diferencia RMS [% vol] entre los modelos evaluados en
+        `TEMPERATURAS_HUELLA`; sólo se leen los tres parámetros de cada curva.
+        """
+        with closing(self._conectar()) as con:
+            ids, t0, a, b = np.array(con.execute(
+                "SELECT e.id, a.t0, a.a, a.b FROM ensayos e JOIN ajustes a ON a.hash = e.hash "
+                "WHERE a.t0 IS NOT NULL"
+            ).fetchall(), dtype=float).reshape(-1, 4).T
+        if not np.any(ids == id_ensayo):
+            raise KeyError(f"El ensayo {id_ensayo} no está en la biblioteca o su curva no tiene ajuste")
+        huellas = volumen_modelo(t0[:, None], a[:, None], b[:, None], TEMPERATURAS_HUELLA)
+        distancia = np.sqrt(np.mean((huellas - huellas[ids == id_ensayo]) ** 2, axis=1))
+        orden = np.argsort(distancia, kind="stable")
+        orden = orden[ids[orden] != id_ensayo][:cantidad]
+        elegidos = ids[orden].astype(int).tolist()
+        with closing(self._conectar()) as con:
+            df = pd.read_sql_query(
+                f"SELECT id, {', '.join(ETIQUETAS)} FROM ensayos WHERE id IN ({', '.join('?' * len(elegidos))})",
+                con, params=elegidos, index_col="id",
+            )
+        df = df.rename(columns=ETIQUETAS).reindex(elegidos)
+        df.insert(0, "Distancia [% vol]", distancia[orden])
+        return df
+
+    def eliminar(self, id_ensayo):
+        """Borra un ensayo y, si ningún otro la usa, su curva."""
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM ensayos WHERE id = ?", (int(id_ensayo),))
+            con.execute("DELETE FROM curvas WHERE hash NOT IN (SELECT hash FROM ensayos)")
@@ -0,0 +1,254 @@
+# Caché en memoria de archivos subidos y resultados derivados.
+# Las claves se construyen con el hash del contenido del archivo, así que un
+# rerun de Streamlit con el mismo archivo no vuelve a parsear ni a validar nada.
+# Los resultados (y los gráficos, ver `graficos`) tienen además una copia en
+# disco (`cache_disco`) que comparten todos los procesos del servidor.
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .cache_disco import CACHE_DISCO
+from .calculos import CORTES, FRACCIONES, grados_api, tipo_crudo, watson_kw
+from .conversion import TBP, convertir_a_tbp
+from .curvas import CurvaTBP
+from .ingesta import leer_curva
+from .metricas import medir
+
+ArchivoTBP = namedtuple("ArchivoTBP", ["hash", "df", "curva", "ingesta"])
+
+
+def hash_contenido(datos):
+    """Hash corto (blake2b, 128 bits) de los bytes de un archivo."""
+    return hashlib.blake2b(datos, digest_size=16).hexdigest()
+
+
+def tamano_aproximado(objeto):
+    """Bytes aproximados que ocupa un resultado cacheado (DataFrames, arrays, tuplas, dicts)."""
+    if isinstance(objeto, pd.DataFrame):
+        return int(objeto.memory_usage(index=True).sum())
+    if isinstance(objeto, np.ndarray):
+        return objeto.nbytes
+    if isinstance(objeto, CurvaTBP):
+        return objeto.temperaturas.nbytes + objeto.volumenes.nbytes
+    if isinstance(objeto, (bytes, bytearray)):
+        return len(objeto)
+    if isinstance(objeto, dict):
+        return sum(tamano_aproximado(v) for v in objeto.values())
+    if isinstance(objeto, (tuple, list)):
+        return sum(tamano_aproximado(v) for v in objeto)
+    return 64
+
+
+class _Error:
+    __slots__ = ("excepcion",)
+
+    def __init__(self, excepcion):
+        self.excepcion = excepcion
+
+
+class CacheLRU:
+    """Caché LRU acotada por cantidad de entradas y, opcionalmente, por bytes.
+
+    Es segura entre hilos y cuenta aciertos y fallos. Los errores de datos de
+    `calcular` (ValueError, KeyError: un archivo inválido) también se cachean,
+    así no se revalida; cualquier otra excepción (OSError, MemoryError...)
+    puede ser pasajera y se propaga sin guardarse.
+    Con `disco` (una `CacheDisco`), lo que no está en memoria se busca en
+    disco antes de calcularlo, bajo el espacio de nombres `espacio`.
+    """
+
+    # Excepciones determinísticas para una misma entrada
+    ERRORES_CACHEABLES = (ValueError, KeyError)
+
+    def __init__(self, max_entradas=32, max_bytes=None, disco=None, espacio=""):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.disco = disco
+        self.espacio = espacio
+        self._datos = OrderedDict()
+        self._tamanos = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, clave):
+        return clave in self._datos
+
+    def obtener(self, clave, calcular):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                valor = self._datos[clave]
+                if isinstance(valor, _Error):
+                    raise valor.excepcion
+                return valor
+            self.fallos += 1
+
+        try:
+            if self.disco is not None:
+                valor = self.disco.obtener((self.espacio, clave), calcular)
+            else:
+                valor = calcular()
+        except self.ERRORES_CACHEABLES as e:
+            self._guardar(clave, _Error(e), 64)
+            raise
+        self._guardar(clave, valor, tamano_aproximado(valor))
+        return valor
+
+    def _guardar(self, clave, valor, tamano):
+        with self._lock:
+            if clave in self._datos:
+                self._bytes -= self._tamanos.pop(clave)
+            self._datos[clave] = valor
+            self._tamanos[clave] = tamano
+            self._bytes += tamano
+            while len(self._datos) > 1 and (
+                len(self._datos) > self.max_entradas
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                vieja, _ = self._datos.popitem(last=False)
+                self._bytes -= self._tamanos.pop(vieja)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._tamanos.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else 0.0,
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entradas,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Cachés compartidas por todas las sesiones del proceso
+CACHE_ARCHIVOS = CacheLRU(max_entradas=16, max_bytes=512 * 1024 ** 2)
+CACHE_RESULTADOS = CacheLRU(max_entradas=256, disco=CACHE_DISCO, espacio="resultados")
+
+
+def _parsear_tbp(datos, clave, resolucion, tipo):
+    df, informe = leer_curva(datos, resolucion)
+    if tipo != TBP:
+        temperaturas, volumenes = convertir_a_tbp(df["Temperatura"].to_numpy(float), df["Volumen"].to_numpy(float), tipo)
+        if len(temperaturas) < 2:
+            raise ValueError(f"La curva {tipo} no cubre los puntos necesarios para convertirla a TBP.")
+        df = pd.DataFrame({"Temperatura": temperaturas.astype(df["Temperatura"].dtype),
+                           "Volumen": volumenes.astype(df["Volumen"].dtype)})
+    return ArchivoTBP(clave, df, CurvaTBP(df["Temperatura"], df["Volumen"]), informe)
+
+
+def cargar_tbp(datos, resolucion=None, tipo=TBP):
+    """Parsea y valida una curva subida; devuelve `ArchivoTBP(hash, df, curva, ingesta)`.
+
+    Con `resolucion` la curva se reduce a ese número aproximado de puntos (ver
+    `ingesta.reducir_curva`). Una curva `tipo` ASTM D86 o D2887 se convierte a
+    TBP (ver `conversion`) antes de cualquier cálculo. El hash identifica al
+    archivo, la resolución y el tipo de curva.
+    """
+    clave = hash_contenido(datos) if not resolucion else f"{hash_contenido(datos)}-{int(resolucion)}"
+    if tipo != TBP:
+        clave = f"{clave}-{tipo.split()[-1].lower()}"
+    return CACHE_ARCHIVOS.obtener(("tbp", clave), lambda: _parsear_tbp(datos, clave, resolucion, tipo))
+
+
+def _parsear_pona(datos):
+    paraf, olef, naft, arom = pd.read_csv(BytesIO(datos)).iloc[0]
+    return paraf, olef, naft, arom
+
+
+def cargar_pona(datos):
+    """Composición PONA (parafínicos, olefínicos, nafténicos, aromáticos) de la primera fila del CSV."""
+    return CACHE_ARCHIVOS.obtener(("pona", hash_contenido(datos)), lambda: _parsear_pona(datos))
+
+
+def analizar_ensayo(archivo, densidad, temp_k):
+    """Kw, API, clasificación y volúmenes por fracción y por corte de un `ArchivoTBP`, cacheados."""
+    def calcular():
+        with medir("kw_api"):
+            api = round(float(grados_api(densidad)), 1)
+            kw = round(float(watson_kw(temp_k, densidad)), 3)
+        with medir("fracciones"):
+            fracciones = archivo.curva.rendimientos(FRACCIONES)
+        with medir("cortes"):
+            cortes = archivo.curva.rendimientos(CORTES)
+        return {"kw": kw, "api": api, "tipo": tipo_crudo(api), "fracciones": fracciones, "cortes": cortes}
+
+    return CACHE_RESULTADOS.obtener(("analisis", archivo.hash, float(densidad), float(temp_k)), calcular)
+
+
+def cargar_dha(datos):
+    """Componentes de un CSV DHA (ver `dha.leer_dha`), cacheados por hash."""
+    from .dha import leer_dha
+
+    return CACHE_ARCHIVOS.obtener(("dha", hash_contenido(datos)), lambda: leer_dha(datos))
+
+
+def analizar_dha(datos, pesos=None):
+    """Componentes de un CSV DHA agregados a PONA (ver `dha.agregar_dha`), cacheados por hash y pesos."""
+    from .dha import agregar_dha
+
+    clave = hash_contenido(datos)
+    componentes = cargar_dha(datos)
+    claves_pesos = None if pesos is None else tuple((str(c), float(p)) for c, p in pesos.items())
+    return CACHE_RESULTADOS.obtener(("dha", clave, claves_pesos), lambda: agregar_dha(componentes, pesos))
+
+
+def cargar_historial(datos, nombre=""):
+    """Historial de precios diario de un CSV o Parquet subido (ver `historico.leer_historial`), cacheado."""
+    from .historico import leer_historial
+
+    return CACHE_ARCHIVOS.obtener(("historial", hash_contenido(datos)), lambda: leer_historial(datos, nombre))
+
+
+def ajustar_ensayo(archivo):
+    """`ModeloTBP` de Riazi ajustado a la curva de un `ArchivoTBP`, cacheado."""
+    from .ajuste import ModeloTBP
+
+    return CACHE_RESULTADOS.obtener(("ajuste", archivo.hash), lambda: ModeloTBP.ajustar(archivo.curva))
+
+
+def serie_comparacion(datos, puntos, tipo=TBP):
+    """Curva subida decimada con LTTB a `puntos` puntos y sus volúmenes por corte, cacheados por archivo.
+
+    Devuelve (clave, temperaturas, volúmenes, volúmenes por corte), con la
+    clave (hash del archivo, tipo de curva, puntos) que identifica a la serie.
+    Como no depende de los demás ensayos, sumar una curva a una comparación
+    no vuelve a parsear ni a decimar las que ya estaban, aunque hayan salido
+    de la caché de archivos.
+    """
+    from .decimacion import lttb
+
+    clave = (hash_contenido(datos), tipo, int(puntos))
+
+    def calcular():
+        curva = cargar_tbp(datos, tipo=tipo).curva
+        with medir("decimacion"):
+            temperaturas, volumenes = lttb(curva.temperaturas, curva.volumenes, puntos)
+        return clave, temperaturas, volumenes, curva.rendimientos(CORTES)
+
+    return CACHE_RESULTADOS.obtener(("comparacion", *clave), calcular)
+
+
+def estadisticas_cache():
+    return {
+        "archivos": CACHE_ARCHIVOS.estadisticas(),
+        "resultados": CACHE_RESULTADOS.estadisticas(),
+        **({"disco": CACHE_DISCO.estadisticas()} if CACHE_DISCO is not None else {}),
+    }
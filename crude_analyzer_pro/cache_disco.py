@@ -0,0 +1,246 @@
+# Caché de resultados en disco, compartida entre sesiones, procesos y reinicios.
+#
+# Cada entrada es un archivo cuyo nombre es el hash de (versión del código,
+# clave): el mismo ensayo con las mismas entradas cae en el mismo archivo sin
+# importar qué proceso lo calculó. La versión del código es el hash de los
+# fuentes del paquete, así que cualquier cambio en cálculos, gráficos o
+# informes invalida todo sin depender de que alguien suba un número. Los
+# valores (tablas, PNG, PDF) se guardan con pickle.
+#
+#   - Escritura atómica: archivo temporal en el mismo directorio + os.replace,
+#     así un lector nunca ve un archivo a medio escribir.
+#   - LRU por fecha de modificación: cada acierto actualiza el mtime.
+#   - Entradas y bytes se llevan en memoria (se cuentan del disco una sola vez
+#     por proceso y al desalojar), así que las estadísticas no recorren el
+#     directorio en cada rerun. Lo que escriben otros procesos se ve recién
+#     en el próximo desalojo.
+#   - Tamaño acotado: al pasar `max_bytes` se borran los archivos más viejos
+#     hasta bajar al 80 %, con un bloqueo fcntl para que dos procesos no
+#     desalojen a la vez (sin fcntl, en Windows, cada proceso desaloja solo).
+#
+# Se configura con CRUDE_CACHE_DISCO (directorio; "0" la desactiva) y
+# CRUDE_CACHE_DISCO_MB (tamaño máximo).
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DIRECTORIO_DEFECTO = os.environ.get("CRUDE_CACHE_DISCO", ".cache_crude")
+MAX_BYTES_DEFECTO = int(float(os.environ.get("CRUDE_CACHE_DISCO_MB", "1024")) * 1024 ** 2)
+# Temporales de escrituras interrumpidas que se borran al desalojar
+VIDA_TEMPORALES_S = 3600
+
+_FALTA = object()
+
+
+def _version_codigo():
+    # Hash de los .py del paquete (unos pocos ms, una vez por proceso)
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    resumen = hashlib.blake2b(digest_size=16)
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.endswith(".py"):
+            resumen.update(nombre.encode())
+            with open(os.path.join(directorio, nombre), "rb") as f:
+                resumen.update(f.read())
+    return resumen.hexdigest()
+
+
+VERSION_CODIGO = _version_codigo()
+
+
+class CacheDisco:
+    """Caché clave -> valor en archivos, segura entre hilos y entre procesos."""
+
+    def __init__(self, directorio=DIRECTORIO_DEFECTO, max_bytes=MAX_BYTES_DEFECTO):
+        self.directorio = os.path.abspath(directorio)
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        # Estimación de este proceso (None hasta el primer conteo); se corrige al desalojar
+        self._bytes = None
+        self._entradas = None
+        self._lock = threading.Lock()
+
+    def ruta(self, clave):
+        resumen = hashlib.blake2b(repr((VERSION_CODIGO, clave)).encode(), digest_size=20).hexdigest()
+        return os.path.join(self.directorio, resumen[:2], resumen)
+
+    def leer(self, clave, defecto=None):
+        """Valor guardado para `clave`, o `defecto` si no está (o el archivo no se puede leer)."""
+        ruta = self.ruta(clave)
+        try:
+            with open(ruta, "rb") as f:
+                valor = pickle.load(f)
+        except FileNotFoundError:
+            self.fallos += 1
+            return defecto
+        except Exception:
+            # Archivo dañado o que ya no se puede deserializar: se descarta
+            self._descartar(ruta)
+            self.fallos += 1
+            return defecto
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+        self.aciertos += 1
+        return valor
+
+    def escribir(self, clave, valor):
+        """Guarda `valor`; devuelve False si no se pudo (disco lleno, sin permisos, demasiado grande)."""
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(datos) > self.max_bytes // 4:
+            return False
+        ruta = self.ruta(clave)
+        with self._lock:
+            self._contar()
+        anterior = self._tamano_archivo(ruta)
+        try:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), prefix=".tmp-")
+            try:
+                with os.fdopen(descriptor, "wb") as f:
+                    f.write(datos)
+                os.replace(temporal, ruta)
+            except BaseException:
+                self._borrar(temporal)
+                raise
+        except OSError:
+            return False
+
+        with self._lock:
+            self._bytes += len(datos) - (anterior or 0)
+            self._entradas += anterior is None
+            excedido = self._bytes > self.max_bytes
+        if excedido:
+            self.desalojar()
+        return True
+
+    def obtener(self, clave, calcular):
+        """Valor guardado para `clave` o, si no está, el resultado de `calcular()` (que se guarda)."""
+        valor = self.leer(clave, _FALTA)
+        if valor is _FALTA:
+            valor = calcular()
+            self.escribir(clave, valor)
+        return valor
+
+    def _contar(self):
+        # Con el lock tomado: la primera vez, entradas y bytes salen del disco
+        if self._bytes is None:
+            archivos = self._archivos()
+            self._bytes = sum(tamano for _, tamano, _ in archivos)
+            self._entradas = len(archivos)
+
+    @staticmethod
+    def _tamano_archivo(ruta):
+        try:
+            return os.stat(ruta).st_size
+        except OSError:
+            return None
+
+    def _descartar(self, ruta):
+        tamano = self._tamano_archivo(ruta)
+        self._borrar(ruta)
+        if tamano is not None:
+            with self._lock:
+                if self._bytes is not None:
+                    self._bytes -= tamano
+                    self._entradas -= 1
+
+    def _archivos(self):
+        # (mtime, tamaño, ruta) de cada entrada; los temporales viejos se borran de paso
+        archivos = []
+        ahora = time.time()
+        try:
+            subdirectorios = [d.path for d in os.scandir(self.directorio) if d.is_dir()]
+        except FileNotFoundError:
+            return archivos
+        for subdirectorio in subdirectorios:
+            try:
+                entradas = list(os.scandir(subdirectorio))
+            except FileNotFoundError:
+                continue
+            for entrada in entradas:
+                try:
+                    estado = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                if entrada.name.startswith(".tmp-"):
+                    if ahora - estado.st_mtime > VIDA_TEMPORALES_S:
+                        self._borrar(entrada.path)
+                    continue
+                archivos.append((estado.st_mtime, estado.st_size, entrada.path))
+        return archivos
+
+    @contextmanager
+    def _bloqueo(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(os.path.join(self.directorio, ".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _borrar(self, ruta):
+        try:
+            os.unlink(ruta)
+        except OSError:
+            pass
+
+    def desalojar(self, objetivo=0.8):
+        """Borra las entradas usadas hace más tiempo hasta ocupar `objetivo` x max_bytes; devuelve cuántas."""
+        with self._bloqueo():
+            archivos = sorted(self._archivos())
+            total = sum(tamano for _, tamano, _ in archivos)
+            entradas = len(archivos)
+            borrados = 0
+            if total > self.max_bytes:
+                for _, tamano, ruta in archivos:
+                    if total <= objetivo * self.max_bytes:
+                        break
+                    self._borrar(ruta)
+                    total -= tamano
+                    borrados += 1
+        with self._lock:
+            self._bytes = total
+            self._entradas = entradas - borrados
+        return borrados
+
+    def limpiar(self):
+        with self._bloqueo():
+            for _, _, ruta in self._archivos():
+                self._borrar(ruta)
+        with self._lock:
+            self._bytes = 0
+            self._entradas = 0
+
+    def estadisticas(self):
+        with self._lock:
+            self._contar()
+            entradas, ocupados = self._entradas, self._bytes
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else 0.0,
+            "entradas": entradas,
+            "bytes": ocupados,
+            "max_bytes": self.max_bytes,
+            "directorio": self.directorio,
+        }
+
+
+# Caché en disco compartida por las cachés en memoria y la cola de informes (None si está desactivada)
+CACHE_DISCO = None if DIRECTORIO_DEFECTO in ("", "0") else CacheDisco()
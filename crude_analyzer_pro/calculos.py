@@ -0,0 +1,153 @@
+# Cálculos del analizador de crudos, sin dependencia de Streamlit.
+# Todas las funciones aceptan escalares o arrays de NumPy y operan
+# vectorialmente sobre lotes de ensayos.
+
+import numpy as np
+import pandas as pd
+
+from .curvas import limites_de_cortes, rendimientos_lote, volumen_acumulado_lote
+
+INF = float("inf")
+
+# Fracciones de la evaluación económica: nombre -> [T_inicial, T_final) en °C
+FRACCIONES = {
+    "<80°C (LPG-NL)": (-INF, 80.0),
+    "80–120°C (NL-NV)": (80.0, 120.0),
+    "120–180°C (NP)": (120.0, 180.0),
+    "180–360°C (GO+K)": (180.0, 360.0),
+    ">360°C (GOP+CR)": (360.0, INF),
+}
+
+# Cortes de rendimiento por producto: nombre -> [T_inicial, T_final) en °C
+CORTES = {
+    "Gasolinas (<150 °C)": (-INF, 150.0),
+    "Kerosene (150–250 °C)": (150.0, 250.0),
+    "Diesel (250–350 °C)": (250.0, 350.0),
+    "Gasoil Pesado (350–450 °C)": (350.0, 450.0),
+    "Fondo / Residuo (>450 °C)": (450.0, INF),
+}
+
+PRECIOS_DEFECTO = {
+    "<80°C (LPG-NL)": 25.0,
+    "80–120°C (NL-NV)": 30.0,
+    "120–180°C (NP)": 40.0,
+    "180–360°C (GO+K)": 48.0,
+    ">360°C (GOP+CR)": 28.0,
+}
+
+CRUDO_LIVIANO = "🔵 Crudo Liviano"
+CRUDO_MEDIANO = "🟡 Crudo Mediano"
+CRUDO_PESADO = "🔴 Crudo Pesado"
+
+
+def watson_kw(temp_k, densidad):
+    """Factor de Watson a partir de la temperatura media [K] y la densidad a 15 °C [kg/m³]."""
+    return np.cbrt(np.asarray(temp_k, dtype=float)) / (np.asarray(densidad, dtype=float) / 1000)
+
+
+def grados_api(densidad):
+    """Grados API a partir de la densidad a 15 °C [kg/m³]."""
+    return 141.5 / (np.asarray(densidad, dtype=float) / 1000) - 131.5
+
+
+def tipo_crudo(api):
+    """Clasificación liviano / mediano / pesado según los grados API."""
+    api = np.asarray(api, dtype=float)
+    tipo = np.where(api >= 40, CRUDO_LIVIANO, np.where(api >= 25, CRUDO_MEDIANO, CRUDO_PESADO))
+    return str(tipo) if tipo.ndim == 0 else tipo
+
+
+def apilar_curvas(curvas):
+    """Apila curvas (temperaturas, volúmenes) de distinto largo en dos arrays 2D rellenos con NaN."""
+    curvas = [(np.asarray(t, dtype=float), np.asarray(v, dtype=float)) for t, v in curvas]
+    largo = max((len(t) for t, _ in curvas), default=0)
+    temperaturas = np.full((len(curvas), largo), np.nan)
+    volumenes = np.full((len(curvas), largo), np.nan)
+    for i, (t, v) in enumerate(curvas):
+        temperaturas[i, :len(t)] = t
+        volumenes[i, :len(v)] = v
+    return temperaturas, volumenes
+
+
+def volumenes_por_corte(temperaturas, volumenes, cortes=CORTES):
+    """Volumen [%] de cada corte para una curva 1D o un lote 2D (ensayos x puntos).
+
+    El volumen de un corte [a, b) es la diferencia de la curva acumulada
+    interpolada en b y en a (ver `curvas`). Devuelve (k,) para una curva o
+    (m, k) para un lote, con k = len(cortes).
+    """
+    una_curva = np.ndim(temperaturas) == 1
+    resultado = rendimientos_lote(temperaturas, volumenes, cortes)
+    return resultado[0] if una_curva else resultado
+
+
+def vector_precios(precios):
+    """Precios por fracción como array (k,) en el orden de FRACCIONES; acepta un dict o una secuencia."""
+    if isinstance(precios, dict):
+        precios = [precios[fr] for fr in FRACCIONES]
+    return np.asarray(precios, dtype=float)
+
+
+def ingresos(volumenes, precios):
+    """Ingreso por fracción: volumen [%] x precio / 100. Acepta (k,) o (m, k)."""
+    return np.asarray(volumenes, dtype=float) * np.asarray(precios, dtype=float) / 100
+
+
+def tabla_ingresos(volumenes, precios=PRECIOS_DEFECTO):
+    """Tabla de la evaluación económica para un ensayo."""
+    precios = vector_precios(precios)
+    ingreso = ingresos(volumenes, precios)
+    return pd.DataFrame({
+        "Fracción": list(FRACCIONES),
+        "Volumen [%]": np.round(volumenes, 2),
+        "Precio [USD/100 kg]": np.round(precios, 2),
+        "Ingreso Estimado [USD]": np.round(ingreso, 2),
+    })
+
+
+def tabla_rendimiento(volumenes):
+    """Tabla de rendimiento estimado por producto para un ensayo."""
+    return pd.DataFrame({
+        "Producto": list(CORTES),
+        "Volumen [%]": np.round(volumenes, 2),
+    })
+
+
+def analizar_lote(densidades, temps_k, temperaturas, volumenes, precios=None):
+    """Análisis completo de un lote de ensayos en una sola pasada vectorizada.
+
+    `densidades` y `temps_k` son arrays (m,); `temperaturas` y `volumenes` son las
+    curvas TBP apiladas (m, n), ver `apilar_curvas`. Devuelve un dict de arrays con
+    Kw, API, clasificación, volúmenes por fracción y por corte y, si se pasan
+    precios (dict o array (k,) / (m, k)), el ingreso total por ensayo.
+    """
+    # Una sola interpolación para los límites de fracciones y cortes juntos
+    limites_fr = limites_de_cortes(FRACCIONES)
+    limites_co = limites_de_cortes(CORTES)
+    limites = np.union1d(limites_fr, limites_co)
+    acumulado = volumen_acumulado_lote(temperaturas, volumenes, limites)
+    api = np.atleast_1d(grados_api(densidades))
+    resultado = {
+        "kw": np.atleast_1d(watson_kw(temps_k, densidades)),
+        "api": api,
+        "tipo": np.atleast_1d(tipo_crudo(api)),
+        "fracciones": np.diff(acumulado[:, np.searchsorted(limites, limites_fr)], axis=1),
+        "cortes": np.diff(acumulado[:, np.searchsorted(limites, limites_co)], axis=1),
+    }
+    if precios is not None:
+        resultado["ingreso_total"] = ingresos(resultado["fracciones"], vector_precios(precios)).sum(axis=1)
+    return resultado
+
+
+def resumen_lote(resultado, nombres=None):
+    """DataFrame con una fila por ensayo a partir del resultado de `analizar_lote`."""
+    df = pd.DataFrame({
+        "Kw": resultado["kw"],
+        "API": resultado["api"],
+        "Clasificación": resultado["tipo"],
+    }, index=nombres)
+    df[list(FRACCIONES)] = resultado["fracciones"]
+    df[list(CORTES)] = resultado["cortes"]
+    if "ingreso_total" in resultado:
+        df["Ingreso Total [USD]"] = resultado["ingreso_total"]
+    return df
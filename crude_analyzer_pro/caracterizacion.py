@@ -0,0 +1,130 @@
+# Caracterización de la curva TBP en pseudocomponentes.
+# La parte destilada de cada curva se divide en N cortes angostos de igual
+# ancho en temperatura; cada corte es un pseudocomponente con su punto medio
+# de ebullición, gravedad específica, factor de Watson, peso molecular y
+# fracciones en volumen, peso y moles. Todo se calcula sobre arrays (m, N), así
+# que caracterizar cientos de ensayos con cientos de pseudocomponentes no pasa
+# por bucles de Python.
+#
+# Correlaciones:
+#   - Kw = (1.8 Tb [K])^(1/3) / SG, con Tb en °R como en la definición original.
+#   - SG de cada pseudocomponente con Kw constante: el Kw del crudo se ajusta
+#     para que la SG promedio en volumen de los pseudocomponentes sea la del crudo.
+#   - Peso molecular de Riazi–Daubert (1987, API Technical Data Book 2B2.1):
+#     M = 42.965 exp(2.097e-4 Tb - 7.78712 SG + 2.08476e-3 Tb SG) Tb^1.26007 SG^4.98308, Tb en K.
+
+import numpy as np
+import pandas as pd
+
+from .curvas import VOLUMEN_TOTAL, _preparar_lote, volumen_acumulado_lote
+
+KELVIN = 273.15
+
+
+def gravedad_especifica(densidad):
+    """SG 60/60 a partir de la densidad a 15 °C [kg/m³] (con agua = 1000 kg/m³, como `grados_api`)."""
+    return np.asarray(densidad, dtype=float) / 1000
+
+
+def factor_watson(tb_k, sg):
+    """Factor de caracterización de Watson con el punto de ebullición en °R."""
+    return np.cbrt(1.8 * np.asarray(tb_k, dtype=float)) / np.asarray(sg, dtype=float)
+
+
+def peso_molecular(tb_k, sg):
+    """Peso molecular [g/mol] de Riazi–Daubert (1987) a partir de Tb [K] y SG."""
+    tb_k = np.asarray(tb_k, dtype=float)
+    sg = np.asarray(sg, dtype=float)
+    return (42.965 * np.exp(2.097e-4 * tb_k - 7.78712 * sg + 2.08476e-3 * tb_k * sg)
+            * tb_k ** 1.26007 * sg ** 4.98308)
+
+
+def vabp(temperaturas, volumenes):
+    """Punto de ebullición medio en volumen [°C] de una curva (n,) o un lote (m, n) relleno con NaN.
+
+    Es la integral de T dV sobre la parte medida de la curva dividida por el
+    volumen destilado en ese tramo (regla del trapecio entre puntos).
+    """
+    una_curva = np.ndim(temperaturas) == 1
+    resultado = _vabp(*_preparar_lote(temperaturas, volumenes, VOLUMEN_TOTAL))
+    return float(resultado[0]) if una_curva else resultado
+
+
+def _vabp(t, v, vacias):
+    dv = np.diff(v, axis=1)
+    medio = (t[:, 1:] + t[:, :-1]) / 2
+    total = dv.sum(axis=1)
+    resultado = np.divide((medio * dv).sum(axis=1), total, out=t[:, 0].copy(), where=total > 0)
+    resultado[vacias] = np.nan
+    return resultado
+
+
+def pseudocomponentes_lote(temperaturas, volumenes, densidades, n=20, limites=None):
+    """Pseudocomponentes de un lote de curvas (m, n_puntos) rellenas con NaN.
+
+    Sin `limites`, la parte medida de cada curva (del primer al último punto)
+    se divide en `n` cortes de igual ancho; `limites` fija los bordes [°C],
+    comunes (n + 1,) o por ensayo (m, n + 1). Devuelve un dict con arrays
+    (m, n) 'tb' [°C], 'volumen' [% del crudo], 'sg', 'kw', 'peso_molecular',
+    'fraccion_volumen', 'fraccion_peso' y 'fraccion_molar' (sobre la parte
+    caracterizada), y por ensayo (m,) 'vabp' [°C], 'kw_crudo', 'sg_crudo',
+    'peso_molecular_medio' y 'volumen_caracterizado' [%].
+    """
+    t, v, vacias = _preparar_lote(temperaturas, volumenes, VOLUMEN_TOTAL)
+    m = t.shape[0]
+    if limites is None:
+        limites = t[:, :1] + (t[:, -1:] - t[:, :1]) * np.linspace(0.0, 1.0, n + 1)
+    limites = np.broadcast_to(np.asarray(limites, dtype=float), (m, np.shape(limites)[-1]))
+
+    acumulado = volumen_acumulado_lote(temperaturas, volumenes, limites)
+    volumen = np.diff(acumulado, axis=1)
+    caracterizado = volumen.sum(axis=1)
+    x = np.divide(volumen, caracterizado[:, None], out=np.zeros_like(volumen), where=caracterizado[:, None] > 0)
+
+    tb = (limites[:, 1:] + limites[:, :-1]) / 2
+    tb_k = tb + KELVIN
+    sg_crudo = np.broadcast_to(gravedad_especifica(densidades), (m,))
+    # Kw constante que reproduce la SG del crudo: SG = Σ x_i (1.8 Tb_i)^(1/3) / Kw
+    kw_crudo = (x * np.cbrt(1.8 * tb_k)).sum(axis=1) / sg_crudo
+    sg = np.cbrt(1.8 * tb_k) / kw_crudo[:, None]
+    mw = peso_molecular(tb_k, sg)
+
+    masa = x * sg
+    w = masa / masa.sum(axis=1, keepdims=True)
+    moles = w / mw
+    z = moles / moles.sum(axis=1, keepdims=True)
+    return {
+        "tb": tb,
+        "volumen": volumen,
+        "sg": sg,
+        "kw": np.broadcast_to(kw_crudo[:, None], tb.shape),
+        "peso_molecular": mw,
+        "fraccion_volumen": x,
+        "fraccion_peso": w,
+        "fraccion_molar": z,
+        "vabp": _vabp(t, v, vacias),
+        "kw_crudo": kw_crudo,
+        "sg_crudo": sg_crudo,
+        "peso_molecular_medio": 1 / moles.sum(axis=1),
+        "volumen_caracterizado": caracterizado,
+    }
+
+
+def tabla_pseudocomponentes(resultado, i=0):
+    """Pseudocomponentes del ensayo `i` de un resultado de `pseudocomponentes_lote` como DataFrame."""
+    r = {k: v[i] for k, v in resultado.items()}
+    return pd.DataFrame({
+        "Tb [°C]": r["tb"],
+        "Volumen [%]": r["volumen"],
+        "SG": r["sg"],
+        "Kw": r["kw"],
+        "Peso molecular [g/mol]": r["peso_molecular"],
+        "Fracción en volumen [%]": 100 * r["fraccion_volumen"],
+        "Fracción en peso [%]": 100 * r["fraccion_peso"],
+        "Fracción molar [%]": 100 * r["fraccion_molar"],
+    }, index=pd.RangeIndex(1, len(r["tb"]) + 1, name="Pseudocomponente"))
+
+
+def pseudocomponentes(curva, densidad, n=20, limites=None):
+    """Tabla de pseudocomponentes de una `CurvaTBP`, una fila por pseudocomponente."""
+    return tabla_pseudocomponentes(pseudocomponentes_lote(curva.temperaturas, curva.volumenes, densidad, n, limites))
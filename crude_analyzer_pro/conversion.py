@@ -0,0 +1,129 @@
+# Conversión entre curvas de destilación ASTM D86, destilación simulada
+# ASTM D2887 y TBP.
+#
+#   - D86 <-> TBP: Riazi–Daubert (1987), punto a punto en 0, 10, 30, 50, 70,
+#     90 y 95 % vol: TBP = a D86^b, con temperaturas en K.
+#   - D2887 <-> TBP: Daubert (1994, API Technical Data Book 3A3.1): el 50 % es
+#     igual en las dos curvas y las diferencias entre puntos consecutivos se
+#     convierten con ΔTBP = C ΔSD^D, con temperaturas en °F. La D2887 se
+#     informa en % en peso; la TBP resultante se usa como % en volumen. El
+#     tramo 95-100 % es muy sensible: sólo vale para saltos de unas decenas de °C.
+#
+# Las funciones trabajan sobre arrays (ensayos, puntos estándar) y `convertir_lote`
+# lleva curvas de cualquier largo a esos puntos, así que convertir miles de
+# curvas es una sola llamada vectorizada.
+
+import numpy as np
+
+from .curvas import VOLUMEN_TOTAL, _preparar_lote
+
+TBP = "TBP"
+D86 = "ASTM D86"
+D2887 = "ASTM D2887"
+TIPOS_CURVA = [TBP, D86, D2887]
+
+KELVIN = 273.15
+
+PUNTOS_D86 = np.array([0.0, 10.0, 30.0, 50.0, 70.0, 90.0, 95.0])
+_A_D86 = np.array([0.9177, 0.5564, 0.7617, 0.9013, 0.8821, 0.9552, 0.8177])
+_B_D86 = np.array([1.0019, 1.0900, 1.0425, 1.0176, 1.0226, 1.0110, 1.0355])
+
+PUNTOS_D2887 = np.array([0.0, 10.0, 30.0, 50.0, 70.0, 90.0, 95.0, 100.0])
+# Tramos (0-10, 10-30, 30-50, 50-70, 70-90, 90-95, 95-100 %)
+_C_D2887 = np.array([0.15779, 0.011903, 0.05342, 0.19861, 0.31531, 0.97476, 0.02172])
+_D_D2887 = np.array([1.4296, 2.0253, 1.6988, 1.3975, 1.2938, 0.8723, 1.9733])
+_MEDIO = 3  # índice del 50 % en PUNTOS_D2887
+
+
+def _a_f(t_c):
+    return np.asarray(t_c, dtype=float) * 1.8 + 32
+
+
+def _a_c(t_f):
+    return (t_f - 32) / 1.8
+
+
+def d86_a_tbp(t):
+    """Temperaturas TBP [°C] desde D86 [°C] en `PUNTOS_D86`; `t` es (..., 7)."""
+    return _A_D86 * (np.asarray(t, dtype=float) + KELVIN) ** _B_D86 - KELVIN
+
+
+def tbp_a_d86(t):
+    """Inversa de `d86_a_tbp`: temperaturas D86 [°C] desde TBP [°C] en `PUNTOS_D86`."""
+    return ((np.asarray(t, dtype=float) + KELVIN) / _A_D86) ** (1 / _B_D86) - KELVIN
+
+
+def _desde_medio(t50, diferencias):
+    # Rearma la curva a partir del 50 % y las diferencias de cada tramo
+    abajo = t50 - np.cumsum(diferencias[..., :_MEDIO][..., ::-1], axis=-1)[..., ::-1]
+    arriba = t50 + np.cumsum(diferencias[..., _MEDIO:], axis=-1)
+    return np.concatenate([abajo, t50, arriba], axis=-1)
+
+
+def d2887_a_tbp(t):
+    """Temperaturas TBP [°C] desde D2887 [°C] en `PUNTOS_D2887`; `t` es (..., 8)."""
+    t_f = _a_f(t)
+    delta = np.maximum(np.diff(t_f, axis=-1), 0.0)
+    return _a_c(_desde_medio(t_f[..., _MEDIO:_MEDIO + 1], _C_D2887 * delta ** _D_D2887))
+
+
+def tbp_a_d2887(t):
+    """Inversa de `d2887_a_tbp`: temperaturas D2887 [°C] desde TBP [°C] en `PUNTOS_D2887`."""
+    t_f = _a_f(t)
+    delta = np.maximum(np.diff(t_f, axis=-1), 0.0)
+    return _a_c(_desde_medio(t_f[..., _MEDIO:_MEDIO + 1], (delta / _C_D2887) ** (1 / _D_D2887)))
+
+
+def temperaturas_en_volumenes(temperaturas, volumenes, puntos):
+    """Temperatura [°C] de un lote de curvas (m, n) rellenas con NaN a los volúmenes `puntos` [%].
+
+    Es la inversa de la curva acumulada, con la misma búsqueda única sobre
+    filas desplazadas que `curvas.volumen_acumulado_lote`. Los volúmenes fuera
+    del tramo medido de cada curva quedan en NaN. Devuelve (m, q).
+    """
+    t, v, vacias = _preparar_lote(temperaturas, volumenes, VOLUMEN_TOTAL)
+    m, n = t.shape
+    puntos = np.broadcast_to(np.asarray(puntos, dtype=float), (m, np.shape(puntos)[-1]))
+
+    paso = 2 * VOLUMEN_TOTAL + 1
+    desplazamiento = paso * np.arange(m)[:, None]
+    eje = (v + desplazamiento).ravel()
+    consulta = np.clip(puntos, v[:, :1], v[:, -1:]) + desplazamiento
+
+    fila = np.arange(m)[:, None] * n
+    j = np.clip(np.searchsorted(eje, consulta.ravel(), side="left").reshape(m, -1) - 1, fila, fila + n - 2)
+    v0, v1 = eje[j], eje[j + 1]
+    t0, t1 = t.ravel()[j], t.ravel()[j + 1]
+    dv = v1 - v0
+    peso = np.divide(consulta - v0, dv, out=np.ones_like(dv), where=dv > 0)
+    resultado = t0 + np.clip(peso, 0.0, 1.0) * (t1 - t0)
+
+    fuera = (puntos < v[:, :1] - 1e-9) | (puntos > v[:, -1:] + 1e-9)
+    resultado[fuera | vacias[:, None]] = np.nan
+    return resultado
+
+
+def convertir_lote(temperaturas, volumenes, tipo):
+    """Convierte un lote de curvas `tipo` (m, n) a TBP; devuelve (temperaturas (m, k), volúmenes (k,)).
+
+    Cada curva se lee en los puntos estándar del método (0, 10, 30, 50, 70,
+    90, 95 % y, en D2887, 100 %); los puntos que la curva no alcanza quedan en
+    NaN y la conversión los propaga sólo a los que dependen de ellos. Las
+    curvas TBP se devuelven tal cual, con sus volúmenes (m, n).
+    """
+    if tipo == TBP:
+        return np.atleast_2d(np.asarray(temperaturas, dtype=float)), np.atleast_2d(np.asarray(volumenes, dtype=float))
+    if tipo == D86:
+        return d86_a_tbp(temperaturas_en_volumenes(temperaturas, volumenes, PUNTOS_D86)), PUNTOS_D86
+    if tipo == D2887:
+        return d2887_a_tbp(temperaturas_en_volumenes(temperaturas, volumenes, PUNTOS_D2887)), PUNTOS_D2887
+    raise ValueError(f"Tipo de curva desconocido: {tipo!r} (opciones: {', '.join(TIPOS_CURVA)})")
+
+
+def convertir_a_tbp(temperaturas, volumenes, tipo):
+    """Convierte una curva (n,) `tipo` a TBP; devuelve (temperaturas, volúmenes) sin los puntos NaN."""
+    if tipo == TBP:
+        return np.asarray(temperaturas, dtype=float), np.asarray(volumenes, dtype=float)
+    t, v = convertir_lote(temperaturas, volumenes, tipo)
+    validos = ~np.isnan(t[0])
+    return t[0][validos], v[validos]
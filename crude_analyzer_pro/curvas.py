@@ -0,0 +1,124 @@
+# Motor de cortes sobre la curva TBP acumulada.
+# La curva se interpola linealmente (monótona) una sola vez por ensayo y el
+# volumen de un corte [a, b) es V(b) - V(a): dos búsquedas binarias por corte,
+# independientemente de cuántos puntos tenga el archivo de laboratorio.
+
+import numpy as np
+
+VOLUMEN_TOTAL = 100.0
+
+
+def limites_de_cortes(cortes):
+    """Límites [t0, t1, ..., tk] de un dict de cortes contiguos nombre -> (inicio, fin)."""
+    rangos = list(cortes.values())
+    for (_, fin), (inicio, _) in zip(rangos, rangos[1:]):
+        if fin != inicio:
+            raise ValueError("Los cortes deben ser contiguos y estar ordenados por temperatura")
+    return np.array([rangos[0][0]] + [fin for _, fin in rangos], dtype=float)
+
+
+def _limites(limites):
+    if isinstance(limites, dict):
+        return limites_de_cortes(limites)
+    return np.asarray(limites, dtype=float)
+
+
+class CurvaTBP:
+    """Interpolante monótono de una curva TBP (temperatura [°C] -> % volumen destilado acumulado).
+
+    Fuera del rango medido el volumen se mantiene constante; los límites -inf y
+    +inf valen 0 y `volumen_total` (el residuo por encima del último punto).
+    """
+
+    __slots__ = ("temperaturas", "volumenes", "volumen_total")
+
+    def __init__(self, temperaturas, volumenes, volumen_total=VOLUMEN_TOTAL):
+        temperaturas = np.asarray(temperaturas, dtype=float)
+        volumenes = np.asarray(volumenes, dtype=float)
+        validos = ~(np.isnan(temperaturas) | np.isnan(volumenes))
+        temperaturas, volumenes = temperaturas[validos], volumenes[validos]
+        if temperaturas.size == 0:
+            raise ValueError("La curva TBP no tiene puntos válidos")
+        orden = np.argsort(temperaturas, kind="stable")
+        self.temperaturas = temperaturas[orden]
+        self.volumenes = np.clip(np.maximum.accumulate(volumenes[orden]), 0.0, volumen_total)
+        self.volumen_total = float(volumen_total)
+
+    def __len__(self):
+        return self.temperaturas.size
+
+    def volumen_acumulado(self, t):
+        """% de volumen destilado hasta la temperatura `t` (escalar o array)."""
+        t = np.asarray(t, dtype=float)
+        v = np.interp(t, self.temperaturas, self.volumenes)
+        v = np.where(t == -np.inf, 0.0, np.where(t == np.inf, self.volumen_total, v))
+        return float(v) if v.ndim == 0 else v
+
+    def rendimientos(self, limites):
+        """Volumen [%] entre límites consecutivos; acepta una lista de límites o un dict de cortes."""
+        return np.diff(self.volumen_acumulado(_limites(limites)))
+
+    def corte(self, inicio, fin):
+        """Volumen [%] del corte [inicio, fin)."""
+        return float(np.diff(self.volumen_acumulado([inicio, fin]))[0])
+
+
+def _preparar_lote(temperaturas, volumenes, volumen_total):
+    # Ordena cada fila por temperatura y rellena los NaN finales repitiendo el
+    # último punto válido, de modo que todas las filas queden monótonas.
+    temperaturas = np.atleast_2d(np.asarray(temperaturas, dtype=float))
+    volumenes = np.atleast_2d(np.asarray(volumenes, dtype=float))
+    if temperaturas.shape[1] == 1:
+        temperaturas = np.repeat(temperaturas, 2, axis=1)
+        volumenes = np.repeat(volumenes, 2, axis=1)
+    validos = ~(np.isnan(temperaturas) | np.isnan(volumenes))
+    orden = np.argsort(np.where(validos, temperaturas, np.inf), axis=1, kind="stable")
+    temperaturas = np.take_along_axis(temperaturas, orden, axis=1)
+    volumenes = np.take_along_axis(volumenes, orden, axis=1)
+    n_validos = validos.sum(axis=1)
+
+    n = temperaturas.shape[1]
+    relleno = np.minimum(np.arange(n), np.maximum(n_validos - 1, 0)[:, None])
+    temperaturas = np.take_along_axis(temperaturas, relleno, axis=1)
+    volumenes = np.take_along_axis(volumenes, relleno, axis=1)
+    vacias = n_validos == 0
+    temperaturas[vacias] = 0.0
+    volumenes[vacias] = 0.0
+    volumenes = np.clip(np.maximum.accumulate(volumenes, axis=1), 0.0, volumen_total)
+    return temperaturas, volumenes, vacias
+
+
+def volumen_acumulado_lote(temperaturas, volumenes, puntos, volumen_total=VOLUMEN_TOTAL):
+    """Interpola un lote de curvas (m, n) rellenas con NaN en `puntos` (q,) o (m, q).
+
+    Todas las filas se desplazan a intervalos disjuntos de un único eje para
+    resolver las m x q búsquedas con un solo `searchsorted`. Devuelve (m, q).
+    """
+    temperaturas, volumenes, vacias = _preparar_lote(temperaturas, volumenes, volumen_total)
+    m, n = temperaturas.shape
+    puntos = np.broadcast_to(np.asarray(puntos, dtype=float), (m, np.shape(puntos)[-1]))
+
+    minimo, maximo = temperaturas[:, :1], temperaturas[:, -1:]
+    base = minimo.min()
+    paso = (maximo.max() - base) + 1.0
+    desplazamiento = paso * np.arange(m)[:, None] - base
+    eje = (temperaturas + desplazamiento).ravel()
+    consulta = np.clip(puntos, minimo, maximo) + desplazamiento
+
+    fila = np.arange(m)[:, None] * n
+    j = np.clip(np.searchsorted(eje, consulta.ravel(), side="right").reshape(m, -1) - 1, fila, fila + n - 2)
+    t0, t1 = eje[j], eje[j + 1]
+    v0, v1 = volumenes.ravel()[j], volumenes.ravel()[j + 1]
+    dt = t1 - t0
+    peso = np.divide(consulta - t0, dt, out=np.zeros_like(dt), where=dt > 0)
+    resultado = v0 + peso * (v1 - v0)
+
+    resultado = np.where(puntos == -np.inf, 0.0, np.where(puntos == np.inf, volumen_total, resultado))
+    resultado[vacias] = np.nan
+    return resultado
+
+
+def rendimientos_lote(temperaturas, volumenes, limites, volumen_total=VOLUMEN_TOTAL):
+    """Volumen [%] entre límites consecutivos para un lote de curvas; devuelve (m, k)."""
+    acumulado = volumen_acumulado_lote(temperaturas, volumenes, _limites(limites), volumen_total)
+    return np.diff(acumulado, axis=1)
@@ -0,0 +1,52 @@
+# Decimación de curvas para graficar: Largest-Triangle-Three-Buckets (LTTB,
+# Steinarsson 2013).
+#
+# La curva se divide en buckets consecutivos y de cada uno se conserva el
+# punto que forma el triángulo de mayor área con el punto elegido en el bucket
+# anterior y el promedio del bucket siguiente. Así se mantienen los quiebres y
+# extremos de la forma, que un muestreo uniforme pierde, con una cantidad de
+# puntos del orden del ancho en píxeles del gráfico.
+
+import numpy as np
+
+
+def puntos_por_ancho(ancho_pulgadas, dpi, puntos_por_pixel=1.0):
+    """Presupuesto de puntos por curva para un gráfico de `ancho_pulgadas` a `dpi`."""
+    return max(3, int(ancho_pulgadas * dpi * puntos_por_pixel))
+
+
+def indices_lttb(x, y, puntos):
+    """Índices (ordenados) de los `puntos` que LTTB conserva de la serie (x, y).
+
+    El primer y el último punto se conservan siempre. Si la serie ya tiene
+    `puntos` o menos, devuelve todos los índices.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+
+    # puntos - 2 buckets entre el primero y el último; los promedios se calculan de una vez
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(np.intp)
+    cantidad = np.diff(bordes)
+    x_medio = np.append(np.add.reduceat(x[1:n - 1], bordes[:-1] - 1) / cantidad, x[-1])
+    y_medio = np.append(np.add.reduceat(y[1:n - 1], bordes[:-1] - 1) / cantidad, y[-1])
+
+    indices = np.empty(puntos, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        xb, yb = x[inicio:fin], y[inicio:fin]
+        # El doble del área del triángulo (a, punto del bucket, promedio del siguiente)
+        area = np.abs((x[a] - x_medio[i + 1]) * (yb - y[a]) - (x[a] - xb) * (y_medio[i + 1] - y[a]))
+        a = inicio + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def lttb(x, y, puntos):
+    """Serie (x, y) reducida a `puntos` puntos con LTTB."""
+    indices = indices_lttb(x, y, puntos)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
@@ -0,0 +1,161 @@
+# Análisis detallado de hidrocarburos (DHA) por cromatografía gaseosa.
+#
+# Un archivo DHA trae una fila por componente identificado con su número de
+# carbonos, su grupo PIONA y su % en masa, y opcionalmente el corte TBP al que
+# pertenece la muestra (un archivo por corte o todos los cortes juntos). Los
+# componentes se agregan a PONA por número de carbonos y por corte con un
+# group-by sobre columnas categóricas: el costo depende de la cantidad de
+# grupos, no de cadenas repetidas en cada fila. Las isoparafinas se suman a
+# los parafínicos. Los grupos se reconocen por etiqueta completa (P, n-P, I,
+# O, N, A o el nombre del grupo); cualquier otro (oxigenados, desconocidos...)
+# va a un grupo aparte, OTROS, que se informa y no entra en el PONA.
+
+import re
+import unicodedata
+from io import BytesIO
+
+import pandas as pd
+
+GRUPOS_PONA = ["Parafínicos", "Olefínicos", "Nafténicos", "Aromáticos"]
+OTROS = "Otros/No identificados"
+GRUPOS_DHA = [*GRUPOS_PONA, OTROS]
+CORTE_UNICO = "Muestra completa"
+
+# Nombres aceptados para cada columna (se comparan sin tildes ni mayúsculas)
+COLUMNAS_DHA = {
+    "Carbonos": ["carbonos", "numero de carbonos", "nc", "c#", "carbon number", "carbon"],
+    "Grupo": ["grupo", "piona", "grupo piona", "group"],
+    "Masa": ["masa", "masa [%]", "% masa", "masa %", "% peso", "mass", "mass %", "mass%", "wt%", "wt %"],
+    "Corte": ["corte", "corte tbp", "cut"],
+    "Componente": ["componente", "compuesto", "component", "compound"],
+}
+
+# Etiqueta de grupo (sin tildes, minúsculas, sin espacios ni guiones) -> grupo PONA
+_ETIQUETAS_GRUPO = {
+    **dict.fromkeys(["p", "np", "i", "ip", "iso", "parafinas", "parafinicos", "nparafinas", "isoparafinas",
+                     "paraffins", "nparaffins", "isoparaffins"], "Parafínicos"),
+    **dict.fromkeys(["o", "olefinas", "olefinicos", "olefins"], "Olefínicos"),
+    **dict.fromkeys(["n", "naftenos", "naftenicos", "cicloparafinas", "naphthenes", "cycloparaffins"],
+                    "Nafténicos"),
+    **dict.fromkeys(["a", "aromaticos", "aromatics"], "Aromáticos"),
+}
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode()
+    return " ".join(texto.lower().split())
+
+
+def _grupo_pona(etiqueta):
+    return _ETIQUETAS_GRUPO.get(re.sub(r"[\s\-_.]", "", _normalizar(etiqueta)), OTROS)
+
+
+def _columnas(encabezado):
+    normalizados = {_normalizar(c): c for c in encabezado}
+    return {nombre: next((normalizados[a] for a in alias if a in normalizados), None)
+            for nombre, alias in COLUMNAS_DHA.items()}
+
+
+def es_dha(datos):
+    """True si el encabezado del CSV tiene columnas de grupo PIONA y de % en masa."""
+    try:
+        encabezado = pd.read_csv(BytesIO(datos), nrows=0).columns
+    except (ValueError, UnicodeDecodeError):
+        return False
+    columnas = _columnas(encabezado)
+    return columnas["Grupo"] is not None and columnas["Masa"] is not None
+
+
+def leer_dha(datos):
+    """Componentes de un CSV DHA: DataFrame con 'Corte', 'Grupo' y 'Etiqueta' categóricos, 'Carbonos' y 'Masa' [%].
+
+    'Grupo' ya es el grupo PONA (`OTROS` si no se reconoce) y 'Etiqueta' el
+    grupo tal como venía en el archivo. Sin columna de corte, todas las filas
+    son del corte `CORTE_UNICO`.
+    """
+    df = pd.read_csv(BytesIO(datos))
+    columnas = _columnas(df.columns)
+    faltantes = [c for c in ("Carbonos", "Grupo", "Masa") if columnas[c] is None]
+    if faltantes:
+        raise ValueError(f"El archivo DHA debe tener columnas de {', '.join(faltantes)} "
+                         "(número de carbonos, grupo PIONA y % en masa)")
+
+    carbonos = df[columnas["Carbonos"]]
+    if not pd.api.types.is_numeric_dtype(carbonos):
+        carbonos = carbonos.astype(str).str.extract(r"(\d+)", expand=False)
+    carbonos = pd.to_numeric(carbonos, errors="coerce")
+
+    # Los nombres de grupo se traducen una vez por categoría, no por fila
+    etiquetas = df[columnas["Grupo"]].fillna("").astype(str).astype("category")
+    traduccion = {c: _grupo_pona(c) for c in etiquetas.cat.categories}
+    grupos = pd.Categorical(etiquetas.map(traduccion), categories=GRUPOS_DHA)
+
+    if columnas["Corte"] is not None:
+        cortes = df[columnas["Corte"]].astype(str)
+        cortes = pd.Categorical(cortes, categories=list(dict.fromkeys(cortes)))
+    else:
+        cortes = pd.Categorical([CORTE_UNICO] * len(df))
+
+    dha = pd.DataFrame({
+        "Corte": cortes,
+        "Carbonos": carbonos,
+        "Grupo": grupos,
+        "Etiqueta": etiquetas,
+        "Masa": pd.to_numeric(df[columnas["Masa"]], errors="coerce"),
+    })
+    dha = dha[dha["Masa"].notna() & dha["Carbonos"].notna()]
+    if dha.empty:
+        raise ValueError("El archivo DHA no tiene componentes con número de carbonos y % en masa.")
+    return dha.astype({"Carbonos": "int16"}).reset_index(drop=True)
+
+
+def agregar_dha(dha, pesos=None):
+    """Agrega los componentes de `leer_dha` a PONA por número de carbonos y por corte.
+
+    Cada corte se normaliza a 100 % (incluyendo lo no identificado) y los
+    cortes se combinan con `pesos` (dict corte -> peso, p. ej. el rendimiento
+    del corte) o, sin pesos, con la masa total que cada uno tiene en el archivo.
+    Devuelve un dict con 'matriz' (carbonos x grupo, % de la muestra),
+    'por_corte' (corte x grupo, % de cada corte), 'por_corte_carbonos'
+    ((corte, carbonos) x grupo, % de cada corte), todas con la columna
+    `OTROS`; 'pona' (% por grupo PONA sobre lo identificado, suma 100),
+    'sin_identificar' (% de la muestra en `OTROS`) y 'etiquetas_sin_identificar'
+    (los grupos del archivo que fueron a `OTROS`). Sin masa identificada como
+    PONA levanta ValueError.
+    """
+    total_corte = dha.groupby("Corte", observed=True)["Masa"].sum()
+    if pesos is None:
+        pesos = total_corte
+    else:
+        pesos = pd.Series(pesos, dtype=float).reindex(total_corte.index).fillna(0.0)
+    if pesos.sum() <= 0:
+        raise ValueError("Los pesos de los cortes del DHA deben sumar más de 0.")
+    pesos = pesos / pesos.sum()
+
+    suma = dha.groupby(["Corte", "Carbonos", "Grupo"], observed=True)["Masa"].sum()
+    cortes = suma.index.get_level_values("Corte")
+    fraccion = 100 * suma / total_corte.reindex(cortes).to_numpy()
+
+    por_corte_carbonos = fraccion.unstack("Grupo", fill_value=0.0).reindex(columns=GRUPOS_DHA, fill_value=0.0)
+    por_corte = por_corte_carbonos.groupby(level="Corte", observed=True).sum()
+    por_corte = por_corte.reindex(index=total_corte.index, columns=GRUPOS_DHA, fill_value=0.0)
+    ponderada = fraccion * pesos.reindex(cortes).to_numpy()
+    matriz = ponderada.groupby(level=["Carbonos", "Grupo"], observed=True).sum().unstack("Grupo", fill_value=0.0)
+    matriz = matriz.reindex(columns=GRUPOS_DHA, fill_value=0.0).sort_index()
+    matriz.index = matriz.index.map(lambda n: f"C{n}")
+    for tabla in (matriz, por_corte, por_corte_carbonos):
+        tabla.columns = tabla.columns.astype(str)
+
+    suma_pona = matriz[GRUPOS_PONA].sum()
+    identificado = suma_pona.sum()
+    if not identificado > 0:
+        raise ValueError("No hay masa identificada como PONA")
+    pona = suma_pona * (100 / identificado)
+    return {
+        "matriz": matriz,
+        "por_corte": por_corte,
+        "por_corte_carbonos": por_corte_carbonos,
+        "pona": pona,
+        "sin_identificar": float(matriz[OTROS].sum()),
+        "etiquetas_sin_identificar": sorted(dha.loc[dha["Grupo"] == OTROS, "Etiqueta"].unique().tolist()),
+    }
@@ -0,0 +1,74 @@
+# Escenarios de precios: barridos en grilla y Monte Carlo con volatilidad y
+# correlación por fracción. Los ingresos de N escenarios x k fracciones se
+# evalúan contra los volúmenes de corte con un único producto matricial.
+
+import numpy as np
+import pandas as pd
+
+from .calculos import FRACCIONES, vector_precios
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def ingresos_escenarios(volumenes, precios):
+    """Ingreso total [USD] por escenario.
+
+    `volumenes` es (k,) para un ensayo o (m, k) para varios; `precios` es la
+    matriz de escenarios (N, k). Devuelve (N,) o (m, N).
+    """
+    volumenes = np.asarray(volumenes, dtype=float)
+    precios = np.asarray(precios, dtype=float)
+    return volumenes @ precios.T / 100
+
+
+def precios_grilla(minimos, maximos, pasos):
+    """Producto cartesiano de precios por fracción: (prod(pasos), k)."""
+    minimos, maximos = vector_precios(minimos), vector_precios(maximos)
+    pasos = np.broadcast_to(np.asarray(pasos, dtype=int), minimos.shape)
+    ejes = [np.linspace(a, b, n) for a, b, n in zip(minimos, maximos, pasos)]
+    malla = np.meshgrid(*ejes, indexing="ij")
+    return np.stack([m.ravel() for m in malla], axis=1)
+
+
+def matriz_correlacion(correlacion, k=len(FRACCIONES)):
+    """Matriz de correlación k x k a partir de un escalar (correlación uniforme) o de una matriz."""
+    if np.ndim(correlacion) == 0:
+        matriz = np.full((k, k), float(correlacion))
+        np.fill_diagonal(matriz, 1.0)
+        return matriz
+    return np.asarray(correlacion, dtype=float)
+
+
+def precios_montecarlo(medias, volatilidades, correlacion=0.0, n=100_000, semilla=None):
+    """N escenarios de precios lognormales correlacionados: (n, k).
+
+    `medias` son los precios esperados por fracción y `volatilidades` los
+    desvíos relativos (0.15 = 15 %). La correlación se aplica a los shocks
+    normales mediante la factorización de Cholesky.
+    """
+    medias = vector_precios(medias)
+    sigma = np.broadcast_to(np.asarray(volatilidades, dtype=float), medias.shape)
+    k = medias.size
+    cholesky = np.linalg.cholesky(matriz_correlacion(correlacion, k))
+    rng = np.random.default_rng(semilla)
+    shocks = rng.standard_normal((n, k)) @ cholesky.T
+    # Lognormal con media igual al precio esperado
+    return medias * np.exp(sigma * shocks - 0.5 * sigma ** 2)
+
+
+def percentiles(ingresos, q=PERCENTILES):
+    """Percentiles del ingreso por escenario sobre el último eje: dict {p: valor o array}."""
+    valores = np.percentile(ingresos, q, axis=-1)
+    return dict(zip(q, valores))
+
+
+def resumen_escenarios(ingresos, nombres=None, q=PERCENTILES):
+    """DataFrame con media, desvío y percentiles por ensayo (una fila por ensayo)."""
+    ingresos = np.atleast_2d(ingresos)
+    df = pd.DataFrame({
+        "Media [USD]": ingresos.mean(axis=1),
+        "Desvío [USD]": ingresos.std(axis=1),
+    }, index=nombres)
+    for p, valores in zip(q, np.percentile(ingresos, q, axis=1)):
+        df[f"P{p} [USD]"] = valores
+    return df
@@ -0,0 +1,201 @@
+# Gráficos del analizador renderizados a PNG y cacheados por datos y estilo.
+# Un rerun con los mismos datos reutiliza los bytes del PNG sin volver a
+# pasar por matplotlib. Las figuras se crean con `matplotlib.figure.Figure`
+# y no con pyplot, que guarda estado global compartido entre hilos: cada
+# gráfico es un objeto propio, así que varias sesiones pueden dibujar a la vez.
+# matplotlib se importa recién al dibujar el primer gráfico que no está en caché.
+# Los PNG también se guardan en la caché en disco, compartida entre procesos.
+
+from io import BytesIO
+
+import numpy as np
+
+from .cache import CacheLRU, hash_contenido
+from .cache_disco import CACHE_DISCO
+from .metricas import medir
+
+CACHE_FIGURAS = CacheLRU(max_entradas=64, max_bytes=64 * 1024 ** 2, disco=CACHE_DISCO, espacio="figuras")
+
+COLORES_PONA = ["#1f77b4", "#ff7f0e", "#ffdd57", "#d62728"]
+ETIQUETAS_PONA = ["Parafínicos", "Olefínicos", "Nafténicos", "Aromáticos"]
+
+# Estilos de la curva TBP: pantalla (fondo oscuro) e informe PDF (fondo blanco)
+ESTILOS_TBP = {
+    "oscuro": {"fondo": "#2d2d2d", "linea": "cyan", "texto": "white", "grilla": "gray", "dpi": 150},
+    "informe": {"fondo": "#ffffff", "linea": "black", "texto": "black", "grilla": "#b0b0b0", "dpi": 150},
+}
+
+ESTILOS_RENDIMIENTO = {
+    "pantalla": {"color": "mediumseagreen", "titulo": "Distribución Estimada por Corte Refinado", "dpi": 150},
+    "informe": {"color": "darkorange", "titulo": "Rendimiento Estimado por Corte", "dpi": 150},
+}
+
+
+# Gráfico de comparación: el ancho en píxeles (ancho x dpi) fija cuántos puntos se dibujan por curva
+ESTILO_COMPARACION = {"ancho": 10, "alto": 8, "dpi": 120}
+
+
+def hash_arrays(*arrays):
+    """Hash del contenido de uno o más arrays (para usar como clave de caché)."""
+    return hash_contenido(b"".join(np.ascontiguousarray(a, dtype=float).tobytes() for a in arrays))
+
+
+def _figura(**kwargs):
+    from matplotlib.figure import Figure
+
+    return Figure(**kwargs)
+
+
+def _png(fig, dpi, nombre):
+    buffer = BytesIO()
+    try:
+        with medir(f"savefig_{nombre}"):
+            fig.savefig(buffer, format="png", dpi=dpi, facecolor=fig.get_facecolor())
+    finally:
+        _cerrar(fig)
+    return buffer.getvalue()
+
+
+def _cerrar(fig):
+    # La figura, sus ejes y artistas se referencian entre sí: sin cortar esos
+    # ciclos la memoria (incluido el buffer del renderer Agg) queda retenida
+    # hasta que pase el recolector de ciclos. Se liberan acá, al terminar.
+    fig.clear()
+    lienzo = fig.canvas
+    for atributo in ("renderer", "_lastKey"):
+        lienzo.__dict__.pop(atributo, None)
+
+
+def grafico_tbp(temperaturas, volumenes, estilo="oscuro", clave=None):
+    """PNG de la curva de destilación TBP. `clave` (p. ej. el hash del archivo) evita re-hashear la curva."""
+    e = ESTILOS_TBP[estilo]
+
+    def dibujar():
+        fig = _figura(facecolor=e["fondo"])
+        ax = fig.subplots()
+        ax.plot(temperaturas, volumenes, marker='o', linestyle='-', color=e["linea"])
+        ax.set_facecolor(e["fondo"])
+        ax.set_xlabel("Temperatura [°C]", color=e["texto"])
+        ax.set_ylabel("% Volumen Destilado", color=e["texto"])
+        ax.set_title("Curva de Destilación TBP", color=e["texto"])
+        ax.grid(True, color=e["grilla"])
+        ax.tick_params(axis='x', colors=e["texto"])
+        ax.tick_params(axis='y', colors=e["texto"])
+        fig.tight_layout()
+        return _png(fig, e["dpi"], "tbp")
+
+    clave = clave or hash_arrays(temperaturas, volumenes)
+    return CACHE_FIGURAS.obtener(("tbp", clave, estilo), dibujar)
+
+
+def grafico_comparacion(nombres, series):
+    """PNG con las curvas TBP superpuestas y las barras de volumen por corte de varios ensayos.
+
+    `series` son tuplas (clave, temperaturas, volúmenes, volúmenes por corte)
+    con las curvas ya decimadas (ver `cache.serie_comparacion`); las claves
+    (archivo, tipo de curva y puntos) y los nombres identifican el gráfico. Las curvas van sin marcadores.
+    """
+    from .calculos import CORTES
+
+    e = ESTILO_COMPARACION
+
+    def dibujar():
+        fig = _figura(figsize=(e["ancho"], e["alto"]), facecolor="#ffffff")
+        ax_curvas, ax_cortes = fig.subplots(2, 1, height_ratios=[3, 2])
+        posiciones = np.arange(len(CORTES))
+        ancho = 0.8 / max(len(series), 1)
+        for i, (nombre, (_, temperaturas, volumenes, cortes)) in enumerate(zip(nombres, series)):
+            color = f"C{i % 10}"
+            ax_curvas.plot(temperaturas, volumenes, linewidth=1.2, color=color, label=nombre)
+            ax_cortes.bar(posiciones - 0.4 + ancho * (i + 0.5), cortes, width=ancho, color=color)
+        ax_curvas.set_xlabel("Temperatura [°C]")
+        ax_curvas.set_ylabel("% Volumen Destilado")
+        ax_curvas.set_title("Curvas de Destilación TBP")
+        ax_curvas.grid(True, color="#d0d0d0")
+        ax_curvas.legend(fontsize=7, ncols=max(1, len(series) // 12 + 1), loc="lower right")
+        ax_cortes.set_xticks(posiciones, list(CORTES), rotation=20, ha="right", fontsize=8)
+        ax_cortes.set_ylabel("Volumen [%]")
+        ax_cortes.set_title("Rendimiento por Corte")
+        fig.tight_layout()
+        return _png(fig, e["dpi"], "comparacion")
+
+    return CACHE_FIGURAS.obtener(("comparacion", tuple(zip(nombres, (s[0] for s in series)))), dibujar)
+
+
+def grafico_backtest(serie, titulo):
+    """PNG del ingreso diario de un ensayo con sus medias móviles (DataFrame de `Backtest.serie`)."""
+    def dibujar():
+        fig = _figura(figsize=(10, 4), facecolor="#ffffff")
+        ax = fig.subplots()
+        columnas = list(serie.columns)
+        ax.plot(serie.index, serie[columnas[0]], linewidth=0.6, color="#b0b0b0", label=columnas[0])
+        for i, columna in enumerate(columnas[1:]):
+            ax.plot(serie.index, serie[columna], linewidth=1.4, color=f"C{i}", label=columna)
+        ax.set_ylabel("Ingreso [USD]")
+        ax.set_title(titulo)
+        ax.grid(True, color="#d0d0d0")
+        ax.legend(fontsize=8)
+        fig.tight_layout()
+        return _png(fig, 120, "backtest")
+
+    clave = ("backtest", titulo, len(serie), hash_arrays(serie.index.asi8, serie.to_numpy()))
+    return CACHE_FIGURAS.obtener(clave, dibujar)
+
+
+def grafico_pona(paraf, olef, naft, arom):
+    """PNG de la torta de composición PONA."""
+    def dibujar():
+        fig = _figura()
+        ax = fig.subplots()
+        ax.pie([paraf, olef, naft, arom], labels=ETIQUETAS_PONA,
+               autopct='%1.1f%%', startangle=90, colors=COLORES_PONA)
+        return _png(fig, 150, "pona")
+
+    return CACHE_FIGURAS.obtener(("pona", float(paraf), float(olef), float(naft), float(arom)), dibujar)
+
+
+def grafico_rendimiento(productos, volumenes, estilo="pantalla"):
+    """PNG del gráfico de barras de rendimiento por corte."""
+    e = ESTILOS_RENDIMIENTO[estilo]
+    productos = list(productos)
+    volumenes = np.asarray(volumenes, dtype=float)
+
+    def dibujar():
+        fig = _figura(facecolor="#ffffff")
+        ax = fig.subplots()
+        ax.bar(productos, volumenes, color=e["color"])
+        ax.set_ylabel("Volumen [%]")
+        ax.set_title(e["titulo"])
+        for etiqueta in ax.get_xticklabels():
+            etiqueta.set(rotation=30, ha="right")
+        fig.tight_layout()
+        return _png(fig, e["dpi"], "rendimiento")
+
+    return CACHE_FIGURAS.obtener(("rendimiento", tuple(productos), hash_arrays(volumenes), estilo), dibujar)
+
+
+def grafico_histograma(valores, marcas=None, bins=60, titulo="Distribución de ingresos por escenario",
+                       etiqueta="Ingreso total [USD]"):
+    """PNG del histograma de `valores` con líneas verticales en `marcas` (dict etiqueta -> valor).
+
+    El histograma se calcula con NumPy y sólo los conteos entran en la clave de
+    caché, así que el costo no depende de la cantidad de escenarios.
+    """
+    conteos, bordes = np.histogram(np.asarray(valores, dtype=float), bins=bins)
+    marcas = dict(marcas or {})
+
+    def dibujar():
+        fig = _figura(facecolor="#ffffff")
+        ax = fig.subplots()
+        ax.bar(bordes[:-1], conteos, width=np.diff(bordes), align="edge", color="steelblue", edgecolor="white")
+        for i, (nombre, x) in enumerate(marcas.items()):
+            ax.axvline(x, color=["#d62728", "#ff7f0e", "#2ca02c", "#ff7f0e", "#d62728"][i % 5], linestyle="--")
+            ax.annotate(nombre, (x, conteos.max()), rotation=90, va="top", ha="right", fontsize=8)
+        ax.set_xlabel(etiqueta)
+        ax.set_ylabel("Escenarios")
+        ax.set_title(titulo)
+        fig.tight_layout()
+        return _png(fig, 150, "histograma")
+
+    clave = ("histograma", hash_arrays(conteos, bordes), tuple(marcas.items()), titulo, etiqueta)
+    return CACHE_FIGURAS.obtener(clave, dibujar)
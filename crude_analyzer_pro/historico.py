@@ -0,0 +1,169 @@
+# Backtest diario del ingreso de cada ensayo sobre un historial de precios.
+#
+# El historial es un CSV o Parquet con una columna 'Fecha' y una columna de
+# precio [USD/100 kg] por fracción (los nombres de FRACCIONES). Los volúmenes
+# por fracción de los ensayos se calculan una sola vez (o se leen de la
+# biblioteca) y el ingreso de todos los ensayos en todos los días es un único
+# producto matricial.
+#
+# `Backtest` guarda, por ventana (30 y 90 días por defecto), la suma y la suma
+# de cuadrados de los últimos ingresos. Agregar un día suma el ingreso nuevo y
+# resta el que sale de la ventana: cuesta lo mismo con diez días de historia
+# que con diez años, sin recalcular nada hacia atrás.
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .calculos import FRACCIONES, vector_precios
+
+VENTANAS = (30, 90)
+COLUMNA_FECHA = "Fecha"
+
+
+def leer_historial(datos, nombre=""):
+    """Historial de precios desde los bytes de un CSV o Parquet: DataFrame indexado por fecha.
+
+    Las fechas se ordenan, una fecha repetida se queda con su última fila y los
+    precios faltantes se completan con el del día anterior.
+    """
+    if nombre.lower().endswith(".parquet") or datos[:4] == b"PAR1":
+        df = pd.read_parquet(BytesIO(datos))
+    else:
+        df = pd.read_csv(BytesIO(datos))
+    faltantes = [c for c in [COLUMNA_FECHA, *FRACCIONES] if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Al historial de precios le faltan las columnas: {', '.join(faltantes)}")
+    if df.empty:
+        raise ValueError("El historial de precios no tiene filas")
+
+    df = df[[COLUMNA_FECHA, *FRACCIONES]]
+    df[COLUMNA_FECHA] = pd.to_datetime(df[COLUMNA_FECHA]).dt.normalize()
+    df = df.drop_duplicates(COLUMNA_FECHA, keep="last").set_index(COLUMNA_FECHA).sort_index()
+    df = df.astype(float).ffill()
+    if df.isna().any().any():
+        raise ValueError("El primer día del historial tiene que tener precio para todas las fracciones.")
+    return df
+
+
+class Backtest:
+    """Ingreso diario [USD] de m ensayos y sus estadísticas móviles, actualizables día a día.
+
+    `volumenes` es (m, k) con el volumen [%] de cada fracción por ensayo. Los
+    ingresos se guardan en un buffer que crece por duplicación; las sumas de
+    cada ventana se actualizan en O(m) por día agregado.
+    """
+
+    def __init__(self, volumenes, nombres=None, ventanas=VENTANAS, capacidad=1024):
+        self.volumenes = np.atleast_2d(np.asarray(volumenes, dtype=float))
+        m = len(self.volumenes)
+        self.nombres = list(nombres) if nombres is not None else [f"Ensayo {i + 1}" for i in range(m)]
+        self.ventanas = tuple(int(w) for w in ventanas)
+        self.dias = 0
+        self.fechas = np.empty(capacidad, dtype="datetime64[D]")
+        self.precios = np.empty((capacidad, len(FRACCIONES)))
+        self.ingresos = np.empty((capacidad, m))
+        self.medias = {w: np.empty((capacidad, m)) for w in self.ventanas}
+        self._suma = {w: np.zeros(m) for w in self.ventanas}
+        self._suma2 = {w: np.zeros(m) for w in self.ventanas}
+        self._total = np.zeros(m)
+
+    def __len__(self):
+        return self.dias
+
+    def _reservar(self, dias):
+        capacidad = len(self.fechas)
+        if self.dias + dias <= capacidad:
+            return
+        nueva = max(2 * capacidad, self.dias + dias)
+        self.fechas = np.resize(self.fechas, nueva)
+        self.precios = np.resize(self.precios, (nueva, self.precios.shape[1]))
+        self.ingresos = np.resize(self.ingresos, (nueva, self.ingresos.shape[1]))
+        self.medias = {w: np.resize(s, (nueva, s.shape[1])) for w, s in self.medias.items()}
+
+    def _validar_fechas(self, fechas):
+        if np.any(np.diff(fechas) <= np.timedelta64(0, "D")) or (
+                self.dias and fechas[0] <= self.fechas[self.dias - 1]):
+            raise ValueError("Las fechas tienen que ser posteriores al último día del backtest y sin repetir.")
+
+    def agregar(self, fecha, precios):
+        """Agrega un día con los precios por fracción (dict o secuencia); devuelve el ingreso (m,)."""
+        fecha = np.datetime64(pd.Timestamp(fecha).date(), "D")
+        self._validar_fechas(np.array([fecha]))
+        precios = vector_precios(precios)
+        ingreso = self.volumenes @ precios / 100
+
+        self._reservar(1)
+        d = self.dias
+        self.fechas[d], self.precios[d], self.ingresos[d] = fecha, precios, ingreso
+        for w in self.ventanas:
+            if d >= w:
+                saliente = self.ingresos[d - w]
+                self._suma[w] += ingreso - saliente
+                self._suma2[w] += ingreso ** 2 - saliente ** 2
+            else:
+                self._suma[w] += ingreso
+                self._suma2[w] += ingreso ** 2
+            self.medias[w][d] = self._suma[w] / min(d + 1, w)
+        self._total += ingreso
+        self.dias += 1
+        return ingreso
+
+    def agregar_historial(self, historial):
+        """Agrega todos los días de un historial (ver `leer_historial`) en una sola pasada vectorizada."""
+        fechas = historial.index.to_numpy().astype("datetime64[D]")
+        if not len(fechas):
+            return
+        self._validar_fechas(fechas)
+        precios = historial[list(FRACCIONES)].to_numpy(dtype=float)
+        ingresos = precios @ self.volumenes.T / 100
+
+        self._reservar(len(fechas))
+        d0, d1 = self.dias, self.dias + len(fechas)
+        self.fechas[d0:d1], self.precios[d0:d1], self.ingresos[d0:d1] = fechas, precios, ingresos
+        # Medias móviles de los días nuevos con sumas acumuladas, incluyendo los días previos de cada ventana
+        inicio = max(0, d0 - max(self.ventanas))
+        acumulado = np.cumsum(self.ingresos[inicio:d1], axis=0)
+        acumulado = np.concatenate([np.zeros((1, acumulado.shape[1])), acumulado])
+        dias = np.arange(d0, d1)
+        for w in self.ventanas:
+            desde = np.maximum(dias + 1 - w, 0)
+            suma = acumulado[dias + 1 - inicio] - acumulado[np.maximum(desde - inicio, 0)]
+            self.medias[w][d0:d1] = suma / np.minimum(dias + 1, w)[:, None]
+            ventana = self.ingresos[max(0, d1 - w):d1]
+            self._suma[w] = ventana.sum(axis=0)
+            self._suma2[w] = (ventana ** 2).sum(axis=0)
+        self._total += ingresos.sum(axis=0)
+        self.dias = d1
+
+    def estadisticas(self):
+        """Una fila por ensayo: último ingreso, media y desvío de cada ventana y media histórica [USD]."""
+        df = pd.DataFrame(index=pd.Index(self.nombres, name="Ensayo"))
+        if not self.dias:
+            return df
+        df["Último día [USD]"] = self.ingresos[self.dias - 1]
+        for w in self.ventanas:
+            n = min(self.dias, w)
+            media = self._suma[w] / n
+            df[f"Media {w} d [USD]"] = media
+            df[f"Desvío {w} d [USD]"] = np.sqrt(np.maximum(self._suma2[w] / n - media ** 2, 0.0))
+        df["Media histórica [USD]"] = self._total / self.dias
+        return df
+
+    def serie(self, i):
+        """Ingreso diario del ensayo `i` y sus medias móviles, indexados por fecha."""
+        df = pd.DataFrame({"Ingreso [USD]": self.ingresos[:self.dias, i]},
+                          index=pd.DatetimeIndex(self.fechas[:self.dias], name=COLUMNA_FECHA))
+        for w in self.ventanas:
+            df[f"Media {w} d [USD]"] = self.medias[w][:self.dias, i]
+        return df
+
+    def ultimos_precios(self):
+        """Precios del último día como dict por fracción (o None si no hay días)."""
+        if not self.dias:
+            return None
+        return dict(zip(FRACCIONES, self.precios[self.dias - 1].tolist()))
+
+    def ultima_fecha(self):
+        return pd.Timestamp(self.fechas[self.dias - 1]) if self.dias else None
@@ -0,0 +1,282 @@
+# Informe técnico en PDF (fpdf), compartido por la app y el generador por lotes.
+# Las imágenes se pasan como bytes PNG y se registran directamente en el PDF,
+# sin archivos temporales: varias sesiones o workers pueden generar informes a
+# la vez sin pisarse ni tocar el disco.
+
+import os
+import re
+import struct
+import zlib
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+from .cache import hash_contenido
+from .metricas import medir
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logoutn.png")
+
+
+@lru_cache(maxsize=1)
+def logo_png():
+    """Bytes del logo del encabezado (leído una vez por proceso) o None si no está."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+    with open(LOGO_PATH, "rb") as f:
+        return f.read()
+
+
+def limpiar_emoji(texto):
+    if not isinstance(texto, str):
+        return texto
+    return re.sub(r'[^\x00-\xff]', '', texto.replace("–", "-").replace("—", "-"))
+
+
+def limpiar_columna(serie):
+    """`limpiar_emoji` aplicado a una columna entera de texto con las operaciones vectorizadas de pandas."""
+    return (serie.astype(str)
+            .str.replace("–", "-", regex=False)
+            .str.replace("—", "-", regex=False)
+            .str.replace(r'[^\x00-\xff]', '', regex=True))
+
+
+def columnas_texto(df, formatos=None, formato_decimal="%.2f"):
+    """Texto imprimible de cada columna de `df`: dict {encabezado: array de str}.
+
+    Los números se formatean en bloque con `np.char.mod` (`formatos` permite un
+    formato printf por columna) y sólo las columnas de texto pasan por el
+    saneamiento de caracteres; nunca se procesa celda por celda en Python.
+    """
+    formatos = formatos or {}
+    texto = {}
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_bool_dtype(serie) or not pd.api.types.is_numeric_dtype(serie):
+            valores = limpiar_columna(serie.fillna("")).to_numpy(dtype=object)
+        else:
+            numeros = serie.to_numpy(dtype=float)
+            formato = formatos.get(col, "%d" if pd.api.types.is_integer_dtype(serie) else formato_decimal)
+            valores = np.where(np.isnan(numeros), "", np.char.mod(formato, numeros)).astype(object)
+        texto[limpiar_emoji(str(col))] = valores
+    return texto
+
+
+def leer_png(datos):
+    """Info de imagen en el formato interno de fpdf a partir de los bytes de un PNG.
+
+    Equivale a `FPDF._parsepng`, pero separa el canal alfa (los PNG de
+    matplotlib son RGBA) con NumPy en lugar de una expresión regular por fila.
+    """
+    if datos[:8] != b"\x89PNG\r\n\x1a\n" or datos[12:16] != b"IHDR":
+        raise RuntimeError("FPDF error: Not a PNG file")
+    w, h, bpc, ct, compresion, filtro, entrelazado = struct.unpack(">IIBBBBB", datos[16:29])
+    if bpc > 8:
+        raise RuntimeError("FPDF error: 16-bit depth not supported")
+    if compresion != 0 or filtro != 0 or entrelazado != 0:
+        raise RuntimeError("FPDF error: Unsupported PNG compression, filter or interlacing")
+    colspace = {0: "DeviceGray", 4: "DeviceGray", 2: "DeviceRGB", 6: "DeviceRGB", 3: "Indexed"}.get(ct)
+    if colspace is None:
+        raise RuntimeError("FPDF error: Unknown color type")
+
+    pal, trns, idat = "", "", []
+    pos = 33
+    while pos < len(datos):
+        n, tipo = struct.unpack(">I4s", datos[pos:pos + 8])
+        chunk = datos[pos + 8:pos + 8 + n]
+        if tipo == b"PLTE":
+            pal = chunk
+        elif tipo == b"tRNS":
+            if ct == 0:
+                trns = [chunk[1]]
+            elif ct == 2:
+                trns = [chunk[1], chunk[3], chunk[5]]
+            elif chunk.find(b"\x00") != -1:
+                trns = [chunk.find(b"\x00")]
+        elif tipo == b"IDAT":
+            idat.append(chunk)
+        elif tipo == b"IEND":
+            break
+        pos += n + 12
+    if colspace == "Indexed" and not pal:
+        raise RuntimeError("FPDF error: Missing palette")
+
+    colores = 3 if colspace == "DeviceRGB" else 1
+    info = {
+        "w": w, "h": h, "cs": colspace, "bpc": bpc, "f": "FlateDecode",
+        "dp": f"/Predictor 15 /Colors {colores} /BitsPerComponent {bpc} /Columns {w}",
+        "pal": pal, "trns": trns,
+    }
+    data = b"".join(idat)
+    if ct >= 4:
+        # Cada fila es un byte de filtro seguido de los píxeles; los filtros PNG
+        # operan por canal, así que color y alfa se pueden separar sin decodificar.
+        filas = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(h, 1 + w * (colores + 1))
+        pixeles = filas[:, 1:].reshape(h, w, colores + 1)
+        filtro = filas[:, :1]
+        data = zlib.compress(np.hstack([filtro, pixeles[:, :, :colores].reshape(h, -1)]).tobytes())
+        info["smask"] = zlib.compress(np.hstack([filtro, pixeles[:, :, colores]]).tobytes())
+    info["data"] = data
+    return info
+
+
+class PDF(FPDF):
+    def header(self):
+        logo = logo_png()
+        if logo is not None:
+            self.image(self.registrar_png(logo), 10, 8, 20)
+        self.set_font("Arial", "B", 12)
+        self.cell(0, 10, "UTN-FRN INDUSTRIALIZACIÓN - Crude Analyzer Pro", 0, 1, "C")
+        self.set_font("Arial", "", 10)
+        self.cell(0, 10, f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M')}", 0, 1, "R")
+        self.ln(4)
+
+    def section(self, title, content):
+        self.set_font("Arial", "B", 11)
+        self.cell(0, 10, limpiar_emoji(title), 0, 1)
+        self.set_font("Arial", "", 10)
+
+        if isinstance(content, str):
+            self.multi_cell(0, 8, limpiar_emoji(content))
+        elif isinstance(content, dict):
+            for k, v in content.items():
+                self.multi_cell(0, 8, limpiar_emoji(f"{k}: {v}%"))
+        elif isinstance(content, pd.DataFrame):
+            self.tabla(content)
+        self.ln(2)
+
+    def tabla(self, df, formatos=None, alto_fila=6, tamano_fuente=8, anchos=None):
+        """Tabla con encabezado a todo el ancho útil, que se repite en cada salto de página.
+
+        Las columnas numéricas se alinean a la derecha. Los anchos salen del texto
+        más largo de cada columna (una medición por columna) o de `anchos` [mm].
+        """
+        texto = columnas_texto(df, formatos)
+        encabezados = list(texto)
+        if not encabezados:
+            return
+        numericas = [pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])
+                     for c in df.columns]
+        ancho_util = self.w - self.l_margin - self.r_margin
+
+        self.set_font("Arial", "", tamano_fuente)
+        if anchos is None:
+            anchos = []
+            for enc, valores in zip(encabezados, texto.values()):
+                largos = np.fromiter((len(v) for v in valores), dtype=int, count=len(valores))
+                mas_largo = valores[int(largos.argmax())] if len(valores) else ""
+                self.set_font("Arial", "B", tamano_fuente)
+                ancho = self.get_string_width(enc)
+                self.set_font("Arial", "", tamano_fuente)
+                anchos.append(max(ancho, self.get_string_width(mas_largo)) + 3)
+        anchos = np.asarray(anchos, dtype=float) * (ancho_util / sum(anchos))
+
+        # Texto que no entra en su columna se recorta (aprox. por ancho medio de carácter)
+        caracter = self.get_string_width("0") or 1.0
+        for (enc, valores), ancho in zip(texto.items(), anchos):
+            maximo = max(int((ancho - 2) / caracter), 1)
+            texto[enc] = [v if len(v) <= maximo else v[:maximo - 1] + "." for v in valores]
+        alineacion = ["R" if n else "L" for n in numericas]
+
+        def encabezado():
+            self.set_font("Arial", "B", tamano_fuente)
+            self.set_fill_color(220, 220, 220)
+            for enc, ancho in zip(encabezados, anchos):
+                self.cell(ancho, alto_fila, enc, 1, 0, "C", 1)
+            self.ln(alto_fila)
+            self.set_font("Arial", "", tamano_fuente)
+
+        encabezado()
+        for fila in zip(*texto.values()):
+            if self.y + alto_fila > self.page_break_trigger:
+                self.add_page(self.cur_orientation)
+                encabezado()
+            for valor, ancho, alinear in zip(fila, anchos, alineacion):
+                self.cell(ancho, alto_fila, valor, 1, 0, alinear)
+            self.ln(alto_fila)
+
+    def _parsepng(self, name):
+        with open(name, "rb") as f:
+            info = leer_png(f.read())
+        if "smask" in info and self.pdf_version < "1.4":
+            self.pdf_version = "1.4"
+        return info
+
+    def registrar_png(self, datos):
+        """Registra una imagen PNG en memoria; devuelve el nombre para usar con `image`.
+
+        fpdf sólo parsea una imagen la primera vez que ve su nombre, así que
+        con la imagen ya registrada `image(nombre, ...)` no abre ningún archivo.
+        El nombre sale del hash del contenido: la misma imagen se incrusta una vez.
+        """
+        nombre = f"png:{hash_contenido(datos)}"
+        if nombre not in self.images:
+            info = leer_png(datos)
+            if "smask" in info and self.pdf_version < "1.4":
+                self.pdf_version = "1.4"
+            info["i"] = len(self.images) + 1
+            self.images[nombre] = info
+        return nombre
+
+    def imagen(self, titulo, png, ln=4):
+        """Inserta un gráfico (bytes PNG) con su título a todo el ancho de la página."""
+        self.set_font("Arial", "B", 11)
+        self.cell(0, 10, titulo, 0, 1)
+        self.image(self.registrar_png(png), x=10, w=180)
+        self.ln(ln)
+
+
+def observacion_rendimiento(df_rend):
+    """Texto sobre el corte predominante de la tabla de rendimiento."""
+    predom = df_rend.loc[df_rend["Volumen [%]"].idxmax()]
+    producto_pred = predom["Producto"]
+    vol_pred = predom["Volumen [%]"]
+
+    observacion = f"El corte predominante es {producto_pred} con un {vol_pred:.1f}% del volumen total. "
+    if "Gasolinas" in producto_pred:
+        observacion += "Esto sugiere un crudo liviano, ideal para la producción de naftas y productos ligeros."
+    elif "Fondo" in producto_pred:
+        observacion += "Esto indica un crudo pesado, con mayor proporción de residuos y necesidad de procesos de conversión."
+    elif "Diesel" in producto_pred or "Gasoil" in producto_pred:
+        observacion += "El crudo tiene un buen rendimiento medio, adecuado para refinerías orientadas a gasoil y destilados."
+    return observacion
+
+
+def generar_informe(kw, api, tipo, ingresos=None, pona=None, rendimiento=None,
+                    grafico_tbp=None, grafico_rendimiento=None, anexos=None):
+    """Arma el informe técnico completo y devuelve los bytes del PDF.
+
+    `ingresos` y `rendimiento` son las tablas de las pestañas económica y de
+    rendimiento, `pona` el dict de composición y los gráficos, bytes PNG.
+    `anexos` (dict título -> DataFrame) agrega tablas largas al final, cada
+    una desde una página nueva.
+    """
+    pdf = PDF()
+    pdf.add_page()
+
+    if grafico_tbp is not None:
+        pdf.imagen("Curva TBP", grafico_tbp, ln=5)
+
+    pdf.section("Factor de Watson / API", f"{kw} Watson, {api}° API")
+    pdf.section("Clasificación del crudo", tipo)
+
+    if isinstance(ingresos, pd.DataFrame):
+        pdf.section("Evaluación Económica", ingresos)
+
+    if isinstance(pona, dict) and pona:
+        pdf.section("Composición PONA", pona)
+
+    if isinstance(rendimiento, pd.DataFrame):
+        pdf.section("Rendimiento estimado por fracción", rendimiento)
+        if grafico_rendimiento is not None:
+            pdf.imagen("Gráfico de Rendimiento", grafico_rendimiento)
+        pdf.section("Observaciones sobre rendimiento", observacion_rendimiento(rendimiento))
+
+    for titulo, tabla in (anexos or {}).items():
+        pdf.add_page()
+        pdf.section(titulo, tabla)
+
+    with medir("pdf_output"):
+        return pdf.output(dest='S').encode('latin1')
@@ -0,0 +1,114 @@
+# Lectura tipada de curvas TBP grandes (destilación simulada con 10^5-10^6 filas).
+# Sólo se leen las columnas 'Temperatura' y 'Volumen' como float64, con el motor
+# pyarrow si está instalado o en bloques con el motor C de pandas, y la curva
+# puede reducirse a una resolución fija sin perder exactitud en los cortes.
+
+import importlib.util
+import time
+from collections import namedtuple
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .calculos import CORTES, FRACCIONES
+from .curvas import CurvaTBP, limites_de_cortes
+from .metricas import medir
+
+COLUMNAS = ["Temperatura", "Volumen"]
+TIPOS = {"Temperatura": "float64", "Volumen": "float64"}
+FILAS_POR_BLOQUE = 200_000
+
+InformeIngesta = namedtuple("InformeIngesta", [
+    "filas",              # filas leídas del archivo
+    "puntos",             # puntos de la curva conservada
+    "columnas_archivo",   # columnas presentes en el archivo
+    "segundos",           # tiempo de lectura + reducción
+    "motor",              # motor de pandas utilizado
+    "bytes_sin_optimizar",  # estimación de un read_csv con todas las columnas
+    "bytes_curva",        # memoria de la curva conservada
+])
+
+
+def _hay_pyarrow():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _columnas_archivo(datos):
+    encabezado = datos[:datos.find(b"\n")] if b"\n" in datos else datos
+    return [c.strip().strip('"') for c in encabezado.decode("utf-8", "replace").split(",")]
+
+
+def leer_columnas(datos, motor=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Lee 'Temperatura' y 'Volumen' como arrays float64 desde los bytes de un CSV."""
+    columnas = _columnas_archivo(datos)
+    faltantes = [c for c in COLUMNAS if c not in columnas]
+    if faltantes:
+        raise ValueError("El archivo debe tener exactamente las columnas: 'Temperatura' y 'Volumen'")
+
+    motor = motor or ("pyarrow" if _hay_pyarrow() else "c")
+    if motor == "pyarrow":
+        df = pd.read_csv(BytesIO(datos), usecols=COLUMNAS, dtype=TIPOS, engine="pyarrow")
+        return df["Temperatura"].to_numpy(), df["Volumen"].to_numpy(), motor
+
+    temperaturas, volumenes = [], []
+    for bloque in pd.read_csv(BytesIO(datos), usecols=COLUMNAS, dtype=TIPOS, engine="c",
+                              chunksize=filas_por_bloque):
+        temperaturas.append(bloque["Temperatura"].to_numpy())
+        volumenes.append(bloque["Volumen"].to_numpy())
+    if not temperaturas:
+        return np.empty(0), np.empty(0), motor
+    return np.concatenate(temperaturas), np.concatenate(volumenes), motor
+
+
+def reducir_curva(temperaturas, volumenes, puntos, cortes=(FRACCIONES, CORTES)):
+    """Reduce una curva a ~`puntos` muestras repartidas uniformemente en volumen destilado.
+
+    Se conservan el primer y el último punto y se agregan como nodos los límites
+    de `cortes` con su volumen interpolado sobre la curva completa, de modo que
+    los rendimientos de esos cortes no cambian al reducir.
+    """
+    curva = CurvaTBP(temperaturas, volumenes)
+    t, v = curva.temperaturas, curva.volumenes
+    if puntos is None or len(t) <= puntos:
+        return t, v
+
+    objetivo = np.linspace(v[0], v[-1], puntos)
+    indices = np.unique(np.concatenate([
+        [0, len(t) - 1],
+        np.minimum(np.searchsorted(v, objetivo, side="left"), len(t) - 1),
+    ]))
+
+    nodos = np.unique(np.concatenate([limites_de_cortes(c) for c in cortes]))
+    nodos = nodos[np.isfinite(nodos) & (nodos > t[0]) & (nodos < t[-1])]
+    t_red = np.concatenate([t[indices], nodos])
+    v_red = np.concatenate([v[indices], curva.volumen_acumulado(nodos)])
+    orden = np.argsort(t_red, kind="stable")
+    return t_red[orden], v_red[orden]
+
+
+def leer_curva(datos, resolucion=None, motor=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Lee una curva TBP desde bytes y, si se indica, la reduce a `resolucion` puntos.
+
+    Devuelve (DataFrame con 'Temperatura'/'Volumen' en float64, `InformeIngesta`).
+    """
+    inicio = time.perf_counter()
+    with medir("parseo_csv"):
+        temperaturas, volumenes, motor = leer_columnas(datos, motor, filas_por_bloque)
+    filas = len(temperaturas)
+    if resolucion:
+        with medir("reduccion_curva"):
+            temperaturas, volumenes = reducir_curva(temperaturas, volumenes, resolucion)
+    df = pd.DataFrame({"Temperatura": temperaturas, "Volumen": volumenes})
+
+    columnas = len(_columnas_archivo(datos))
+    informe = InformeIngesta(
+        filas=filas,
+        puntos=len(df),
+        columnas_archivo=columnas,
+        segundos=time.perf_counter() - inicio,
+        motor=motor,
+        bytes_sin_optimizar=filas * columnas * 8,
+        bytes_curva=int(df.memory_usage(index=False).sum()),
+    )
+    return df, informe
@@ -0,0 +1,210 @@
+# Generación de informes PDF por lotes desde la línea de comandos.
+#
+#   python -m crude_analyzer_pro.lote ensayos/ --salida informes/ --workers 8
+#   python -m crude_analyzer_pro.lote "cargas/*.csv" --pona pona/ --precios precios.csv
+#
+# Cada curva TBP produce informes/informe_<nombre>.pdf con el mismo contenido
+# que la pestaña "Informe PDF" de la app, y se escribe un resumen.csv con una
+# fila por ensayo.
+
+import argparse
+import glob
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .calculos import CORTES, FRACCIONES, PRECIOS_DEFECTO, tabla_ingresos, tabla_rendimiento
+from .cache import analizar_ensayo, cargar_pona, cargar_tbp
+from .conversion import TBP, TIPOS_CURVA
+
+DENSIDAD_DEFECTO = 850.0
+TEMP_K_DEFECTO = 673.15
+
+
+def buscar_curvas(entradas):
+    """Expande directorios y globs a una lista ordenada y sin duplicados de CSV."""
+    archivos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            archivos.update(glob.glob(os.path.join(entrada, "*.csv")))
+        else:
+            archivos.update(glob.glob(entrada))
+    return sorted(os.path.abspath(a) for a in archivos)
+
+
+def nombres_salida(archivos):
+    """Nombre de informe determinístico por archivo; los nombres repetidos llevan sufijo _2, _3..."""
+    asignados = set()
+    nombres = []
+    for archivo in archivos:
+        base = nombre = os.path.splitext(os.path.basename(archivo))[0]
+        n = 1
+        # El sufijo puede coincidir con otro archivo (x.csv, x_2.csv, x.csv): se sigue hasta uno libre
+        while nombre in asignados:
+            n += 1
+            nombre = f"{base}_{n}"
+        asignados.add(nombre)
+        nombres.append(nombre)
+    return nombres
+
+
+def leer_precios(ruta):
+    """Precios por fracción desde un CSV con columnas 'Fracción'/'Precio' o con una fila por fracción como columnas."""
+    precios = dict(PRECIOS_DEFECTO)
+    if ruta is None:
+        return precios
+    df = pd.read_csv(ruta)
+    if {"Fracción", "Precio"} <= set(df.columns):
+        precios.update(zip(df["Fracción"], df["Precio"].astype(float)))
+    else:
+        precios.update({fr: float(df[fr].iloc[0]) for fr in FRACCIONES if fr in df.columns})
+    desconocidas = set(precios) - set(FRACCIONES)
+    if desconocidas:
+        raise ValueError(f"Fracciones desconocidas en la planilla de precios: {sorted(desconocidas)}")
+    return precios
+
+
+def leer_propiedades(ruta):
+    """Densidad y temperatura media por ensayo desde un CSV con columnas 'archivo', 'densidad', 'temp_k'."""
+    if ruta is None:
+        return {}
+    df = pd.read_csv(ruta)
+    df["archivo"] = df["archivo"].astype(str).map(lambda a: os.path.splitext(os.path.basename(a))[0])
+    return {fila.archivo: (float(fila.densidad), float(fila.temp_k)) for fila in df.itertuples()}
+
+
+def buscar_pona(directorio, nombre):
+    if directorio is None:
+        return None
+    for candidato in (f"{nombre}.csv", f"{nombre}_pona.csv"):
+        ruta = os.path.join(directorio, candidato)
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+
+def procesar_ensayo(tarea):
+    """Analiza una curva y escribe su informe. Corre en un proceso del pool."""
+    from .graficos import grafico_rendimiento, grafico_tbp
+    from .informe import generar_informe
+
+    archivo, nombre, salida, densidad, temp_k, pona_ruta, precios, tipo_curva = tarea
+    fila = {"archivo": archivo, "nombre": nombre, "densidad": densidad, "temp_k": temp_k}
+    inicio = time.perf_counter()
+    try:
+        with open(archivo, "rb") as f:
+            ensayo = cargar_tbp(f.read(), tipo=tipo_curva)
+        analisis = analizar_ensayo(ensayo, densidad, temp_k)
+        df_ingresos = tabla_ingresos(analisis["fracciones"], precios)
+        df_rend = tabla_rendimiento(analisis["cortes"])
+
+        pona = {}
+        if pona_ruta is not None:
+            with open(pona_ruta, "rb") as f:
+                paraf, olef, naft, arom = cargar_pona(f.read())
+            if math.isclose(paraf + olef + naft + arom, 100, abs_tol=1e-6):
+                pona = {"Parafínicos": paraf, "Olefínicos": olef, "Nafténicos": naft, "Aromáticos": arom}
+
+        df = ensayo.df
+        pdf_bytes = generar_informe(
+            analisis["kw"], analisis["api"], analisis["tipo"],
+            ingresos=df_ingresos, pona=pona, rendimiento=df_rend,
+            grafico_tbp=grafico_tbp(df["Temperatura"], df["Volumen"], "informe", clave=ensayo.hash),
+            grafico_rendimiento=grafico_rendimiento(df_rend["Producto"], df_rend["Volumen [%]"], "informe"),
+        )
+        informe = os.path.join(salida, f"informe_{nombre}.pdf")
+        with open(informe, "wb") as f:
+            f.write(pdf_bytes)
+
+        fila.update({"Kw": analisis["kw"], "API": analisis["api"], "Clasificación": analisis["tipo"]})
+        fila.update(zip(FRACCIONES, analisis["fracciones"].round(2)))
+        fila.update(zip(CORTES, analisis["cortes"].round(2)))
+        fila.update({"Ingreso Total [USD]": round(df_ingresos["Ingreso Estimado [USD]"].sum(), 2),
+                     "informe": informe, "error": ""})
+    except Exception as e:
+        fila.update({"informe": "", "error": f"{type(e).__name__}: {e}"})
+    fila["segundos"] = round(time.perf_counter() - inicio, 3)
+    return fila
+
+
+def _inicializar_worker():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def generar_lote(archivos, salida, precios=None, propiedades=None, pona_dir=None,
+                 densidad=DENSIDAD_DEFECTO, temp_k=TEMP_K_DEFECTO, workers=None, tipo_curva=TBP):
+    """Genera un informe por archivo en un pool de procesos y devuelve el resumen como DataFrame.
+
+    Con `tipo_curva` ASTM D86 o D2887 cada archivo se convierte a TBP antes del análisis.
+    """
+    os.makedirs(salida, exist_ok=True)
+    precios = precios or dict(PRECIOS_DEFECTO)
+    propiedades = propiedades or {}
+    tareas = []
+    for archivo, nombre in zip(archivos, nombres_salida(archivos)):
+        base = os.path.splitext(os.path.basename(archivo))[0]
+        dens, tk = propiedades.get(base, (densidad, temp_k))
+        tareas.append((archivo, nombre, salida, dens, tk, buscar_pona(pona_dir, base), precios, tipo_curva))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _inicializar_worker()
+        filas = [procesar_ensayo(t) for t in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as pool:
+            filas = list(pool.map(procesar_ensayo, tareas, chunksize=max(1, len(tareas) // (workers * 4))))
+
+    resumen = pd.DataFrame(filas)
+    resumen.to_csv(os.path.join(salida, "resumen.csv"), index=False)
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m crude_analyzer_pro.lote",
+        description="Genera un informe PDF por cada curva TBP (.csv con columnas 'Temperatura' y 'Volumen').",
+    )
+    parser.add_argument("entradas", nargs="+", help="Directorios o globs de archivos CSV con curvas TBP")
+    parser.add_argument("-o", "--salida", default="informes", help="Directorio de salida (default: informes)")
+    parser.add_argument("--pona", help="Directorio con la composición PONA de cada ensayo (<nombre>.csv o <nombre>_pona.csv)")
+    parser.add_argument("--precios", help="CSV con precios por fracción [USD/100 kg]")
+    parser.add_argument("--propiedades", help="CSV con columnas archivo, densidad, temp_k por ensayo")
+    parser.add_argument("--densidad", type=float, default=DENSIDAD_DEFECTO, help="Densidad a 15 °C [kg/m³] por defecto")
+    parser.add_argument("--temp-k", type=float, default=TEMP_K_DEFECTO, help="Temperatura media de ebullición [K] por defecto")
+    parser.add_argument("--tipo-curva", choices=TIPOS_CURVA, default=TBP,
+                        help="Tipo de las curvas de entrada; D86 y D2887 se convierten a TBP (default: TBP)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Procesos en paralelo (default: núcleos disponibles)")
+    args = parser.parse_args(argv)
+
+    archivos = buscar_curvas(args.entradas)
+    if not archivos:
+        print("No se encontraron archivos CSV en las entradas indicadas.", file=sys.stderr)
+        return 1
+
+    inicio = time.perf_counter()
+    resumen = generar_lote(
+        archivos, args.salida,
+        precios=leer_precios(args.precios),
+        propiedades=leer_propiedades(args.propiedades),
+        pona_dir=args.pona,
+        densidad=args.densidad,
+        temp_k=args.temp_k,
+        workers=args.workers,
+        tipo_curva=args.tipo_curva,
+    )
+    duracion = time.perf_counter() - inicio
+    errores = int((resumen["error"] != "").sum())
+    print(f"{len(resumen) - errores} informes generados en {duracion:.1f} s "
+          f"({len(resumen) / duracion * 60:.0f} por minuto), {errores} con error. "
+          f"Resumen: {os.path.join(args.salida, 'resumen.csv')}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# Métricas de rendimiento: cuánto tarda cada sección caliente (parseo, Kw/API,
+# cortes, gráficos, PDF) y cuánta memoria usa el proceso.
+#
+#   with medir("parseo_csv"):
+#       df = leer_curva(datos)
+#
+# Cada medición va al histograma global del proceso (REGISTRO) y, si la app
+# instaló `fuente_sesion`, también al registro de la sesión que la generó. Los
+# histogramas tienen buckets fijos, así que medir cuesta un par de lecturas del
+# reloj y un incremento; sin panel de métricas no se guarda nada por sesión.
+
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+import pandas as pd
+
+# Límites superiores de los buckets [s], como los de un histograma de Prometheus
+BUCKETS_S = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Función sin argumentos que devuelve el `Registro` de la sesión actual o None
+fuente_sesion = None
+
+
+class Histograma:
+    """Cantidad, suma, mínimo, máximo y conteo por bucket de las duraciones observadas."""
+
+    __slots__ = ("cantidad", "suma", "minimo", "maximo", "buckets")
+
+    def __init__(self):
+        self.cantidad = 0
+        self.suma = 0.0
+        self.minimo = float("inf")
+        self.maximo = 0.0
+        self.buckets = [0] * (len(BUCKETS_S) + 1)
+
+    def observar(self, segundos):
+        self.cantidad += 1
+        self.suma += segundos
+        self.minimo = min(self.minimo, segundos)
+        self.maximo = max(self.maximo, segundos)
+        self.buckets[bisect_left(BUCKETS_S, segundos)] += 1
+
+    def cuantil(self, q):
+        """Cuantil aproximado: límite superior del bucket que lo contiene (acotado por el máximo)."""
+        if not self.cantidad:
+            return 0.0
+        objetivo, acumulado = q * self.cantidad, 0
+        for limite, n in zip(BUCKETS_S, self.buckets):
+            acumulado += n
+            if acumulado >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+class Registro:
+    """Histogramas de duración por sección, seguros entre hilos."""
+
+    def __init__(self):
+        self.histogramas = {}
+        self.desde = time.time()
+        self._lock = threading.Lock()
+
+    def observar(self, nombre, segundos):
+        with self._lock:
+            histograma = self.histogramas.get(nombre)
+            if histograma is None:
+                histograma = self.histogramas[nombre] = Histograma()
+            histograma.observar(segundos)
+
+    def limpiar(self):
+        with self._lock:
+            self.histogramas.clear()
+            self.desde = time.time()
+
+    def resumen(self):
+        """Una fila por sección: cantidad, total, media, p50/p95 aproximados y máximo [ms]."""
+        with self._lock:
+            filas = [
+                {"Sección": nombre, "Llamadas": h.cantidad, "Total [ms]": 1e3 * h.suma,
+                 "Media [ms]": 1e3 * h.suma / h.cantidad, "p50 [ms]": 1e3 * h.cuantil(0.5),
+                 "p95 [ms]": 1e3 * h.cuantil(0.95), "Máx [ms]": 1e3 * h.maximo}
+                for nombre, h in self.histogramas.items()
+            ]
+        df = pd.DataFrame(filas, columns=["Sección", "Llamadas", "Total [ms]", "Media [ms]", "p50 [ms]",
+                                          "p95 [ms]", "Máx [ms]"])
+        return df.sort_values("Total [ms]", ascending=False, ignore_index=True).round(3)
+
+    def a_dict(self):
+        with self._lock:
+            secciones = {
+                nombre: {"cantidad": h.cantidad, "suma_s": h.suma, "min_s": h.minimo, "max_s": h.maximo,
+                         "buckets": dict(zip([*map(str, BUCKETS_S), "+Inf"], h.buckets))}
+                for nombre, h in self.histogramas.items()
+            }
+        return {"desde": self.desde, "fecha": time.time(), "memoria": memoria(), "secciones": secciones}
+
+    def a_json(self):
+        return json.dumps(self.a_dict(), indent=2, ensure_ascii=False)
+
+    def a_prometheus(self, prefijo="crude_analyzer"):
+        """Texto en el formato de exposición de Prometheus (para el textfile collector)."""
+        lineas = [
+            f"# HELP {prefijo}_seccion_segundos Duración de las secciones instrumentadas.",
+            f"# TYPE {prefijo}_seccion_segundos histogram",
+        ]
+        with self._lock:
+            for nombre, h in sorted(self.histogramas.items()):
+                acumulado = 0
+                for limite, n in zip([*map(str, BUCKETS_S), "+Inf"], h.buckets):
+                    acumulado += n
+                    lineas.append(f'{prefijo}_seccion_segundos_bucket{{seccion="{nombre}",le="{limite}"}} {acumulado}')
+                lineas.append(f'{prefijo}_seccion_segundos_sum{{seccion="{nombre}"}} {h.suma:.9f}')
+                lineas.append(f'{prefijo}_seccion_segundos_count{{seccion="{nombre}"}} {h.cantidad}')
+        for nombre, valor in memoria().items():
+            lineas.append(f"# TYPE {prefijo}_memoria_{nombre} gauge")
+            lineas.append(f"{prefijo}_memoria_{nombre} {valor}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, ruta):
+        """Escribe el registro en `ruta` (Prometheus si termina en .prom, si no JSON), de forma atómica."""
+        texto = self.a_prometheus() if ruta.endswith(".prom") else self.a_json()
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix=".metricas-")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                f.write(texto)
+            os.replace(temporal, ruta)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+
+# Registro global del proceso (todas las sesiones)
+REGISTRO = Registro()
+
+
+class _Medicion:
+    # Context manager a mano: cuesta bastante menos que uno con @contextmanager
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *excepcion):
+        segundos = time.perf_counter() - self.inicio
+        REGISTRO.observar(self.nombre, segundos)
+        if fuente_sesion is not None:
+            sesion = fuente_sesion()
+            if sesion is not None:
+                sesion.observar(self.nombre, segundos)
+
+
+def medir(nombre):
+    """Mide el bloque `with` y lo registra como `nombre` en el registro global y en el de la sesión."""
+    return _Medicion(nombre)
+
+
+def memoria():
+    """Memoria residente actual y pico del proceso, en bytes."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB en Linux
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        rss = pico
+    return {"rss_bytes": rss, "pico_bytes": pico}
+
+
+_ultima_exportacion = 0.0
+
+
+def exportar_periodico(ruta, cada_s=15.0):
+    """Exporta REGISTRO a `ruta` si pasaron al menos `cada_s` segundos desde la última vez."""
+    global _ultima_exportacion
+    ahora = time.monotonic()
+    if ahora - _ultima_exportacion < cada_s:
+        return False
+    _ultima_exportacion = ahora
+    REGISTRO.exportar(ruta)
+    return True
@@ -0,0 +1,129 @@
+# Mezclas de crudos: curva TBP, densidad, API y Kw de la mezcla y búsqueda de
+# proporciones que maximizan el ingreso bajo restricciones.
+#
+# La curva acumulada de una mezcla en volumen es la combinación lineal de las
+# curvas de sus componentes, así que el volumen de cada corte de la mezcla es
+# X @ cortes_por_componente. Con los vectores de corte precalculados, evaluar
+# decenas de miles de mezclas candidatas son un par de productos matriciales.
+
+import numpy as np
+import pandas as pd
+
+from .calculos import CORTES, FRACCIONES, grados_api, tipo_crudo, vector_precios, watson_kw
+from .curvas import CurvaTBP
+
+
+class Componentes:
+    """Crudos disponibles para mezclar, con sus vectores de corte precalculados."""
+
+    def __init__(self, nombres, curvas, densidades, temps_k):
+        self.nombres = list(nombres)
+        self.curvas = list(curvas)
+        self.densidades = np.asarray(densidades, dtype=float)
+        self.temps_k = np.asarray(temps_k, dtype=float)
+        self.fracciones = np.array([c.rendimientos(FRACCIONES) for c in self.curvas])
+        self.cortes = np.array([c.rendimientos(CORTES) for c in self.curvas])
+
+    def __len__(self):
+        return len(self.curvas)
+
+
+def normalizar(proporciones):
+    """Lleva proporciones (m,) o (c, m) a fracciones en volumen que suman 1 por fila."""
+    x = np.asarray(proporciones, dtype=float)
+    return x / x.sum(axis=-1, keepdims=True)
+
+
+def curva_mezcla(curvas, proporciones):
+    """Curva TBP de la mezcla sobre la unión de las temperaturas de los componentes."""
+    x = normalizar(proporciones)
+    temperaturas = np.unique(np.concatenate([c.temperaturas for c in curvas]))
+    volumenes = sum(xi * c.volumen_acumulado(temperaturas) for xi, c in zip(x, curvas))
+    return CurvaTBP(temperaturas, volumenes)
+
+
+def evaluar_mezclas(componentes, proporciones, precios):
+    """Propiedades, cortes e ingreso de una o varias mezclas candidatas.
+
+    `proporciones` es (m,) o (c, m). Devuelve un dict de arrays con la primera
+    dimensión igual a la cantidad de candidatos.
+    """
+    x = np.atleast_2d(normalizar(proporciones))
+    densidad = x @ componentes.densidades
+    fracciones = x @ componentes.fracciones
+    cortes = x @ componentes.cortes
+    return {
+        "proporciones": x,
+        "densidad": densidad,
+        "api": grados_api(densidad),
+        "kw": watson_kw(x @ componentes.temps_k, densidad),
+        "fracciones": fracciones,
+        "cortes": cortes,
+        "residuo": cortes[:, -1],
+        "ingreso": fracciones @ vector_precios(precios) / 100,
+    }
+
+
+def _factibles(resultado, api_min, residuo_max, minimos, maximos):
+    ok = np.ones(len(resultado["ingreso"]), dtype=bool)
+    if api_min is not None:
+        ok &= resultado["api"] >= api_min
+    if residuo_max is not None:
+        ok &= resultado["residuo"] <= residuo_max
+    x = resultado["proporciones"]
+    if minimos is not None:
+        ok &= (x >= np.asarray(minimos) - 1e-12).all(axis=1)
+    if maximos is not None:
+        ok &= (x <= np.asarray(maximos) + 1e-12).all(axis=1)
+    return ok
+
+
+def optimizar_mezcla(componentes, precios, api_min=None, residuo_max=None, minimos=None, maximos=None,
+                     candidatos=50_000, rondas=4, concentracion=200.0, semilla=None):
+    """Busca las proporciones de máximo ingreso que cumplen las restricciones.
+
+    Primero se muestrean `candidatos` mezclas uniformes en el simplex
+    (Dirichlet(1)) y luego, en cada ronda, se vuelven a muestrear alrededor de
+    la mejor mezcla factible con una Dirichlet cada vez más concentrada.
+    `minimos` / `maximos` acotan la fracción en volumen de cada componente.
+    Devuelve (resultado de la mejor mezcla o None, total de candidatos evaluados).
+    """
+    rng = np.random.default_rng(semilla)
+    m = len(componentes)
+    mejor, mejor_ingreso, evaluados = None, -np.inf, 0
+
+    centro = None
+    for ronda in range(rondas + 1):
+        if centro is None:
+            x = rng.dirichlet(np.ones(m), size=candidatos)
+        else:
+            x = rng.dirichlet(centro * concentracion * 2 ** ronda + 1e-3, size=candidatos)
+        resultado = evaluar_mezclas(componentes, x, precios)
+        evaluados += candidatos
+        ok = _factibles(resultado, api_min, residuo_max, minimos, maximos)
+        if ok.any():
+            i = np.flatnonzero(ok)[np.argmax(resultado["ingreso"][ok])]
+            if resultado["ingreso"][i] > mejor_ingreso:
+                mejor_ingreso = resultado["ingreso"][i]
+                mejor = {k: v[i] for k, v in resultado.items()}
+        if mejor is not None:
+            centro = mejor["proporciones"]
+    return mejor, evaluados
+
+
+def tabla_mezcla(componentes, resultado):
+    """Resumen de una mezcla (resultado de `evaluar_mezclas` para un candidato) como DataFrame."""
+    x = np.ravel(resultado["proporciones"])
+    return pd.DataFrame({"Crudo": componentes.nombres, "Fracción en volumen [%]": np.round(100 * x, 2)})
+
+
+def propiedades_mezcla(resultado):
+    """Densidad, API, Kw, clasificación e ingreso de una mezcla como dict de escalares."""
+    api = float(np.ravel(resultado["api"])[0])
+    return {
+        "densidad": round(float(np.ravel(resultado["densidad"])[0]), 1),
+        "api": round(api, 1),
+        "kw": round(float(np.ravel(resultado["kw"])[0]), 3),
+        "tipo": tipo_crudo(api),
+        "ingreso": round(float(np.ravel(resultado["ingreso"])[0]), 2),
+    }
@@ -0,0 +1,397 @@
+# Servicio HTTP local con los cálculos del analizador, sin Streamlit.
+#
+#   python -m crude_analyzer_pro.servicio --puerto 8750 --workers 2
+#
+#   GET  /salud                  estado y versión
+#   GET  /metricas               histogramas de las secciones (formato Prometheus)
+#   POST /analisis               Kw, API, clasificación, fracciones, cortes e ingresos de una curva
+#   POST /lote/analisis          lo mismo para muchas curvas, en una sola pasada vectorizada
+#   POST /informes               encola un informe PDF; con ?esperar=1 responde el PDF
+#   POST /lote/informes          encola un informe por ensayo
+#   GET  /informes/<clave>       el PDF si está listo (200), el progreso (202) o el error
+#
+# Una curva se manda como JSON ({"temperaturas": [...], "volumenes": [...],
+# "densidad": 850, ...}) o como CSV con columnas 'Temperatura' y 'Volumen' y
+# las propiedades en la query (?densidad=850&temp_k=673.15&tipo_curva=ASTM%20D86).
+# Los cálculos numéricos corren en el hilo de cada pedido; los gráficos y el
+# PDF, en el pool de procesos de `ColaInformes`. Sólo escucha en localhost por
+# defecto y no depende de ningún servicio externo.
+
+import argparse
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from . import __version__
+from .cache import cargar_tbp
+from .calculos import (
+    CORTES, FRACCIONES, PRECIOS_DEFECTO, analizar_lote, apilar_curvas, tabla_ingresos, tabla_rendimiento,
+    vector_precios,
+)
+from .caracterizacion import KELVIN, vabp
+from .conversion import TBP, TIPOS_CURVA, convertir_a_tbp
+from .metricas import REGISTRO, medir
+from .trabajos import ERROR, LISTO, ColaInformes
+
+PUERTO_DEFECTO = 8750
+MAX_BYTES = 64 * 1024 ** 2
+MAX_ESPERA_S = 120
+
+
+class ErrorPedido(Exception):
+    """Pedido inválido: se responde con `estado` y el mensaje como JSON."""
+
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _numero(valor, nombre, defecto=None, positivo=False):
+    if valor is None or valor == "":
+        if defecto is None:
+            raise ErrorPedido(f"Falta '{nombre}'")
+        return defecto
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ErrorPedido(f"'{nombre}' tiene que ser un número") from None
+    if not np.isfinite(numero):
+        raise ErrorPedido(f"'{nombre}' tiene que ser un número finito")
+    if positivo and numero <= 0:
+        raise ErrorPedido(f"'{nombre}' tiene que ser mayor que 0")
+    return numero
+
+
+def _tipo_curva(tipo):
+    if tipo not in TIPOS_CURVA:
+        raise ErrorPedido(f"'tipo_curva' tiene que ser uno de: {', '.join(TIPOS_CURVA)}")
+    return tipo
+
+
+def _precios(precios):
+    # Las fracciones que no vienen en el pedido usan el precio por defecto
+    if precios is None:
+        return dict(PRECIOS_DEFECTO)
+    if isinstance(precios, dict):
+        desconocidas = sorted(map(str, set(precios) - set(FRACCIONES)))
+        if desconocidas:
+            raise ErrorPedido(f"Fracciones desconocidas en 'precios': {', '.join(desconocidas)}")
+        return {**PRECIOS_DEFECTO, **{fr: _numero(p, f"precios.{fr}") for fr, p in precios.items()}}
+    if not isinstance(precios, list) or len(precios) != len(FRACCIONES):
+        raise ErrorPedido(f"'precios' tiene que ser un objeto por fracción o una lista de {len(FRACCIONES)} números")
+    return [_numero(p, f"precios[{i}]") for i, p in enumerate(precios)]
+
+
+def leer_ensayo(datos):
+    """Ensayo de un dict JSON: (temperaturas, volúmenes TBP, densidad, temp_k o None, tipo de curva)."""
+    if "temperaturas" not in datos or "volumenes" not in datos:
+        raise ErrorPedido("Cada ensayo necesita 'temperaturas' y 'volumenes'")
+    try:
+        temperaturas = np.asarray(datos["temperaturas"], dtype=float)
+        volumenes = np.asarray(datos["volumenes"], dtype=float)
+    except (TypeError, ValueError):
+        raise ErrorPedido("'temperaturas' y 'volumenes' tienen que ser listas de números") from None
+    if temperaturas.ndim != 1 or temperaturas.shape != volumenes.shape or len(temperaturas) < 2:
+        raise ErrorPedido("'temperaturas' y 'volumenes' tienen que ser listas del mismo largo (2 o más)")
+    tipo = _tipo_curva(datos.get("tipo_curva", TBP))
+    try:
+        temperaturas, volumenes = convertir_a_tbp(temperaturas, volumenes, tipo)
+    except ValueError as e:
+        raise ErrorPedido(str(e)) from None
+    if len(temperaturas) < 2:
+        raise ErrorPedido(f"La curva {tipo} no cubre los puntos necesarios para convertirla a TBP.")
+    temp_k = datos.get("temp_k")
+    return (temperaturas, volumenes, _numero(datos.get("densidad"), "densidad", positivo=True),
+            None if temp_k is None else _numero(temp_k, "temp_k", positivo=True), tipo)
+
+
+def leer_csv(cuerpo, parametros):
+    """Ensayo de un CSV con las propiedades en la query, con la misma tupla que `leer_ensayo`."""
+    tipo = _tipo_curva(parametros.get("tipo_curva", TBP))
+    try:
+        archivo = cargar_tbp(cuerpo, _numero(parametros.get("resolucion"), "resolucion", 0) or None, tipo)
+    except ValueError as e:
+        raise ErrorPedido(str(e)) from None
+    temp_k = parametros.get("temp_k")
+    return (archivo.curva.temperaturas, archivo.curva.volumenes,
+            _numero(parametros.get("densidad"), "densidad", positivo=True),
+            None if temp_k is None else _numero(temp_k, "temp_k", positivo=True), tipo)
+
+
+def analizar(ensayos, precios=None):
+    """Análisis de una lista de ensayos (tuplas de `leer_ensayo`) en una sola pasada: lista de dicts."""
+    precios = vector_precios(_precios(precios))
+    temperaturas, volumenes = apilar_curvas([(t, v) for t, v, *_ in ensayos])
+    densidades = np.array([e[2] for e in ensayos])
+    # Sin temperatura media, la del VABP de la curva (como en la app)
+    temps_k = np.array([e[3] if e[3] is not None else np.nan for e in ensayos])
+    faltantes = np.isnan(temps_k)
+    if faltantes.any():
+        temps_k[faltantes] = np.round(vabp(temperaturas[faltantes], volumenes[faltantes]) + KELVIN, 2)
+    with medir("servicio_analisis"):
+        r = analizar_lote(densidades, temps_k, temperaturas, volumenes)
+    ingresos = r["fracciones"] * precios / 100
+    return [
+        {
+            "kw": round(float(r["kw"][i]), 3),
+            "api": round(float(r["api"][i]), 1),
+            "tipo": str(r["tipo"][i]),
+            "temp_k": float(temps_k[i]),
+            "tipo_curva": ensayos[i][4],
+            "fracciones": dict(zip(FRACCIONES, r["fracciones"][i].round(4).tolist())),
+            "cortes": dict(zip(CORTES, r["cortes"][i].round(4).tolist())),
+            "ingresos": dict(zip(FRACCIONES, ingresos[i].round(4).tolist())),
+            "ingreso_total": round(float(ingresos[i].sum()), 4),
+        }
+        for i in range(len(ensayos))
+    ]
+
+
+def solicitud_informe(ensayo, resultado, precios=None, pona=None, anexo_tbp=False):
+    """Solicitud para `ColaInformes` con el mismo contenido que la pestaña "Informe PDF"."""
+    temperaturas, volumenes = ensayo[0], ensayo[1]
+    if pona is None:
+        pona = {}
+    if not isinstance(pona, dict):
+        raise ErrorPedido("'pona' tiene que ser un objeto con el % de cada grupo")
+    pona = {str(grupo): _numero(valor, f"pona.{grupo}") for grupo, valor in pona.items()}
+    fracciones = np.array(list(resultado["fracciones"].values()))
+    solicitud = {
+        "kw": resultado["kw"], "api": resultado["api"], "tipo": resultado["tipo"], "pona": pona,
+        "anexos": {},
+        "ingresos": tabla_ingresos(fracciones, _precios(precios)),
+        "rendimiento": tabla_rendimiento(np.array(list(resultado["cortes"].values()))),
+        "temperaturas": temperaturas, "volumenes": volumenes,
+    }
+    if anexo_tbp:
+        solicitud["anexos"]["Anexo: Curva TBP"] = pd.DataFrame({"Temperatura [°C]": temperaturas,
+                                                                "Volumen destilado [%]": volumenes})
+    return solicitud
+
+
+def estado_trabajo(trabajo):
+    return {"clave": trabajo.clave, "estado": trabajo.estado, "etapa": trabajo.etapa,
+            "progreso": round(trabajo.progreso, 3), "error": trabajo.error or None,
+            "url": f"/informes/{trabajo.clave}"}
+
+
+# (método, ruta) -> sección de las métricas; cualquier otra ruta cuenta como "desconocida",
+# así una ruta inventada no crea un histograma nuevo
+SECCIONES = {
+    ("GET", "/salud"): "salud",
+    ("GET", "/metricas"): "metricas",
+    ("POST", "/analisis"): "analisis",
+    ("POST", "/lote/analisis"): "lote_analisis",
+    ("POST", "/informes"): "informes",
+    ("POST", "/lote/informes"): "lote_informes",
+}
+
+
+def _seccion(metodo, ruta):
+    if metodo == "GET" and ruta.startswith("/informes/"):
+        nombre = "informe"
+    else:
+        nombre = SECCIONES.get((metodo, ruta), "desconocida")
+    return f"http_{metodo.lower()}_{nombre}"
+
+
+class Manejador(BaseHTTPRequestHandler):
+    """Rutas del servicio; `self.server.cola` es la `ColaInformes` compartida."""
+
+    protocol_version = "HTTP/1.1"  # conexiones persistentes: los clientes no reconectan en cada pedido
+    disable_nagle_algorithm = True  # encabezados y cuerpo salen en dos escrituras; sin esto cada respuesta espera ~40 ms
+    server_version = f"CrudeAnalyzer/{__version__}"
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    # --- Respuestas ---
+    def _responder(self, estado, cuerpo, tipo, encabezados=None):
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for nombre, valor in (encabezados or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _json(self, estado, datos):
+        self._responder(estado, json.dumps(datos, ensure_ascii=False, allow_nan=False).encode("utf-8"),
+                        "application/json; charset=utf-8")
+
+    def _pdf(self, trabajo):
+        self._responder(200, trabajo.pdf, "application/pdf",
+                        {"Content-Disposition": f'attachment; filename="informe_{trabajo.clave}.pdf"'})
+
+    # --- Pedido ---
+    def _leer_cuerpo(self):
+        largo = int(self.headers.get("Content-Length") or 0)
+        if largo > MAX_BYTES:
+            # No se lee el cuerpo: la conexión no se puede reutilizar
+            self.close_connection = True
+            raise ErrorPedido(f"El cuerpo supera los {MAX_BYTES // 1024 ** 2} MiB", 413)
+        return self.rfile.read(largo)
+
+    def _es_csv(self):
+        return self.headers.get("Content-Type", "").split(";")[0].strip() in ("text/csv", "application/csv")
+
+    def _json_cuerpo(self, cuerpo):
+        try:
+            datos = json.loads(cuerpo or b"{}")
+        except ValueError:
+            raise ErrorPedido("El cuerpo no es JSON válido") from None
+        if not isinstance(datos, dict):
+            raise ErrorPedido("El cuerpo tiene que ser un objeto JSON")
+        return datos
+
+    def _despachar(self, metodo):
+        partes = urlsplit(self.path)
+        ruta = partes.path.rstrip("/") or "/"
+        parametros = dict(parse_qsl(partes.query))
+        inicio = time.perf_counter()
+        try:
+            # El cuerpo se lee siempre, aunque la ruta no exista, para dejar libre la conexión
+            self.cuerpo = self._leer_cuerpo() if metodo == "POST" else b""
+            if metodo == "GET" and ruta == "/salud":
+                self._json(200, {"estado": "ok", "version": __version__})
+            elif metodo == "GET" and ruta == "/metricas":
+                self._responder(200, REGISTRO.a_prometheus().encode(), "text/plain; version=0.0.4")
+            elif metodo == "GET" and ruta.startswith("/informes/"):
+                self._get_informe(ruta.rsplit("/", 1)[1])
+            elif metodo == "POST" and ruta == "/analisis":
+                self._post_analisis(parametros)
+            elif metodo == "POST" and ruta == "/lote/analisis":
+                self._post_lote_analisis()
+            elif metodo == "POST" and ruta == "/informes":
+                self._post_informe(parametros)
+            elif metodo == "POST" and ruta == "/lote/informes":
+                self._post_lote_informes()
+            else:
+                raise ErrorPedido(f"No existe {metodo} {ruta}", 404)
+        except ErrorPedido as e:
+            self._json(e.estado, {"error": str(e)})
+        except Exception as e:
+            self._json(500, {"error": f"{type(e).__name__}: {e}"})
+        REGISTRO.observar(_seccion(metodo, ruta), time.perf_counter() - inicio)
+
+    def do_GET(self):
+        self._despachar("GET")
+
+    def do_POST(self):
+        self._despachar("POST")
+
+    # --- Rutas ---
+    def _ensayo_y_opciones(self, parametros):
+        if self._es_csv():
+            ensayo, opciones = leer_csv(self.cuerpo, parametros), dict(parametros)
+        else:
+            datos = self._json_cuerpo(self.cuerpo)
+            # Las opciones pueden venir en el cuerpo o en la query
+            ensayo, opciones = leer_ensayo(datos), {**parametros, **datos}
+        # Los precios se validan antes de calcular: un precio inválido es un 400, no un 500
+        opciones["precios"] = _precios(opciones.get("precios"))
+        return ensayo, opciones
+
+    def _post_analisis(self, parametros):
+        ensayo, opciones = self._ensayo_y_opciones(parametros)
+        self._json(200, analizar([ensayo], opciones.get("precios"))[0])
+
+    def _lote(self):
+        datos = self._json_cuerpo(self.cuerpo)
+        ensayos = datos.get("ensayos")
+        if not isinstance(ensayos, list) or not ensayos:
+            raise ErrorPedido("El lote necesita una lista 'ensayos' no vacía")
+        if not all(isinstance(e, dict) for e in ensayos):
+            raise ErrorPedido("Cada ensayo del lote tiene que ser un objeto JSON")
+        datos["precios"] = _precios(datos.get("precios"))
+        return datos, [leer_ensayo(e) for e in ensayos]
+
+    def _post_lote_analisis(self):
+        datos, ensayos = self._lote()
+        self._json(200, {"resultados": analizar(ensayos, datos.get("precios"))})
+
+    def _post_informe(self, parametros):
+        ensayo, opciones = self._ensayo_y_opciones(parametros)
+        precios = opciones.get("precios")
+        resultado = analizar([ensayo], precios)[0]
+        clave = self.server.cola.enviar(solicitud_informe(ensayo, resultado, precios, opciones.get("pona"),
+                                                          str(opciones.get("anexo_tbp", "")).lower() in ("1", "true")))
+        if str(opciones.get("esperar", "")).lower() in ("1", "true"):
+            limite = time.monotonic() + MAX_ESPERA_S
+            trabajo = self.server.cola.estado(clave)
+            while trabajo is not None and not trabajo.finalizado and time.monotonic() < limite:
+                time.sleep(0.02)
+                trabajo = self.server.cola.estado(clave)
+            return self._get_informe(clave)
+        self._json(202, estado_trabajo(self.server.cola.estado(clave)))
+
+    def _post_lote_informes(self):
+        datos, ensayos = self._lote()
+        precios = datos.get("precios")
+        resultados = analizar(ensayos, precios)
+        # Todas las solicitudes se validan antes de encolar la primera
+        solicitudes = [solicitud_informe(ensayo, resultado, precios, original.get("pona"),
+                                         bool(original.get("anexo_tbp")))
+                       for ensayo, resultado, original in zip(ensayos, resultados, datos["ensayos"])]
+        trabajos = []
+        for solicitud in solicitudes:
+            clave = self.server.cola.enviar(solicitud)
+            trabajos.append(estado_trabajo(self.server.cola.estado(clave)))
+        self._json(202, {"trabajos": trabajos})
+
+    def _get_informe(self, clave):
+        trabajo = self.server.cola.estado(clave)
+        if trabajo is None:
+            raise ErrorPedido(f"No existe el informe {clave} (o ya venció)", 404)
+        if trabajo.estado == LISTO:
+            self._pdf(trabajo)
+        elif trabajo.estado == ERROR:
+            self._json(500, estado_trabajo(trabajo))
+        else:
+            self._json(202, estado_trabajo(trabajo))
+
+
+class Servicio(ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexión y la cola de informes compartida."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, direccion=("127.0.0.1", PUERTO_DEFECTO), workers=2, procesos=True, verboso=False):
+        super().__init__(direccion, Manejador)
+        self.cola = ColaInformes(workers=workers, procesos=procesos)
+        self.verboso = verboso
+
+    def server_close(self):
+        super().server_close()
+        self.cola.cerrar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m crude_analyzer_pro.servicio",
+                                     description="Servicio HTTP local con el análisis de crudos y los informes PDF.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar (default: 127.0.0.1)")
+    parser.add_argument("-p", "--puerto", type=int, default=PUERTO_DEFECTO, help=f"Puerto (default: {PUERTO_DEFECTO})")
+    parser.add_argument("-j", "--workers", type=int, default=2, help="Procesos para gráficos y PDF (default: 2)")
+    parser.add_argument("-v", "--verboso", action="store_true", help="Registrar cada pedido en stderr")
+    args = parser.parse_args(argv)
+
+    servicio = Servicio((args.host, args.puerto), workers=args.workers, verboso=args.verboso)
+    print(f"Servicio en http://{args.host}:{servicio.server_port} (Ctrl+C para terminar)", file=sys.stderr)
+    try:
+        servicio.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# Estado por sesión: curvas compactas y presupuesto de memoria.
+#
+# Cada sesión de la app guarda su ensayo activo y sus resultados en
+# st.session_state, que vive mientras la sesión esté abierta. Para que un
+# servidor con muchas sesiones no crezca sin límite:
+#   - la curva activa se guarda como un único array (2, n) de sólo lectura
+#     (temperaturas y volúmenes), no como un DataFrame;
+#   - `PresupuestoSesion` estima lo que ocupa el estado de la sesión y, si pasa
+#     del máximo, descarta los objetos grandes que se pueden volver a calcular
+#     (p. ej. el backtest), empezando por los que se usaron hace más tiempo.
+#
+# El máximo se configura con CRUDE_MEMORIA_SESION_MB.
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+MAX_BYTES_DEFECTO = int(float(os.environ.get("CRUDE_MEMORIA_SESION_MB", "128")) * 1024 ** 2)
+CLAVE_USOS = "_usos_memoria"
+
+
+def curva_compacta(temperaturas, volumenes):
+    """Temperaturas y volúmenes en un array (2, n) contiguo y de sólo lectura (se desarma con `t, v = curva`)."""
+    temperaturas = np.asarray(temperaturas)
+    volumenes = np.asarray(volumenes)
+    curva = np.empty((2, len(temperaturas)), dtype=np.result_type(temperaturas, volumenes))
+    curva[0], curva[1] = temperaturas, volumenes
+    curva.setflags(write=False)
+    return curva
+
+
+def tamano(objeto, _vistos=None):
+    """Bytes aproximados de `objeto` y de todo lo que referencia (arrays, tablas, contenedores, atributos).
+
+    Un objeto alcanzable por varios caminos se cuenta una sola vez.
+    """
+    vistos = set() if _vistos is None else _vistos
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+
+    if isinstance(objeto, (pd.DataFrame, pd.Series, pd.Index)):
+        uso = objeto.memory_usage(deep=True)
+        return int(uso.sum() if isinstance(objeto, pd.DataFrame) else uso)
+    total = sys.getsizeof(objeto)
+    if isinstance(objeto, np.ndarray):
+        # Una vista no es dueña de sus datos: se cuenta el array base
+        return total + (tamano(objeto.base, vistos) if objeto.base is not None else 0)
+    if isinstance(objeto, (str, bytes, bytearray, int, float, bool, type(None))):
+        return total
+    if isinstance(objeto, dict):
+        return total + sum(tamano(k, vistos) + tamano(v, vistos) for k, v in objeto.items())
+    if isinstance(objeto, (list, tuple, set, frozenset)):
+        return total + sum(tamano(v, vistos) for v in objeto)
+    if hasattr(objeto, "__dict__"):
+        total += tamano(vars(objeto), vistos)
+    for atributo in getattr(type(objeto), "__slots__", ()):
+        total += tamano(getattr(objeto, atributo, None), vistos)
+    return total
+
+
+class PresupuestoSesion:
+    """Tope de memoria para el estado de una sesión.
+
+    `desalojables` es un dict clave -> valor por defecto con las entradas que
+    se pueden descartar (volviendo al valor por defecto) porque la pestaña que
+    las usa sabe recalcularlas. Las fechas de uso se guardan en el mismo estado.
+    """
+
+    def __init__(self, desalojables, max_bytes=MAX_BYTES_DEFECTO):
+        self.desalojables = dict(desalojables)
+        self.max_bytes = max_bytes
+
+    def usar(self, estado, clave):
+        """Marca `clave` como usada ahora (las menos usadas se desalojan primero)."""
+        estado.setdefault(CLAVE_USOS, {})[clave] = time.monotonic()
+
+    def tamanos(self, estado):
+        """Bytes estimados de cada entrada del estado."""
+        return {clave: tamano(estado[clave]) for clave in list(estado.keys()) if clave != CLAVE_USOS}
+
+    def aplicar(self, estado):
+        """Desaloja entradas hasta que el estado entre en el presupuesto; devuelve las claves desalojadas."""
+        tamanos = self.tamanos(estado)
+        total = sum(tamanos.values())
+        if total <= self.max_bytes:
+            return []
+        usos = estado.get(CLAVE_USOS, {})
+        candidatas = sorted(
+            (c for c, defecto in self.desalojables.items()
+             if c in tamanos and estado[c] is not defecto and tamanos[c] > tamano(defecto)),
+            key=lambda c: usos.get(c, 0.0),
+        )
+        desalojadas = []
+        for clave in candidatas:
+            if total <= self.max_bytes:
+                break
+            total -= tamanos[clave] - tamano(self.desalojables[clave])
+            estado[clave] = self.desalojables[clave]
+            usos.pop(clave, None)
+            desalojadas.append(clave)
+        return desalojadas
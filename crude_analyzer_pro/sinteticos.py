@@ -0,0 +1,51 @@
+# Datos sintéticos para pruebas de rendimiento y demostraciones: curvas TBP y
+# composiciones PONA con la misma forma que los archivos que sube la app.
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+
+def curva_tbp(puntos, semilla=None, t_inicial=None, t_final=None):
+    """Curva TBP sintética de `puntos` filas: (temperaturas [°C], volumen acumulado [%]).
+
+    El volumen sigue una Weibull acumulada con forma y escala aleatorias, más un
+    ruido chico que no rompe la monotonía, como una destilación simulada.
+    """
+    rng = np.random.default_rng(semilla)
+    t_inicial = rng.uniform(15, 60) if t_inicial is None else t_inicial
+    t_final = rng.uniform(550, 750) if t_final is None else t_final
+    temperaturas = np.linspace(t_inicial, t_final, puntos)
+    escala = rng.uniform(0.3, 0.6) * (t_final - t_inicial)
+    forma = rng.uniform(1.2, 2.5)
+    x = (temperaturas - t_inicial) / escala
+    volumenes = 100 * (1 - np.exp(-x ** forma)) * rng.uniform(0.92, 1.0)
+    volumenes = np.maximum.accumulate(volumenes + rng.normal(0, 0.02, puntos))
+    return temperaturas, np.clip(volumenes, 0, 100)
+
+
+def csv_tbp(puntos, semilla=None, columnas_extra=0):
+    """Bytes de un CSV 'Temperatura', 'Volumen' (y `columnas_extra` columnas de relleno)."""
+    temperaturas, volumenes = curva_tbp(puntos, semilla)
+    df = pd.DataFrame({"Temperatura": temperaturas, "Volumen": volumenes})
+    rng = np.random.default_rng(semilla)
+    for i in range(columnas_extra):
+        df[f"Canal_{i + 1}"] = rng.normal(size=puntos)
+    return df.to_csv(index=False, float_format="%.6g").encode()
+
+
+def pona(semilla=None):
+    """Composición PONA entera que suma 100: (parafínicos, olefínicos, nafténicos, aromáticos)."""
+    rng = np.random.default_rng(semilla)
+    partes = np.floor(rng.dirichlet([6, 1, 3, 2]) * 100).astype(int)
+    partes[0] += 100 - partes.sum()
+    return tuple(int(p) for p in partes)
+
+
+def csv_pona(semilla=None):
+    """Bytes de un CSV de composición PONA de una fila."""
+    buffer = BytesIO()
+    pd.DataFrame([pona(semilla)], columns=["Parafínicos", "Olefínicos", "Nafténicos", "Aromáticos"]).to_csv(
+        buffer, index=False)
+    return buffer.getvalue()
@@ -0,0 +1,189 @@
+# Cola de informes PDF en segundo plano.
+# Cada informe es un trabajo identificado por el hash de sus datos de entrada:
+# pedir dos veces el mismo informe devuelve el mismo trabajo. Las etapas pesadas
+# (gráficos y PDF) corren en un pool de procesos; un hilo coordinador por
+# trabajo las encadena y actualiza el progreso, y los PDF terminados quedan
+# disponibles hasta que vencen. Los PDF también se guardan en la caché en
+# disco: el mismo informe pedido desde otro proceso el mismo día sale de ahí
+# (el PDF lleva la fecha, así que al día siguiente se vuelve a generar).
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .cache import hash_contenido
+from .cache_disco import CACHE_DISCO
+
+EN_COLA = "en cola"
+EN_CURSO = "en curso"
+LISTO = "listo"
+ERROR = "error"
+
+VENCIMIENTO_S = 30 * 60
+
+
+class Trabajo:
+    """Estado de un informe: etapa, progreso (0 a 1), PDF o mensaje de error."""
+
+    __slots__ = ("clave", "estado", "etapa", "progreso", "creado", "terminado", "pdf", "error")
+
+    def __init__(self, clave):
+        self.clave = clave
+        self.estado = EN_COLA
+        self.etapa = "En cola"
+        self.progreso = 0.0
+        self.creado = time.time()
+        self.terminado = None
+        self.pdf = None
+        self.error = ""
+
+    @property
+    def finalizado(self):
+        return self.estado in (LISTO, ERROR)
+
+
+def _bytes_clave(valor):
+    if isinstance(valor, pd.DataFrame):
+        return (repr(list(valor.columns)).encode()
+                + pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    if isinstance(valor, (pd.Series, np.ndarray)):
+        return np.ascontiguousarray(valor).tobytes()
+    if isinstance(valor, dict):
+        return b"{" + b",".join(repr(k).encode() + b":" + _bytes_clave(v) for k, v in valor.items()) + b"}"
+    return repr(valor).encode()
+
+
+def clave_informe(solicitud):
+    """Hash determinístico de una solicitud de informe (dict de entradas)."""
+    return hash_contenido(_bytes_clave(solicitud))
+
+
+def _clave_disco(clave):
+    # El PDF lleva la fecha en el encabezado: en disco vale sólo por el día en que se generó
+    return ("informe", clave, date.today().isoformat())
+
+
+# Etapas que corren en los procesos del pool
+def _etapa_grafico_tbp(temperaturas, volumenes):
+    from .graficos import grafico_tbp
+
+    return grafico_tbp(temperaturas, volumenes, "informe")
+
+
+def _etapa_grafico_rendimiento(productos, volumenes):
+    from .graficos import grafico_rendimiento
+
+    return grafico_rendimiento(productos, volumenes, "informe")
+
+
+def _etapa_pdf(argumentos):
+    from .informe import generar_informe
+
+    return generar_informe(**argumentos)
+
+
+class ColaInformes:
+    """Genera informes con `generar_informe` en segundo plano, sin duplicar trabajos.
+
+    La solicitud es un dict con kw, api, tipo, ingresos, pona, rendimiento,
+    anexos (como en `generar_informe`) y, opcionalmente, la curva TBP en
+    'temperaturas' / 'volumenes' para el gráfico. Con `procesos=False` las
+    etapas corren en hilos (útil donde no se pueden crear procesos).
+    `disco` es la `CacheDisco` de los PDF terminados (None para no usarla).
+    """
+
+    def __init__(self, workers=2, vencimiento=VENCIMIENTO_S, procesos=True, disco=CACHE_DISCO):
+        self.vencimiento = vencimiento
+        self.disco = disco
+        if procesos:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: el servidor de Streamlit tiene hilos y no es seguro hacer fork
+            self._pool = ProcessPoolExecutor(max_workers=workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._coordinadores = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="informe")
+        self._trabajos = {}
+        self._lock = threading.Lock()
+
+    def enviar(self, solicitud):
+        """Encola la solicitud (o reutiliza el trabajo igual en curso o terminado); devuelve su clave."""
+        clave = clave_informe(solicitud)
+        with self._lock:
+            self._limpiar_vencidos()
+            existente = self._trabajos.get(clave)
+            if existente is not None and existente.estado != ERROR:
+                return clave
+            trabajo = self._trabajos[clave] = Trabajo(clave)
+        pdf = self.disco.leer(_clave_disco(clave)) if self.disco is not None else None
+        if pdf is not None:
+            trabajo.pdf = pdf
+            self._terminar(trabajo)
+            return clave
+        self._coordinadores.submit(self._ejecutar, trabajo, dict(solicitud))
+        return clave
+
+    def estado(self, clave):
+        """El `Trabajo` de esa clave, o None si no existe o ya venció."""
+        with self._lock:
+            self._limpiar_vencidos()
+            return self._trabajos.get(clave)
+
+    def trabajos(self):
+        with self._lock:
+            self._limpiar_vencidos()
+            return list(self._trabajos.values())
+
+    def _limpiar_vencidos(self):
+        ahora = time.time()
+        vencidos = [c for c, t in self._trabajos.items()
+                    if t.finalizado and ahora - t.terminado > self.vencimiento]
+        for clave in vencidos:
+            del self._trabajos[clave]
+
+    def _ejecutar(self, trabajo, solicitud):
+        temperaturas = solicitud.pop("temperaturas", None)
+        volumenes = solicitud.pop("volumenes", None)
+        rendimiento = solicitud.get("rendimiento")
+        etapas = []
+        if temperaturas is not None:
+            etapas.append(("Gráfico TBP", "grafico_tbp", _etapa_grafico_tbp,
+                           (np.asarray(temperaturas), np.asarray(volumenes))))
+        if isinstance(rendimiento, pd.DataFrame):
+            etapas.append(("Gráfico de rendimiento", "grafico_rendimiento", _etapa_grafico_rendimiento,
+                           (list(rendimiento["Producto"]), rendimiento["Volumen [%]"].to_numpy())))
+        total = len(etapas) + 1
+
+        trabajo.estado = EN_CURSO
+        try:
+            for i, (etapa, argumento, funcion, args) in enumerate(etapas):
+                trabajo.etapa = etapa
+                trabajo.progreso = i / total
+                solicitud[argumento] = self._pool.submit(funcion, *args).result()
+            trabajo.etapa = "Armando el PDF"
+            trabajo.progreso = len(etapas) / total
+            trabajo.pdf = self._pool.submit(_etapa_pdf, solicitud).result()
+            if self.disco is not None:
+                self.disco.escribir(_clave_disco(trabajo.clave), trabajo.pdf)
+            self._terminar(trabajo)
+        except Exception as e:
+            trabajo.etapa = "Error"
+            trabajo.error = f"{type(e).__name__}: {e}"
+            trabajo.terminado = time.time()
+            trabajo.estado = ERROR
+
+    def _terminar(self, trabajo):
+        trabajo.etapa = "Listo"
+        trabajo.progreso = 1.0
+        trabajo.terminado = time.time()
+        trabajo.estado = LISTO
+
+    def cerrar(self):
+        self._coordinadores.shutdown(wait=False, cancel_futures=True)
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,718 @@
+# modules.py - Implementa cada una de las pestañas de Crude Analyzer Pro
+#
+# Cada pestaña es un fragmento de Streamlit: un widget dentro de una pestaña
+# vuelve a ejecutar sólo esa pestaña. Las dependencias entre pestañas pasan
+# por st.session_state y son explícitas:
+#   - ensayo activo (tbp, analisis, kw, api, tipo_crudo): lo escriben "Datos
+#     del Crudo" y "Biblioteca"; al cambiar se re-ejecuta toda la app. La curva
+#     medida se guarda sólo compacta, como un array (2, n) (ver sesion.py); el
+#     interpolante `CurvaTBP` no se guarda en la sesión.
+#   - precios: los escribe "Evaluación Económica"; al cambiar se re-ejecutan
+#     sólo los fragmentos de DEPENDEN_DE_PRECIOS.
+#   - pona: lo escribe "Análisis PONA" y sólo lo lee el informe al generarse.
+#   - trabajo_informe: clave del PDF pedido a la cola de informes (ver trabajos.py).
+#   - backtest: lo arma "Backtest" y se puede desalojar si la sesión pasa de su
+#     presupuesto de memoria (PRESUPUESTO); la pestaña lo vuelve a armar.
+#
+# Los módulos que usa una sola pestaña (biblioteca, mezclas, escenarios, backtest,
+# DHA, cola de informes) se importan dentro de esa pestaña y no al cargar la app.
+
+import os
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from crude_analyzer_pro import (
+    CORTES, CRUDO_LIVIANO, CRUDO_MEDIANO, CRUDO_PESADO, FRACCIONES, PRECIOS_DEFECTO,
+    ingresos, tabla_ingresos, tabla_rendimiento,
+)
+from crude_analyzer_pro import metricas
+from crude_analyzer_pro.cache import (
+    ajustar_ensayo, analizar_dha, analizar_ensayo, cargar_dha, cargar_historial, cargar_pona, cargar_tbp,
+    serie_comparacion,
+)
+from crude_analyzer_pro.caracterizacion import KELVIN, pseudocomponentes_lote, tabla_pseudocomponentes, vabp
+from crude_analyzer_pro.conversion import TBP, TIPOS_CURVA
+from crude_analyzer_pro.decimacion import puntos_por_ancho
+from crude_analyzer_pro.graficos import (
+    ESTILO_COMPARACION, grafico_backtest, grafico_comparacion, grafico_histograma, grafico_pona, grafico_rendimiento,
+    grafico_tbp,
+)
+from crude_analyzer_pro.metricas import medir
+from crude_analyzer_pro.sesion import PresupuestoSesion, curva_compacta
+
+# Fragmentos que leen st.session_state.precios
+DEPENDEN_DE_PRECIOS = ["economia", "escenarios", "mezclas"]
+
+ESTADO_INICIAL = {
+    "tbp": None,
+    "analisis": None,
+    "tbp_hash": None,
+    "clave_archivo": None,
+    "kw": "",
+    "api": "",
+    "tipo_crudo": "",
+    "pona": {},
+    "ensayo_biblioteca": None,
+    "trabajo_informe": None,
+    "backtest": None,
+}
+
+
+# Entradas grandes que se pueden descartar y recalcular si la sesión pasa de su presupuesto
+PRESUPUESTO = PresupuestoSesion({"backtest": None})
+
+
+def inicializar_estado():
+    for clave, valor in ESTADO_INICIAL.items():
+        if clave not in st.session_state:
+            st.session_state[clave] = valor
+    if "precios" not in st.session_state:
+        st.session_state.precios = dict(PRECIOS_DEFECTO)
+
+
+def liberar_memoria():
+    """Aplica el presupuesto de memoria de la sesión; devuelve las entradas desalojadas."""
+    return PRESUPUESTO.aplicar(st.session_state)
+
+
+def _metricas_sesion():
+    # Fuera del hilo de un script (p. ej. la cola de informes) no hay sesión
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get("metricas_sesion")
+
+
+# Las mediciones de las secciones calientes también van al registro de la sesión,
+# que existe sólo mientras el panel de métricas está abierto
+metricas.fuente_sesion = _metricas_sesion
+
+
+def mostrar_grafico(png):
+    with medir("render_grafico"):
+        st.image(png)
+
+
+@st.cache_resource
+def abrir_biblioteca():
+    from crude_analyzer_pro.biblioteca import Biblioteca
+
+    biblioteca = Biblioteca()
+    # Bibliotecas anteriores al ajuste paramétrico: se ajustan una vez por proceso
+    biblioteca.ajustar_pendientes()
+    return biblioteca
+
+
+@st.cache_resource
+def cola_informes():
+    from crude_analyzer_pro.trabajos import ColaInformes
+
+    # Compartida entre sesiones: el mismo informe pedido por dos usuarios se genera una vez
+    return ColaInformes()
+
+
+def _activar_ensayo(temperaturas, volumenes, clave, analisis):
+    """Publica el ensayo activo para el resto de las pestañas."""
+    st.session_state.tbp = curva_compacta(temperaturas, volumenes)
+    st.session_state.tbp_hash = clave
+    st.session_state.analisis = analisis
+    st.session_state.kw = analisis["kw"]
+    st.session_state.api = analisis["api"]
+    st.session_state.tipo_crudo = analisis["tipo"]
+
+
+def _precios_cambiaron():
+    st.session_state.precios = {fr: st.session_state[f"precio_{fr}"] for fr in FRACCIONES}
+    st.rerun(DEPENDEN_DE_PRECIOS)
+
+
+def mostrar_pseudocomponentes(curva, densidad):
+    with st.expander("🧩 Pseudocomponentes"):
+        n = st.slider("🔢 Cantidad de pseudocomponentes", 5, 200, 20, step=5)
+        r = pseudocomponentes_lote(curva.temperaturas, curva.volumenes, densidad, n)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("🌡️ VABP [°C]", f"{r['vabp'][0]:.1f}")
+        col2.metric("🧪 Kw pseudocomponentes (media cúbica de Tb, °R)", f"{r['kw_crudo'][0]:.2f}")
+        col3.metric("⚖️ Peso molecular medio", f"{r['peso_molecular_medio'][0]:.0f} g/mol")
+        st.dataframe(tabla_pseudocomponentes(r).style.format({
+            "Tb [°C]": "{:.1f}", "Volumen [%]": "{:.2f}", "SG": "{:.4f}", "Kw": "{:.2f}",
+            "Peso molecular [g/mol]": "{:.1f}", "Fracción en volumen [%]": "{:.2f}",
+            "Fracción en peso [%]": "{:.2f}", "Fracción molar [%]": "{:.2f}",
+        }), use_container_width=True)
+        st.caption(f"Caracterizado el {r['volumen_caracterizado'][0]:.1f} % del volumen (tramo medido de la curva). "
+                   "SG con Kw constante ajustado a la densidad del crudo; peso molecular de Riazi–Daubert. "
+                   "Este Kw usa Tb en °R y la SG de cada pseudocomponente; el Factor de Watson de arriba usa la "
+                   "temperatura media en K y la densidad del crudo, así que sus valores no son comparables.")
+
+
+def mostrar_ajuste(ensayo):
+    with st.expander("📈 Ajuste paramétrico (distribución de Riazi)"):
+        modelo = ajustar_ensayo(ensayo)
+        if np.isnan(modelo.rmse):
+            st.warning("⚠️ La curva no tiene suficientes puntos para ajustar el modelo.")
+            return
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("T0 [°C]", f"{modelo.t0 - KELVIN:.1f}")
+        col2.metric("A", f"{modelo.a:.4f}")
+        col3.metric("B", f"{modelo.b:.4f}")
+        col4.metric("Error RMS [% vol]", f"{modelo.rmse:.2f}")
+        st.dataframe(pd.DataFrame({
+            "Curva [% vol]": ensayo.curva.rendimientos(CORTES),
+            "Modelo [% vol]": modelo.rendimientos(CORTES),
+        }, index=list(CORTES)).round(2), use_container_width=True)
+        st.caption(f"El modelo extrapola por encima del último punto medido "
+                   f"({ensayo.curva.temperaturas[-1]:.0f} °C), donde la curva deja el volumen constante.")
+
+
+# --- TAB 1: DATOS DEL CRUDOS ---
+@st.fragment(key="datos")
+def tab_datos_crudo():
+    st.subheader("📥 Ingreso de datos del crudo")
+    col1, col2 = st.columns(2)
+    with col1:
+        densidad = st.number_input("📦 Densidad a 15 °C [kg/m³]", value=850.0, min_value=600.0, max_value=1100.0)
+    with col2:
+        # Por defecto la temperatura media es el VABP de la curva; se puede fijar a mano
+        temp_manual = None
+        if st.toggle("✍️ Ingresar la temperatura media a mano"):
+            temp_manual = st.number_input("🌡️ Temperatura media de ebullición TBP [K]", value=673.15,
+                                          min_value=300.0, max_value=800.0)
+
+    archivo = st.file_uploader("📂 Cargar curva de destilación (.csv con columnas 'Temperatura' y 'Volumen')",
+                               type="csv", key="archivo_tbp")
+    tipo_curva = st.radio("📏 Tipo de curva", TIPOS_CURVA, horizontal=True,
+                          help="Las curvas ASTM D86 y D2887 se convierten a TBP en los puntos estándar "
+                               "(0 a 95 % o 100 %) antes de calcular Kw, fracciones y cortes.")
+    resolucion = st.number_input(
+        "🎯 Resolución máxima de la curva [puntos] (0 = sin reducir)", value=2000, min_value=0, step=500,
+        help="Las curvas de destilación simulada se reducen a esta cantidad de puntos; "
+             "los límites de fracciones y cortes se conservan exactos."
+    )
+
+    ensayo = None
+    if archivo is not None:
+        try:
+            ensayo = cargar_tbp(archivo.getvalue(), resolucion or None, tipo_curva)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+        except Exception as e:
+            st.error(f"❌ Error al leer el archivo TBP: {e}")
+
+    if ensayo is not None:
+        temp_k = temp_manual if temp_manual is not None else round(vabp(ensayo.curva.temperaturas,
+                                                                         ensayo.curva.volumenes) + KELVIN, 2)
+        analisis = analizar_ensayo(ensayo, densidad, temp_k)
+        clave = (ensayo.hash, densidad, temp_k)
+        if clave != st.session_state.clave_archivo:
+            # Archivo o propiedades nuevas: pasa a ser el ensayo activo y todas las pestañas dependen de él
+            st.session_state.clave_archivo = clave
+            st.session_state.ensayo_biblioteca = None
+            _activar_ensayo(ensayo.df["Temperatura"], ensayo.df["Volumen"], ensayo.hash, analisis)
+            st.rerun()
+
+    if ensayo is not None and st.session_state.ensayo_biblioteca is None:
+        df = ensayo.df
+        st.success("✅ Curva TBP cargada correctamente." if tipo_curva == TBP else
+                   f"✅ Curva {tipo_curva} cargada y convertida a TBP ({len(df)} puntos estándar).")
+        ing = ensayo.ingesta
+        st.caption(
+            f"⏱️ {ing.filas:,} filas leídas en {ing.segundos * 1000:.0f} ms (motor {ing.motor}) · "
+            f"{ing.puntos:,} puntos conservados · memoria {ing.bytes_curva / 1024:,.0f} KiB "
+            f"(≈{max(ing.bytes_sin_optimizar - ing.bytes_curva, 0) / 1024:,.0f} KiB ahorrados)"
+        )
+
+        mostrar_grafico(grafico_tbp(df["Temperatura"], df["Volumen"], "oscuro", clave=ensayo.hash))
+
+        kw, api, tipo = analisis["kw"], analisis["api"], analisis["tipo"]
+        if temp_manual is None:
+            st.caption(f"🌡️ Temperatura media desde la curva (VABP): {temp_k:.2f} K")
+        st.metric("🧪 Factor de Watson", value=kw)
+        st.metric("🧮 Grados API", value=api)
+        st.success(f"🏷️ Clasificación: **{tipo}**")
+        mostrar_pseudocomponentes(ensayo.curva, densidad)
+        mostrar_ajuste(ensayo)
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            nombre_ensayo = st.text_input("🏷️ Nombre del ensayo", value=os.path.splitext(archivo.name)[0])
+            compacto = st.checkbox("🗜️ Guardar sólo el modelo ajustado (sin la curva de laboratorio)")
+        with col2:
+            if st.button("💾 Guardar en la biblioteca"):
+                id_ensayo = abrir_biblioteca().guardar(nombre_ensayo, ensayo.curva, densidad, temp_k,
+                                                       st.session_state.precios, clave=ensayo.hash,
+                                                       compacto=compacto)
+                st.success(f"✅ Ensayo guardado en la biblioteca (id {id_ensayo}).")
+    elif st.session_state.ensayo_biblioteca is not None:
+        st.info(f"📚 Trabajando con el ensayo **{st.session_state.ensayo_biblioteca}** de la biblioteca.")
+        temperaturas, volumenes = st.session_state.tbp
+        mostrar_grafico(grafico_tbp(temperaturas, volumenes, "oscuro", clave=st.session_state.tbp_hash))
+        st.metric("🧪 Factor de Watson", value=st.session_state.kw)
+        st.metric("🧮 Grados API", value=st.session_state.api)
+        st.success(f"🏷️ Clasificación: **{st.session_state.tipo_crudo}**")
+    else:
+        st.info("📌 Cargá un archivo CSV con la curva TBP para continuar.")
+
+
+# --- TAB 2: EVALUACIÓN ECONÓMICA ---
+@st.fragment(key="economia")
+def tab_evaluacion_economica():
+    st.subheader("💰 Estimación de ingresos por fracción TBP")
+    etiquetas = {
+        "<80°C (LPG-NL)": "💸 Precio <80°C (LPG - Nafta Liviana)",
+        "80–120°C (NL-NV)": "💸 Precio 80–120°C",
+        "120–180°C (NP)": "💸 Precio 120–180°C",
+        "180–360°C (GO+K)": "💸 Precio 180–360°C",
+        ">360°C (GOP+CR)": "💸 Precio >360°C",
+    }
+    # Con key + on_change, un cambio de precio re-ejecuta sólo las pestañas que dependen de los precios
+    for fr, etiqueta in etiquetas.items():
+        st.number_input(etiqueta, value=st.session_state.precios[fr], key=f"precio_{fr}", on_change=_precios_cambiaron)
+    precios = st.session_state.precios
+
+    if st.session_state.analisis is not None:
+        volumenes = st.session_state.analisis["fracciones"]
+        df_ingresos = tabla_ingresos(volumenes, precios)
+        total = ingresos(volumenes, list(precios.values())).sum()
+        st.dataframe(df_ingresos.style.format({
+            "Volumen [%]": "{:.1f}",
+            "Precio [USD/100 kg]": "${:.2f}",
+            "Ingreso Estimado [USD]": "${:.2f}"
+        }), use_container_width=True)
+        st.metric("💰 Ingreso total estimado", f"${total:,.2f}")
+    else:
+        st.warning("⚠️ Cargá la curva TBP primero.")
+
+
+# --- TAB 3: PONA ---
+@st.fragment(key="pona")
+def tab_pona():
+    from crude_analyzer_pro.dha import es_dha
+
+    st.subheader("🧪 Análisis PONA (Parafínicos, Olefínicos, Nafténicos, Aromáticos)")
+
+    pona_csv = st.file_uploader("📁 Cargar CSV de composición PONA o DHA por componente (opcional)", type="csv")
+
+    if pona_csv and es_dha(pona_csv.getvalue()):
+        try:
+            paraf, olef, naft, arom = mostrar_dha(pona_csv.getvalue())
+        except Exception as e:
+            paraf = olef = naft = arom = 0
+            st.error(f"❌ Error en el archivo DHA: {e}")
+    elif pona_csv:
+        try:
+            paraf, olef, naft, arom = cargar_pona(pona_csv.getvalue())
+            st.success("✅ Composición cargada desde CSV.")
+        except:
+            paraf = olef = naft = arom = 0
+            st.error("❌ Error en archivo CSV.")
+    else:
+        paraf = st.slider("🟦 % Parafínicos", 0, 100, 40)
+        olef = st.slider("🟧 % Olefínicos", 0, 100, 5)
+        naft = st.slider("🟨 % Nafténicos", 0, 100, 25)
+        arom = st.slider("🟥 % Aromáticos", 0, 100, 30)
+
+    total_pona = paraf + olef + naft + arom
+    st.write(f"📊 Suma total: {total_pona:g}%")
+
+    if not np.isfinite(total_pona) or abs(total_pona - 100) > 1e-6:
+        st.error("⚠️ La suma debe ser 100%.")
+        st.session_state.pona = {}
+    else:
+        mostrar_grafico(grafico_pona(paraf, olef, naft, arom))
+        st.session_state.pona = {
+            "Parafínicos": paraf,
+            "Olefínicos": olef,
+            "Nafténicos": naft,
+            "Aromáticos": arom
+        }
+
+
+def mostrar_dha(datos):
+    """Matrices PONA de un DHA por componente; devuelve el PONA total redondeado (suma 100)."""
+    from crude_analyzer_pro.dha import GRUPOS_PONA, OTROS
+
+    componentes = cargar_dha(datos)
+    cortes = list(componentes["Corte"].cat.categories)
+    # Cortes con el nombre de los cortes TBP: se combinan con el rendimiento del ensayo activo
+    pesos = None
+    if st.session_state.analisis is not None and set(cortes) <= set(CORTES):
+        pesos = dict(zip(CORTES, st.session_state.analisis["cortes"]))
+
+    inicio = time.perf_counter()
+    resultado = analizar_dha(datos, pesos)
+    st.success(f"✅ DHA con {len(componentes):,} componentes en {len(cortes)} corte(s), agregado en "
+               f"{(time.perf_counter() - inicio) * 1000:.1f} ms.")
+    if pesos is not None:
+        st.caption("⚖️ Cortes combinados con el rendimiento por corte del ensayo activo.")
+    if resultado["sin_identificar"] > 0.01:
+        etiquetas = ", ".join(e or "(vacío)" for e in resultado["etiquetas_sin_identificar"])
+        st.warning(f"❔ {resultado['sin_identificar']:.2f} % de la muestra en **{OTROS}** (grupos: {etiquetas}); "
+                   "no entra en el PONA, que se normaliza sobre lo identificado.")
+
+    st.markdown("#### 🧮 % en masa por número de carbonos y grupo")
+    st.dataframe(resultado["matriz"].round(3), use_container_width=True)
+    if len(cortes) > 1:
+        st.markdown("#### ✂️ PONA por corte [% en masa de cada corte]")
+        st.dataframe(resultado["por_corte"].round(2), use_container_width=True)
+        corte = st.selectbox("🔎 Detalle por número de carbonos del corte", cortes)
+        st.dataframe(resultado["por_corte_carbonos"].loc[corte].round(3), use_container_width=True)
+
+    paraf, olef, naft = (round(float(resultado["pona"][g]), 2) for g in GRUPOS_PONA[:3])
+    return paraf, olef, naft, round(100 - paraf - olef - naft, 2)
+
+
+# --- TAB 4: RENDIMIENTO ESTIMADO ---
+@st.fragment(key="rendimiento")
+def tab_rendimiento():
+    st.subheader("⚗️ Estimación de Rendimiento por Producto")
+
+    if st.session_state.analisis is not None:
+        df_rend = tabla_rendimiento(st.session_state.analisis["cortes"])
+
+        st.dataframe(df_rend, use_container_width=True)
+
+        # Gráfico de barras
+        mostrar_grafico(grafico_rendimiento(df_rend["Producto"], df_rend["Volumen [%]"], "pantalla"))
+
+    else:
+        st.warning("📌 Cargá una curva TBP válida para calcular los rendimientos.")
+
+
+# --- TAB 5: 📄 Generar Informe PDF Profesional ---
+@st.fragment(key="informe")
+def tab_informe():
+    from crude_analyzer_pro.trabajos import ERROR, LISTO
+
+    st.subheader("📄 Generar Informe Técnico en PDF")
+
+    anexo_tbp = st.checkbox("📎 Incluir la curva TBP completa como anexo")
+
+    # El PDF se arma en segundo plano; pedir el mismo informe reutiliza el trabajo
+    if st.button("📥 Generar Informe PDF"):
+        # Las tablas se arman del ensayo activo y los precios actuales
+        analisis = st.session_state.analisis
+        solicitud = {
+            "kw": st.session_state.kw, "api": st.session_state.api, "tipo": st.session_state.tipo_crudo,
+            "pona": st.session_state.pona, "anexos": {},
+        }
+        if analisis is not None:
+            solicitud["ingresos"] = tabla_ingresos(analisis["fracciones"], st.session_state.precios)
+            solicitud["rendimiento"] = tabla_rendimiento(analisis["cortes"])
+        if st.session_state.tbp is not None:
+            temperaturas, volumenes = st.session_state.tbp
+            solicitud["temperaturas"] = temperaturas
+            solicitud["volumenes"] = volumenes
+            if anexo_tbp:
+                solicitud["anexos"]["Anexo: Curva TBP"] = pd.DataFrame({"Temperatura [°C]": temperaturas,
+                                                                        "Volumen destilado [%]": volumenes})
+        st.session_state.trabajo_informe = cola_informes().enviar(solicitud)
+
+    clave = st.session_state.trabajo_informe
+    if clave is None:
+        return
+    trabajo = cola_informes().estado(clave)
+    if trabajo is None:
+        st.info("⌛ El informe generado venció; volvé a generarlo.")
+    elif trabajo.estado == LISTO:
+        st.download_button(
+            label="📄 Descargar Informe PDF",
+            data=BytesIO(trabajo.pdf),
+            file_name="informe_crudo.pdf",
+            mime="application/pdf"
+        )
+    elif trabajo.estado == ERROR:
+        st.error(f"❌ Error al generar el PDF: {trabajo.error}")
+    else:
+        _progreso_informe(clave)
+
+
+@st.fragment(run_every=1)
+def _progreso_informe(clave):
+    trabajo = cola_informes().estado(clave)
+    if trabajo is None or trabajo.finalizado:
+        st.rerun()
+    st.progress(trabajo.progreso, text=f"⏳ {trabajo.etapa}...")
+
+
+# --- TAB 6: ESCENARIOS DE PRECIOS ---
+@st.fragment(key="escenarios")
+def tab_escenarios():
+    from crude_analyzer_pro.escenarios import ingresos_escenarios, percentiles, precios_grilla, precios_montecarlo
+
+    st.subheader("🎲 Distribución de ingresos bajo escenarios de precios")
+
+    if st.session_state.analisis is not None:
+        volumenes = st.session_state.analisis["fracciones"]
+        base = st.session_state.precios
+        modo = st.radio("Tipo de escenarios", ["Monte Carlo", "Grilla"], horizontal=True)
+
+        if modo == "Monte Carlo":
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                n_escenarios = st.number_input("🔢 Escenarios", value=100_000, min_value=1_000, max_value=2_000_000, step=50_000)
+            with col2:
+                correlacion = st.slider("🔗 Correlación entre fracciones", 0.0, 0.99, 0.6)
+            with col3:
+                semilla = st.number_input("🎯 Semilla", value=42, min_value=0)
+            cols = st.columns(len(FRACCIONES))
+            volatilidades = [
+                col.number_input(f"σ {fr} [%]", value=15.0, min_value=0.0, max_value=200.0, key=f"vol_{fr}") / 100
+                for col, fr in zip(cols, FRACCIONES)
+            ]
+            precios_esc = precios_montecarlo(base, volatilidades, correlacion, int(n_escenarios), int(semilla))
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                rango = st.slider("↔️ Rango alrededor del precio base [%]", 0, 100, 20)
+            with col2:
+                pasos = st.slider("🪜 Pasos por fracción", 2, 15, 10)
+            precios_base = [base[fr] for fr in FRACCIONES]
+            precios_esc = precios_grilla([p * (1 - rango / 100) for p in precios_base],
+                                         [p * (1 + rango / 100) for p in precios_base], pasos)
+
+        ingresos_esc = ingresos_escenarios(volumenes, precios_esc)
+        pct = percentiles(ingresos_esc)
+
+        cols = st.columns(len(pct) + 1)
+        cols[0].metric("📊 Media", f"${ingresos_esc.mean():,.2f}")
+        for col, (p, valor) in zip(cols[1:], pct.items()):
+            col.metric(f"P{p}", f"${valor:,.2f}")
+        mostrar_grafico(grafico_histograma(ingresos_esc, {f"P{p}": round(float(v), 2) for p, v in pct.items()}))
+        st.caption(f"{len(precios_esc):,} escenarios evaluados sobre los volúmenes de la pestaña económica.")
+    else:
+        st.warning("⚠️ Cargá la curva TBP primero.")
+
+
+# --- TAB 7: MEZCLAS ---
+@st.fragment(key="mezclas")
+def tab_mezclas():
+    from crude_analyzer_pro.mezclas import (
+        Componentes, curva_mezcla, evaluar_mezclas, optimizar_mezcla, propiedades_mezcla, tabla_mezcla,
+    )
+
+    st.subheader("🧬 Mezcla de crudos y optimización de proporciones")
+    archivos_mezcla = st.file_uploader("📂 Cargar las curvas TBP de los crudos a mezclar (2 a 6 archivos .csv)",
+                                       type="csv", accept_multiple_files=True, key="archivos_mezcla")
+
+    ensayos = []
+    for arch in archivos_mezcla or []:
+        try:
+            ensayos.append((os.path.splitext(arch.name)[0], cargar_tbp(arch.getvalue(), 2000)))
+        except Exception as e:
+            st.error(f"❌ {arch.name}: {e}")
+
+    if len(ensayos) >= 2:
+        st.markdown("#### 📋 Propiedades y proporciones de cada crudo")
+        datos_mezcla = st.data_editor(pd.DataFrame({
+            "Crudo": [nombre for nombre, _ in ensayos],
+            "Densidad [kg/m³]": 850.0,
+            "Temp. media [K]": 673.15,
+            "% Vol": round(100 / len(ensayos), 2),
+        }), hide_index=True, disabled=["Crudo"], key="editor_mezcla")
+
+        componentes = Componentes(
+            datos_mezcla["Crudo"], [e.curva for _, e in ensayos],
+            datos_mezcla["Densidad [kg/m³]"], datos_mezcla["Temp. media [K]"],
+        )
+        proporciones = datos_mezcla["% Vol"].to_numpy(dtype=float)
+
+        if proporciones.sum() <= 0 or (proporciones < 0).any():
+            st.warning("⚠️ Las proporciones deben ser no negativas y sumar más de 0.")
+        else:
+            mezcla = curva_mezcla(componentes.curvas, proporciones)
+            props = propiedades_mezcla(evaluar_mezclas(componentes, proporciones, st.session_state.precios))
+            mostrar_grafico(grafico_tbp(mezcla.temperaturas, mezcla.volumenes, "oscuro"))
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("📦 Densidad [kg/m³]", props["densidad"])
+            col2.metric("🧮 Grados API", props["api"])
+            col3.metric("🧪 Factor de Watson", props["kw"])
+            col4.metric("💵 Ingreso [USD]", f"${props['ingreso']:,.2f}")
+            st.success(f"🏷️ Clasificación de la mezcla: **{props['tipo']}**")
+            st.dataframe(tabla_rendimiento(mezcla.rendimientos(CORTES)), use_container_width=True)
+
+        st.markdown("#### 🔍 Optimización de proporciones")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            api_min = st.number_input("🧮 API mínimo", value=0.0, min_value=0.0, max_value=80.0)
+        with col2:
+            residuo_max = st.number_input("🛢️ Fondo de vacío máximo [% vol]", value=100.0, min_value=0.0, max_value=100.0)
+        with col3:
+            candidatos = st.number_input("🔢 Candidatos por ronda", value=50_000, min_value=1_000, max_value=500_000, step=10_000)
+
+        if st.button("🔍 Optimizar mezcla"):
+            mejor, evaluados = optimizar_mezcla(componentes, st.session_state.precios, api_min=api_min or None,
+                                                residuo_max=residuo_max, candidatos=int(candidatos), semilla=42)
+            if mejor is None:
+                st.error(f"❌ Ninguna de las {evaluados:,} mezclas evaluadas cumple las restricciones.")
+            else:
+                props = propiedades_mezcla(mejor)
+                st.success(f"✅ Mejor mezcla entre {evaluados:,} candidatos: ingreso ${props['ingreso']:,.2f} · "
+                           f"{props['api']} °API · fondo {float(mejor['residuo']):.1f} % vol")
+                st.dataframe(tabla_mezcla(componentes, mejor), use_container_width=True)
+        st.caption("💵 El ingreso usa los precios cargados en la pestaña de evaluación económica.")
+    else:
+        st.info("📌 Cargá al menos dos curvas TBP para armar una mezcla.")
+
+
+# --- TAB 8: BIBLIOTECA DE ENSAYOS ---
+@st.fragment(key="biblioteca")
+def tab_biblioteca():
+    st.subheader("📚 Biblioteca de ensayos")
+    biblioteca = abrir_biblioteca()
+    st.caption(f"🗂️ {len(biblioteca):,} ensayos guardados en `{biblioteca.ruta}`")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        filtro_nombre = st.text_input("🔎 Nombre contiene")
+    with col2:
+        api_desde, api_hasta = st.slider("🧮 Grados API", 0.0, 80.0, (0.0, 80.0))
+    with col3:
+        filtro_tipos = st.multiselect("🏷️ Clasificación", [CRUDO_LIVIANO, CRUDO_MEDIANO, CRUDO_PESADO])
+    st.markdown("**Rendimiento mínimo por corte [% vol]**")
+    cols = st.columns(len(CORTES))
+    minimos_corte = {
+        corte: col.number_input(corte, value=0.0, min_value=0.0, max_value=100.0, key=f"min_{corte}")
+        for col, corte in zip(cols, CORTES)
+    }
+
+    inicio = time.perf_counter()
+    encontrados = biblioteca.buscar(
+        nombre=filtro_nombre,
+        api=(api_desde or None, api_hasta if api_hasta < 80 else None),
+        tipos=filtro_tipos,
+        cortes={corte: v for corte, v in minimos_corte.items() if v > 0},
+    )
+    st.caption(f"⏱️ {len(encontrados):,} ensayos (máx. 500) en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    st.dataframe(encontrados.round(2), use_container_width=True)
+
+    if len(encontrados):
+        col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+        with col1:
+            id_ensayo = st.selectbox("Ensayo", encontrados.index,
+                                     format_func=lambda i: f"{i} · {encontrados.at[i, 'Nombre']}")
+        with col2:
+            cargar = st.button("📂 Cargar ensayo")
+        with col3:
+            similares = st.button("🧭 Similares")
+        with col4:
+            eliminar = st.button("🗑️ Eliminar")
+
+        if similares:
+            try:
+                st.markdown("**Ensayos con la curva más parecida** (según el modelo ajustado)")
+                st.dataframe(biblioteca.similares(id_ensayo).round(2), use_container_width=True)
+            except KeyError as e:
+                st.warning(f"⚠️ {e.args[0]}")
+
+        if cargar:
+            guardado = biblioteca.cargar(id_ensayo)
+            _activar_ensayo(guardado.curva.temperaturas, guardado.curva.volumenes, guardado.hash, guardado.analisis)
+            st.session_state.ensayo_biblioteca = guardado.nombre
+            st.rerun()
+        if eliminar:
+            biblioteca.eliminar(id_ensayo)
+            st.rerun(scope="fragment")
+    else:
+        st.info("📌 No hay ensayos guardados que cumplan los filtros.")
+
+
+# --- TAB 9: COMPARACIÓN DE ENSAYOS ---
+@st.fragment(key="comparacion")
+def tab_comparacion():
+    st.subheader("📊 Comparación de ensayos")
+    archivos = st.file_uploader("📂 Cargar las curvas a comparar (.csv con columnas 'Temperatura' y 'Volumen')",
+                                type="csv", accept_multiple_files=True, key="archivos_comparacion")
+    col1, col2 = st.columns(2)
+    with col1:
+        tipo_curva = st.radio("📏 Tipo de curva", TIPOS_CURVA, horizontal=True, key="tipo_comparacion")
+    with col2:
+        # Un punto por píxel de ancho del gráfico alcanza para que la curva se vea igual que con todos
+        puntos = st.number_input("🎯 Puntos por curva", value=puntos_por_ancho(ESTILO_COMPARACION["ancho"],
+                                                                               ESTILO_COMPARACION["dpi"]),
+                                 min_value=50, max_value=5000, step=100,
+                                 help="Cada curva se reduce con LTTB, que conserva los quiebres de la forma.")
+
+    nombres, series = [], []
+    for arch in archivos or []:
+        try:
+            series.append(serie_comparacion(arch.getvalue(), puntos, tipo_curva))
+            nombres.append(os.path.splitext(arch.name)[0])
+        except Exception as e:
+            st.error(f"❌ {arch.name}: {e}")
+
+    if not series:
+        st.info("📌 Cargá una o más curvas para superponerlas.")
+        return
+    mostrar_grafico(grafico_comparacion(nombres, series))
+    st.caption(f"📉 {sum(len(s[1]) for s in series):,} puntos dibujados para {len(series)} curvas.")
+    st.dataframe(pd.DataFrame([s[3] for s in series], index=nombres, columns=list(CORTES)).round(2),
+                 use_container_width=True)
+
+
+# --- TAB 10: BACKTEST SOBRE HISTORIAL DE PRECIOS ---
+@st.fragment(key="backtest")
+def tab_backtest():
+    from crude_analyzer_pro.historico import Backtest
+
+    st.subheader("📈 Backtest del ingreso sobre un historial de precios")
+    archivo = st.file_uploader("📂 Cargar historial diario de precios (.csv o .parquet con 'Fecha' y una columna "
+                               "por fracción)", type=["csv", "parquet"], key="archivo_historial")
+    incluir_biblioteca = st.checkbox("📚 Incluir los ensayos de la biblioteca (máx. 500)")
+
+    # Volúmenes por fracción ya calculados: los del ensayo activo y los guardados en la biblioteca
+    nombres, volumenes = [], []
+    if st.session_state.analisis is not None:
+        nombres.append("Ensayo activo")
+        volumenes.append(st.session_state.analisis["fracciones"])
+    if incluir_biblioteca:
+        guardados = abrir_biblioteca().buscar()
+        nombres.extend(f"{id_ensayo} · {nombre}" for id_ensayo, nombre in guardados["Nombre"].items())
+        volumenes.extend(guardados[list(FRACCIONES)].to_numpy(dtype=float))
+
+    if archivo is None or not volumenes:
+        st.info("📌 Cargá un historial de precios y una curva TBP (o incluí la biblioteca).")
+        return
+    try:
+        historial = cargar_historial(archivo.getvalue(), archivo.name)
+    except Exception as e:
+        st.error(f"❌ Error al leer el historial de precios: {e}")
+        return
+
+    volumenes = np.asarray(volumenes, dtype=float)
+    clave = (archivo.file_id, tuple(nombres), volumenes.round(6).tobytes())
+    if st.session_state.backtest is None or st.session_state.backtest[0] != clave:
+        inicio = time.perf_counter()
+        # Lugar para el historial y un año de días agregados a mano, no el doble del historial
+        backtest = Backtest(volumenes, nombres, capacidad=len(historial) + 365)
+        backtest.agregar_historial(historial)
+        st.session_state.backtest = (clave, backtest)
+        st.caption(f"⏱️ {len(backtest):,} días x {len(nombres):,} ensayos en "
+                   f"{(time.perf_counter() - inicio) * 1000:.0f} ms")
+    PRESUPUESTO.usar(st.session_state, "backtest")
+    backtest = st.session_state.backtest[1]
+
+    with st.form("agregar_dia"):
+        st.markdown("**➕ Agregar un día** (sólo actualiza las ventanas móviles, sin recalcular el historial)")
+        fecha = st.date_input("📅 Fecha", value=backtest.ultima_fecha() + pd.Timedelta(days=1))
+        ultimos = backtest.ultimos_precios()
+        cols = st.columns(len(FRACCIONES))
+        precios_dia = [col.number_input(fr, value=ultimos[fr], key=f"backtest_{fr}")
+                       for col, fr in zip(cols, FRACCIONES)]
+        if st.form_submit_button("➕ Agregar"):
+            try:
+                backtest.agregar(fecha, precios_dia)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+
+    st.caption(f"📅 {len(backtest):,} días, hasta el {backtest.ultima_fecha():%Y-%m-%d}")
+    st.dataframe(backtest.estadisticas().round(2), use_container_width=True)
+    elegido = st.selectbox("🔎 Ensayo a graficar", range(len(nombres)), format_func=lambda i: nombres[i])
+    mostrar_grafico(grafico_backtest(backtest.serie(elegido), nombres[elegido]))
+
+    if "backtest" in liberar_memoria():
+        st.caption("♻️ El backtest no entra en el presupuesto de memoria de la sesión: se vuelve a armar en cada "
+                   "cambio y los días agregados a mano no se conservan.")